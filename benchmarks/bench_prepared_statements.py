@@ -0,0 +1,59 @@
+# benchmarks/bench_prepared_statements.py
+"""Mede a latência de uma atualização da agenda com e sem instruções preparadas.
+
+Uma "atualização" repete as consultas que a interface faz ao trocar de dia:
+get_tasks_by_date, get_eventos_ativos e find_task_id.
+
+Uso (com o banco configurado em model/db/config.py):
+    python benchmarks/bench_prepared_statements.py --rounds 500
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model.db.repository import AgendaRepository
+from model.db.database import close_pool
+
+def refresh(repository, day):
+    tasks = repository.get_tasks_by_date(day)
+    repository.get_eventos_ativos()
+    for task in tasks[:5]:
+        repository.find_task_id(day, task[1], task[3])
+
+def run(use_prepared, rounds, warmup):
+    repository = AgendaRepository(use_prepared_statements=use_prepared)
+    today = date.today()
+    for i in range(warmup):
+        refresh(repository, today + timedelta(days=i % 7))
+
+    timings = []
+    for i in range(rounds):
+        start = time.perf_counter()
+        refresh(repository, today + timedelta(days=i % 7))
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def report(label, timings):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{label:<14} mediana={statistics.median(timings):.3f}ms p95={p95:.3f}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=500)
+    parser.add_argument('--warmup', type=int, default=20)
+    args = parser.parse_args()
+
+    try:
+        report("sem PREPARE", run(False, args.rounds, args.warmup))
+        report("com PREPARE", run(True, args.rounds, args.warmup))
+    finally:
+        close_pool()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# benchmarks/bench_snapshot_restore.py
+"""Compara a restauração via snapshot binário (COPY) com a reconstrução a partir do JSON.
+
+O caminho JSON é o que existia antes: get_all_data serializado em JSON, lido de
+volta e gravado linha a linha com INSERT (em lotes, via restore_backup_rows).
+O caminho binário usa snapshot_service (COPY TO/FROM com troca transacional).
+
+ATENÇÃO: os dois caminhos substituem tasks e eventos do banco configurado.
+Rode contra um banco de teste populado. Uso:
+    python benchmarks/bench_snapshot_restore.py --rounds 3
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model.db.repository import AgendaRepository, TASK_COLUMNS, BACKUP_EVENTO_COLUMNS
+from model.db.database import close_pool
+from services import export_service, snapshot_service
+
+def json_roundtrip(repository, path):
+    start = time.perf_counter()
+    with open(path, 'w', encoding='utf-8') as f:
+        export_service.write_json(repository.get_all_data(), f)
+    dumped = time.perf_counter()
+
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    step = {
+        'tipo': 'full',
+        'eventos': [tuple(e.get(c) for c in BACKUP_EVENTO_COLUMNS.split(", ")) for e in data['eventos']],
+        'tasks': [tuple(t.get(c) for c in TASK_COLUMNS.split(", ")) for t in data['tasks']],
+        'deleted': {},
+    }
+    if not repository.restore_backup_rows([step]):
+        raise RuntimeError("Falha na restauração via JSON")
+    return dumped - start, time.perf_counter() - dumped
+
+def copy_roundtrip(repository, path):
+    start = time.perf_counter()
+    snapshot_service.create_snapshot(repository, path)
+    dumped = time.perf_counter()
+    snapshot_service.restore_snapshot(repository, path)
+    return dumped - start, time.perf_counter() - dumped
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    repository = AgendaRepository()
+    print(f"tarefas no banco: {repository.count_tasks()}")
+    workdir = tempfile.mkdtemp(prefix='agenda_bench_')
+    try:
+        for label, func, name in (("JSON", json_roundtrip, 'export.json'),
+                                  ("COPY binary", copy_roundtrip, 'snapshot.tar')):
+            path = os.path.join(workdir, name)
+            dumps, restores = [], []
+            for _ in range(args.rounds):
+                dump, restore = func(repository, path)
+                dumps.append(dump)
+                restores.append(restore)
+            print(f"{label:<12} dump={statistics.median(dumps):.2f}s restore={statistics.median(restores):.2f}s "
+                  f"arquivo={os.path.getsize(path) / 1e6:.1f}MB")
+    finally:
+        close_pool()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+# benchmarks/explain_indexes.py
+"""EXPLAIN ANALYZE dos formatos de consulta de tasks, antes e depois de 03_query_indexes.sql.
+
+Cria o schema temporário agenda_bench com uma cópia da estrutura de tasks, gera
+--rows linhas sintéticas (padrão: 1 milhão, ~10 anos de agenda) e roda cada
+consulta primeiro com os índices antigos de coluna única e depois com os índices
+compostos/parciais da migração 03. O schema é removido ao final (--keep mantém).
+
+Uso (com o banco configurado em model/db/config.py):
+    python benchmarks/explain_indexes.py --rows 1000000 > explain_indexes.txt
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model.db.database import get_db_connection, release_db_connection, close_pool
+
+OLD_INDEXES = """
+    CREATE INDEX idx_tasks_date ON tasks(date);
+    CREATE INDEX idx_tasks_status ON tasks(status);
+    CREATE INDEX idx_tasks_is_agendamento ON tasks(is_agendamento);
+    CREATE INDEX idx_tasks_is_evento ON tasks(is_evento);
+    CREATE UNIQUE INDEX uq_tasks_evento_date ON tasks(evento_id, date);
+"""
+
+MIGRATION = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                         'model', 'db', '03_query_indexes.sql')
+
+# (título, consulta) com os mesmos predicados do repositório
+QUERIES = [
+    ("Visão diária: date = ? AND tipo/status",
+     """SELECT id FROM tasks t WHERE t.date = DATE '2026-03-10'
+        AND ((t.is_evento = FALSE AND t.is_agendamento = FALSE) OR t.status = 'pendente')"""),
+    ("Filtro: date = ? AND status = ?",
+     "SELECT id FROM tasks WHERE date = DATE '2026-03-10' AND status = 'concluída'"),
+    ("Agendamentos pendentes nas próximas 24h",
+     """SELECT id, description, nome, date FROM tasks
+        WHERE is_agendamento = TRUE AND status = 'pendente'
+          AND date >= DATE '2026-03-10' AND date <= DATE '2026-03-11' ORDER BY date"""),
+    ("Agendamentos pendentes futuros (snapshot da tela)",
+     """SELECT id FROM tasks WHERE is_agendamento = TRUE AND is_evento = FALSE
+        AND status = 'pendente' AND date > DATE '2026-03-10'"""),
+    ("Ocorrências futuras de um evento: evento_id = ? AND date >= ?",
+     "SELECT id FROM tasks WHERE evento_id = 42 AND date >= DATE '2026-03-10'"),
+    ("Busca por conteúdo: date, description, nome",
+     """SELECT id FROM tasks WHERE date = DATE '2026-03-10'
+        AND md5(description) = md5('Tarefa 1234') AND description = 'Tarefa 1234' AND nome = 'Nome 4' LIMIT 1"""),
+]
+
+def explain(cur, title, query):
+    cur.execute(f"EXPLAIN (ANALYZE, BUFFERS) {query}")
+    print(f"--- {title}")
+    for (line,) in cur.fetchall():
+        print(f"    {line}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--keep', action='store_true', help="Não remover o schema agenda_bench")
+    args = parser.parse_args()
+
+    conn = get_db_connection()
+    try:
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute("DROP SCHEMA IF EXISTS agenda_bench CASCADE;")
+            cur.execute("CREATE SCHEMA agenda_bench;")
+            cur.execute("SET search_path TO agenda_bench, public;")
+            cur.execute("""
+                CREATE TABLE tasks (
+                    id SERIAL PRIMARY KEY,
+                    description TEXT NOT NULL,
+                    priority VARCHAR(20),
+                    nome VARCHAR(100),
+                    is_agendamento BOOLEAN DEFAULT FALSE,
+                    is_evento BOOLEAN DEFAULT FALSE,
+                    dias_evento VARCHAR(3)[],
+                    date DATE NOT NULL,
+                    status VARCHAR(20) DEFAULT 'pendente',
+                    evento_id INTEGER,
+                    user_id INTEGER
+                );
+            """)
+            # ~10 anos: 1/3 tarefas, 1/6 agendamentos, 1/2 ocorrências de 200 eventos
+            cur.execute("""
+                INSERT INTO tasks (description, priority, nome, is_agendamento, is_evento, date, status, evento_id, user_id)
+                SELECT 'Tarefa ' || (g %% 5000),
+                       (ARRAY['muito-importante', 'importante', 'média', 'simples'])[1 + g %% 4],
+                       'Nome ' || (g %% 10),
+                       g %% 6 = 1,
+                       g %% 2 = 0,
+                       DATE '2020-01-01' + (g %% 3650),
+                       CASE WHEN g %% 5 = 0 THEN 'pendente' WHEN g %% 7 = 0 THEN 'cancelada' ELSE 'concluída' END,
+                       CASE WHEN g %% 2 = 0 THEN g %% 200 END,
+                       1
+                FROM generate_series(1, %s) AS g
+                ON CONFLICT DO NOTHING;
+            """, (args.rows,))
+            print(f"Linhas geradas: {args.rows}")
+
+            print("\n===== Índices antigos (coluna única) =====")
+            cur.execute(OLD_INDEXES.replace(
+                "CREATE UNIQUE INDEX uq_tasks_evento_date ON tasks(evento_id, date);",
+                "CREATE INDEX uq_tasks_evento_date ON tasks(evento_id, date);"))
+            cur.execute("ANALYZE tasks;")
+            for title, query in QUERIES:
+                explain(cur, title, query)
+
+            print("\n===== Migração 03_query_indexes.sql =====")
+            with open(MIGRATION, encoding='utf-8') as f:
+                cur.execute(f.read())
+            cur.execute("ANALYZE tasks;")
+            for title, query in QUERIES:
+                explain(cur, title, query)
+
+            cur.execute("""
+                SELECT indexrelname, pg_size_pretty(pg_relation_size(indexrelid))
+                FROM pg_stat_user_indexes WHERE schemaname = 'agenda_bench' ORDER BY 1;
+            """)
+            print("\n===== Tamanho dos índices =====")
+            for name, size in cur.fetchall():
+                print(f"    {name}: {size}")
+
+            if not args.keep:
+                cur.execute("DROP SCHEMA agenda_bench CASCADE;")
+    finally:
+        conn.autocommit = False
+        release_db_connection(conn)
+        close_pool()
+
+if __name__ == "__main__":
+    main()
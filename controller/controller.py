@@ -5,6 +5,14 @@ from datetime import datetime, timedelta
 import tkinter as tk
 from tkinter import simpledialog, Toplevel, StringVar, BooleanVar, ttk, filedialog, messagebox
 import json
+import logging
+import queue
+import threading
+from services import export_service, import_service
+from services.backup_service import BackupService
+
+# Intervalo (ms) com que a thread do Tk consulta a fila de uma operação em segundo plano
+BACKGROUND_POLL_MS = 100
 
 class AgendaController:
     def __init__(self, repository, view):
@@ -37,48 +45,60 @@ class AgendaController:
             "nome": nome,
             "dias_semana": dias_semana
         }
-        evento_id = self.repository.add_evento(evento_data)
-        
-        # Gerar tarefas para o novo evento
-        evento = Evento(description, nome, dias_semana)
-        evento.id = evento_id
-        self.gerar_tarefas_evento(evento)
-
-    def gerar_tarefas_evento(self, evento):
-        hoje = datetime.today().date()
-        
-        # Verificar se o evento foi encerrado
-        if hasattr(evento, 'data_encerramento') and evento.data_encerramento:
-            if hoje > evento.data_encerramento:
-                print(f"[DEBUG] Controller: Evento '{evento.description}' foi encerrado em {evento.data_encerramento}, não gerando tarefas")
-                return
-        
-        for i in range(90):
-            data = hoje + timedelta(days=i)
-            
-            # Verificar se a data não ultrapassa a data de encerramento
-            if hasattr(evento, 'data_encerramento') and evento.data_encerramento:
-                if data > evento.data_encerramento:
-                    break
-            
-            dias_pt = {0: 'seg', 1: 'ter', 2: 'qua', 3: 'qui', 4: 'sex', 5: 'sáb', 6: 'dom'}
-            if dias_pt[data.weekday()] in evento.dias_semana:
-                task_data = {
-                    'description': evento.description, 'priority': None, 'nome': evento.nome,
-                    'is_agendamento': False, 'is_evento': True, 'dias_evento': evento.dias_semana,
-                    'date': data.strftime("%Y-%m-%d"), 'evento_id': evento.id
-                }
-                self.repository.add_task(task_data)
+        # As ocorrências são calculadas na leitura (ocorrencias_eventos),
+        # então criar um evento é uma única inserção, sem limite de horizonte.
+        self.repository.add_evento(evento_data)
 
     def get_tasks_for_date(self, date):
         # Se houver filtros ativos, usa a busca com filtros. Senão, busca normal.
-        if self.active_filters and (self.active_filters.get('nome') or self.active_filters.get('status') != 'Todos' or self.active_filters.get('tipo') != 'Todos'):
+        if self._has_active_filters():
             tasks_db = self.repository.get_tasks_with_filters(date, self.active_filters)
         else:
             tasks_db = self.repository.get_tasks_by_date(date)
             
         return [self._db_to_task(t) for t in tasks_db]
     
+    def get_refresh_snapshot(self, date):
+        """Retornar tarefas da data, eventos ativos e próximos agendamentos em uma ida ao banco."""
+        snapshot = self.repository.get_refresh_snapshot(date)
+        if self._has_active_filters():
+            # Filtros da lista continuam na consulta própria
+            tasks = self.get_tasks_for_date(date)
+        else:
+            tasks = [self._db_to_task(t) for t in snapshot['tasks']]
+        return {
+            'tasks': tasks,
+            'eventos': [self._db_to_evento(e) for e in snapshot['eventos']],
+            'agendamentos': [self._db_to_task(t) for t in snapshot['agendamentos']],
+        }
+    
+    def _has_active_filters(self):
+        return bool(self.active_filters and (self.active_filters.get('nome') or self.active_filters.get('status') != 'Todos' or self.active_filters.get('tipo') != 'Todos'))
+    
+    def get_tasks_in_range(self, start_date, end_date, kinds=None, statuses=None):
+        """Retornar as tarefas de um intervalo de datas agrupadas por data, em uma única consulta."""
+        tasks_db = self.repository.get_tasks_in_range(start_date, end_date, kinds, statuses)
+        return {date: [self._db_to_task(t) for t in rows] for date, rows in tasks_db.items()}
+    
+    def get_task_statistics(self, start_date, end_date):
+        """Retornar os contadores do dashboard para um intervalo de datas, agregados no banco."""
+        return self.repository.get_task_statistics(start_date, end_date)
+    
+    def get_task_statistics_rollup(self, start_date, end_date):
+        """Retornar os contadores do dashboard para períodos longos, lidos do rollup diário."""
+        return self.repository.get_task_statistics_rollup(start_date, end_date)
+    
+    def search_tasks(self, term, status=None, tipo=None, priority=None, cursor=None, limit=50):
+        """Busca global (todas as datas) com os valores de status, tipo e prioridade do FilterPanel.
+
+        Retorna (tarefas, próximo cursor ou None) para paginação.
+        """
+        statuses = [status.lower()] if status and status != 'Todos' else None
+        kinds = [tipo.lower()] if tipo and tipo != 'Todos' else None
+        priorities = [priority] if priority and priority != 'Todas' else None
+        tasks_db, next_cursor = self.repository.search_tasks(term, limit, cursor, kinds, statuses, priorities)
+        return [self._db_to_task(t) for t in tasks_db], next_cursor
+    
     def get_tarefas_for_date(self, date):
         """Retornar apenas tarefas (não eventos, não agendamentos) para uma data."""
         tasks_db = self.repository.get_tarefas_by_date(date)
@@ -95,9 +115,8 @@ class AgendaController:
         return [self._db_to_task(t) for t in tasks_db]
 
     def get_tasks(self):
-        """Retornar todas as tarefas do banco de dados"""
-        tasks_db = self.repository.get_all_tasks()
-        return [self._db_to_task(t) for t in tasks_db]
+        """Gerar todas as tarefas do banco de dados, lidas em streaming."""
+        return (self._db_to_task(t) for t in self.repository.get_all_tasks())
 
     def get_all_active_events(self):
         """Retornar todos os objetos Evento que estão ativos."""
@@ -127,13 +146,44 @@ class AgendaController:
     def delete_task(self, date, task):
         if self.view is not None:
             if messagebox.askyesno("Confirmar exclusão", f"Excluir '{task.description}'?"):
-                self.repository.delete_task_by_content(date, task.description, task.nome)
+                self._delete_task(date, task)
         else:
             # Em modo teste, apenas exclui sem confirmação
+            self._delete_task(date, task)
+
+    def _delete_task(self, date, task):
+        """Excluir uma tarefa; ocorrências de eventos viram exceções canceladas."""
+        evento_id = self._get_evento_id(task) if task.is_evento else None
+        if evento_id:
+            # Apagar a linha faria a ocorrência virtual reaparecer
+            self.repository.set_event_occurrence_status(evento_id, date, 'cancelada')
+        elif task.id:
+            self.repository.delete_task(task.id)
+        else:
             self.repository.delete_task_by_content(date, task.description, task.nome)
 
+    def _get_evento_id(self, task):
+        """Obter o ID do evento de origem de uma ocorrência."""
+        evento_id = getattr(task, 'evento_id', None)
+        if evento_id:
+            return evento_id
+        evento = self.repository.find_evento_by_description(task.description, task.nome)
+        return evento[0] if evento else None
+
+    def _resolve_task_id(self, date, task):
+        """Obter o ID de uma tarefa, materializando ocorrências virtuais de eventos."""
+        if task.id:
+            return task.id
+        if task.is_evento:
+            evento_id = self._get_evento_id(task)
+            if evento_id:
+                row = self.repository.set_event_occurrence_status(evento_id, date, task.status or 'pendente')
+                return row[0] if row else None
+        # Tarefas antigas sem ID conhecido pela view
+        return self.repository.find_task_id(date, task.description, task.nome)
+
     def edit_task(self, date, task):
-        task_id = self.repository.find_task_id(date, task.description, task.nome)
+        task_id = self._resolve_task_id(date, task)
         if not task_id:
             if self.view is not None:
                 messagebox.showerror("Erro", "Não foi possível encontrar a tarefa para editar.")
@@ -199,28 +249,180 @@ class AgendaController:
             self.view.update_view()
 
     def handle_export_data(self):
-        data = self.repository.get_all_data()
+        """Exportar os dados em segundo plano, com barra de progresso.
+
+        O formato vem da extensão escolhida (.json, .ndjson, com ou sem .gz, ou .ics).
+        Retorna False se o usuário cancelar antes de a exportação começar.
+        """
         filepath = filedialog.asksaveasfilename(
             defaultextension=".json",
-            filetypes=[("JSON files", "*.json"), ("All files", "*.*")],
+            filetypes=[
+                ("JSON files", "*.json"),
+                ("NDJSON files", "*.ndjson"),
+                ("JSON compactado", "*.json.gz"),
+                ("NDJSON compactado", "*.ndjson.gz"),
+                ("iCalendar", "*.ics"),
+                ("All files", "*.*")
+            ],
             title="Salvar dados como..."
         )
         if not filepath:
-            return
+            return False
+        
+        date_range = self._ask_export_range()
+        if date_range is None:
+            return False
+        start_date, end_date = date_range
+        
+        window, progress_bar, progress_label = self._open_progress_window("Exportando dados")
+        
+        def on_progress(done, total):
+            progress_bar['maximum'] = max(total, 1)
+            progress_bar['value'] = done
+            progress_label.config(text=f"{done} de {total} tarefas")
+        
+        def on_finished(count, error):
+            window.destroy()
+            if error:
+                messagebox.showerror("Erro", f"Erro ao exportar dados: {error}")
+            else:
+                messagebox.showinfo("Exportação Concluída", f"{count} tarefas salvas com sucesso em:\n{filepath}")
+        
+        def work(progress):
+            return export_service.export_data(
+                self.repository, filepath,
+                start_date=start_date, end_date=end_date, progress=progress
+            )
+        
+        self._run_in_background("agenda-export", work, on_progress, on_finished, "Erro ao exportar dados")
+        return True
+
+    def handle_import_data(self):
+        """Importar uma exportação (JSON/NDJSON, com ou sem .gz), um CSV de tarefas ou um .ics em segundo plano.
+
+        Retorna False se o usuário cancelar antes de a importação começar.
+        """
+        filepath = filedialog.askopenfilename(
+            filetypes=[
+                ("Exportações, CSV e iCalendar", "*.json *.ndjson *.jsonl *.gz *.csv *.ics"),
+                ("All files", "*.*")
+            ],
+            title="Importar dados de..."
+        )
+        if not filepath:
+            return False
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=4)
+        window, progress_bar, progress_label = self._open_progress_window("Importando dados")
+        progress_bar.config(mode='indeterminate')
+        progress_bar.start()
         
-        messagebox.showinfo("Exportação Concluída", f"Dados salvos com sucesso em:\n{filepath}")
+        def on_progress(lidos, por_segundo):
+            progress_label.config(text=f"{lidos} registros lidos ({por_segundo:.0f}/s)")
+        
+        def on_finished(report, error):
+            window.destroy()
+            if error:
+                messagebox.showerror("Erro", f"Erro ao importar dados: {error}")
+                return
+            message = (f"{report['tarefas_inseridas']} tarefas e {report['eventos_inseridos']} eventos importados "
+                       f"({report['linhas_por_segundo']:.0f} registros/s).")
+            if report['tarefas_ignoradas']:
+                message += f"\n{report['tarefas_ignoradas']} tarefas já existentes foram ignoradas."
+            if report['invalidos']:
+                message += f"\n{report['invalidos']} registros inválidos:\n" + "\n".join(report['erros'][:10])
+            messagebox.showinfo("Importação Concluída", message)
+            self.view.update_view()
+        
+        def work(progress):
+            return import_service.import_file(self.repository, filepath, progress=progress)
+        
+        self._run_in_background("agenda-import", work, on_progress, on_finished, "Erro ao importar dados")
+        return True
+
+    def _run_in_background(self, name, work, on_progress, on_finished, error_message):
+        """Executar work(progress) em uma thread sem tocar no Tk fora da thread principal.
+
+        A thread de trabalho só coloca mensagens em uma fila; um laço root.after na thread
+        do Tk a consome, chamando on_progress(*args) com o progresso mais recente e, ao
+        final, on_finished(resultado, erro).
+        """
+        messages = queue.Queue()
+        
+        def run():
+            try:
+                messages.put(('done', work(lambda *args: messages.put(('progress', args)))))
+            except Exception as e:
+                logging.error(f"{error_message}: {e}")
+                messages.put(('error', e))
+        
+        def poll():
+            progress = None
+            try:
+                while True:
+                    kind, payload = messages.get_nowait()
+                    if kind == 'done':
+                        on_finished(payload, None)
+                        return
+                    if kind == 'error':
+                        on_finished(None, payload)
+                        return
+                    progress = payload
+            except queue.Empty:
+                pass
+            # Só o progresso mais recente interessa para a barra
+            if progress is not None:
+                on_progress(*progress)
+            self.view.root.after(BACKGROUND_POLL_MS, poll)
+        
+        threading.Thread(target=run, name=name, daemon=True).start()
+        self.view.root.after(BACKGROUND_POLL_MS, poll)
+
+    def _ask_export_range(self):
+        """Perguntar o período da exportação. Retorna (início, fim), com None para sem limite,
+        ou None se o usuário cancelar."""
+        dates = []
+        for label in ("Data inicial", "Data final"):
+            while True:
+                value = simpledialog.askstring(
+                    "Período da exportação",
+                    f"{label} (dd/mm/aaaa) - deixe vazio para não limitar:"
+                )
+                if value is None:
+                    return None
+                value = value.strip()
+                if not value:
+                    dates.append(None)
+                    break
+                try:
+                    dates.append(datetime.strptime(value, "%d/%m/%Y").date())
+                    break
+                except ValueError:
+                    messagebox.showerror("Erro", "Data inválida. Use o formato dd/mm/aaaa.")
+        return tuple(dates)
+
+    def _open_progress_window(self, title):
+        """Criar uma janela com barra de progresso para operações em segundo plano."""
+        window = Toplevel(self.view.root)
+        window.title(title)
+        window.resizable(False, False)
+        window.transient(self.view.root)
+        progress_bar = ttk.Progressbar(window, length=300, mode='determinate')
+        progress_bar.pack(padx=20, pady=(20, 5))
+        progress_label = ttk.Label(window, text="Preparando...")
+        progress_label.pack(padx=20, pady=(0, 20))
+        return window, progress_bar, progress_label
 
     def handle_create_backup(self):
         if not messagebox.askyesno("Confirmar Backup", "Deseja criar um backup interno de todos os dados?"):
             return
             
-        data = self.repository.get_all_data()
-        json_data = json.dumps(data).encode('utf-8')  #  Converte para bytes
-        self.repository.create_backup(json_data)
-        messagebox.showinfo("Backup Concluído", "Backup interno criado com sucesso.")
+        result = BackupService(self.repository).create_backup()
+        if result['skipped']:
+            messagebox.showinfo("Backup Concluído", "Nenhuma alteração desde o último backup; nada a gravar.")
+        elif result['tipo'] == 'full':
+            messagebox.showinfo("Backup Concluído", f"Backup completo criado com sucesso ({result['linhas']} registros).")
+        else:
+            messagebox.showinfo("Backup Concluído", f"Backup incremental criado com sucesso ({result['linhas']} alterações).")
 
     def _db_to_task(self, db_row):
         # Converte tupla do DB para objeto Task
@@ -244,6 +446,7 @@ class AgendaController:
         )
         task.id = db_row[0]
         task.date = db_row[7]
+        task.evento_id = db_row[9] if len(db_row) > 9 else None
         return task
         
     def _db_to_evento(self, db_row):
@@ -255,7 +458,22 @@ class AgendaController:
         evento.data_encerramento = db_row[5]
         return evento
 
+    def set_task_status(self, task, done):
+        """Alterar o status de uma tarefa pelo ID, em uma única ida ao banco."""
+        status = 'concluída' if done else 'pendente'
+        if task.id:
+            updated_task = self.repository.update_task_status(task.id, status)
+        elif task.is_evento and task.evento_id:
+            # Ocorrência virtual: a exceção já é gravada com o novo status
+            updated_task = self.repository.set_event_occurrence_status(task.evento_id, task.date, status)
+        else:
+            # Sem ID (dados antigos da view): recorrer à busca por conteúdo
+            self.update_task_status((task.date, task.description, task.nome), done)
+            return
+        self._after_status_change(updated_task, done)
+
     def update_task_status(self, task_key, done):
+        """Alterar o status de uma tarefa identificada por (data, descrição, nome)."""
         date, description, nome = task_key
         status = 'concluída' if done else 'pendente'
         
@@ -263,40 +481,30 @@ class AgendaController:
         print(f"[DEBUG] Controller: date={date}, description={description}, nome={nome}")
         print(f"[DEBUG] Controller: status={status}")
         
-        # Como a view não conhece o ID, precisamos buscá-lo.
+        # Sem o ID, precisamos buscá-lo pelo conteúdo.
         task_id = self.repository.find_task_id(date, description, nome)
         print(f"[DEBUG] Controller: task_id encontrado={task_id}")
         
         if task_id:
-            print(f"[DEBUG] Controller: Atualizando status no repository...")
-            self.repository.update_task_status(task_id, status)
-            print(f"[DEBUG] Controller: Status atualizado no repository")
-            
-            # Verificar se a atualização foi bem-sucedida
-            print(f"[DEBUG] Controller: Verificando se a atualização foi bem-sucedida...")
-            updated_task = self.repository.get_task_by_id(task_id)
-            if updated_task:
-                print(f"[DEBUG] Controller: Tarefa atualizada - Status: {updated_task[8]}")
-                
-                # Se a tarefa foi marcada como concluída e é um evento ou agendamento
-                if done and (updated_task[5] or updated_task[4]):  # is_evento or is_agendamento
-                    print(f"[DEBUG] Controller: Tarefa concluída é evento/agendamento, removendo futuras ocorrências...")
-                    self._handle_completed_recurring_item(updated_task)
-            else:
-                print(f"[DEBUG] Controller: Não foi possível verificar a tarefa atualizada")
-            
-            if self.view is not None:
-                print(f"[DEBUG] Controller: Atualizando view...")
-                self.view.update_view()
-                print(f"[DEBUG] Controller: View atualizada")
+            updated_task = self.repository.update_task_status(task_id, status)
+        else:
+            # Ocorrências virtuais de eventos só ganham linha quando mudam de status
+            evento = self.repository.find_evento_by_description(description, nome)
+            updated_task = self.repository.set_event_occurrence_status(evento[0], date, status) if evento else None
+        
+        if updated_task:
+            self._after_status_change(updated_task, done)
         else:
             print(f"[DEBUG] Controller: Tarefa não encontrada no banco!")
-            print(f"[DEBUG] Controller: Tentando buscar tarefas similares...")
-            # Buscar tarefas similares para debug
-            similar_tasks = self.repository.get_tasks_by_date(date)
-            print(f"[DEBUG] Controller: Tarefas encontradas para a data {date}: {len(similar_tasks)}")
-            for i, t in enumerate(similar_tasks):
-                print(f"[DEBUG] Controller: Tarefa {i}: id={t[0]}, desc={t[1]}, nome={t[3]}, status={t[8]}")
+
+    def _after_status_change(self, updated_task, done):
+        """Tratar itens recorrentes concluídos e atualizar a view após mudança de status."""
+        # Se a tarefa foi marcada como concluída e é um evento ou agendamento
+        if updated_task and done and (updated_task[5] or updated_task[4]):  # is_evento or is_agendamento
+            self._handle_completed_recurring_item(updated_task)
+
+        if self.view is not None:
+            self.view.update_view()
 
     def _handle_completed_recurring_item(self, task):
         """Lidar com eventos e agendamentos concluídos, removendo futuras ocorrências"""
@@ -360,7 +568,7 @@ class AgendaController:
             original_task = task
         
         # Encontrar o ID da tarefa usando os dados originais
-        task_id = self.repository.find_task_id(original_task.date, original_task.description, original_task.nome)
+        task_id = self._resolve_task_id(original_task.date, original_task)
         
         if not task_id:
             if self.view is not None:
@@ -396,21 +604,17 @@ class AgendaController:
             return
         
         try:
-            # 1. Atualizar o evento na tabela de eventos
+            # 1. Dados novos do evento
             evento_data = {
                 'description': evento.description,
                 'nome': evento.nome,
                 'dias_semana': evento.dias_semana
             }
-            self.repository.update_event(evento_id, evento_data)
-            
-            # 2. Deletar todas as tarefas futuras associadas a este evento
-            self.repository.delete_future_event_tasks(evento_id, datetime.today().date())
-            
-            # 3. Recriar as tarefas futuras com os novos dados do evento
-            self.gerar_tarefas_evento(evento)
+            # 2. Na mesma transação, ajustar só a diferença nas ocorrências gravadas a partir de hoje:
+            #    dias removidos são excluídos, dias mantidos conservam o status, dias novos são gerados
+            self.repository.update_event(evento_id, evento_data, from_date=datetime.today().date())
             
-            # 4. Atualizar a view
+            # 3. Atualizar a view
             if self.view is not None:
                 self.view.update_view()
                 
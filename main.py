@@ -1,9 +1,14 @@
 # main.py
 import tkinter as tk
+from model.db.database import warm_up_pool, close_pool
 from model.db.repository import AgendaRepository
 from controller.controller import AgendaController
 from view.gui import AgendaView
 from services.notification_service import NotificationScheduler
+from services.notification_delivery import NotificationQueue, build_backends
+from services.horizon_service import EventHorizonMaintainer
+from services.partition_service import TaskPartitionMaintainer
+from services.retention_service import RetentionJob
 import logging
 
 def main():
@@ -24,14 +29,6 @@ def main():
     repository = AgendaRepository()
     controller = AgendaController(repository, None)
     
-    # Limpar tarefas antigas de eventos encerrados
-    try:
-        deleted_count = controller.cleanup_old_tasks()
-        if deleted_count > 0:
-            print(f"Limpeza automática: {deleted_count} tarefas antigas removidas")
-    except Exception as e:
-        print(f"Erro na limpeza automática: {e}")
-    
     # Criar view
     view = AgendaView(controller)
     controller.view = view
@@ -42,20 +39,45 @@ def main():
 if __name__ == "__main__":
     root = tk.Tk()
     
+    # Abre as conexões do banco em segundo plano enquanto a janela é montada
+    warm_up_pool()
+    
     repository = AgendaRepository()
     
-    # Inicia o agendador de notificações
-    # Para testes, um intervalo menor pode ser usado, ex: 10 segundos
-    scheduler = NotificationScheduler(repository, check_interval=10)
-    scheduler.start()
+    # Cria as partições mensais de tarefas com antecedência e arquiva os meses antigos
+    # (na inicialização e uma vez por dia)
+    partitions = TaskPartitionMaintainer(repository)
+    partitions.start()
+
+    # Mantém gravadas as ocorrências dos próximos dias dos eventos (na inicialização e uma vez por dia)
+    horizon = EventHorizonMaintainer(repository)
+    horizon.start()
 
     view = AgendaView(root)
     controller = AgendaController(repository, view)
 
+    # Entrega dos lembretes em uma fila própria (resumo dos simultâneos, limite de taxa),
+    # pelos backends de AGENDA_NOTIFICATION_BACKENDS; 'painel' usa o painel da janela
+    delivery = NotificationQueue(build_backends(root=root, panel=view.notification_panel))
+
+    # Inicia o agendador de notificações: dorme até o próximo lembrete e recarrega
+    # quando um agendamento muda (LISTEN/NOTIFY)
+    scheduler = NotificationScheduler(repository, delivery=delivery)
+    scheduler.start()
+
+    # Limpa as tarefas de eventos encerrados em lotes, depois que a janela é exibida
+    retention = RetentionJob(repository)
+    root.after_idle(retention.start)
+
     def on_closing():
         """Função para ser chamada quando a janela for fechada."""
         print("Fechando a aplicação...")
         scheduler.stop()
+        delivery.stop()
+        horizon.stop()
+        partitions.stop()
+        retention.stop(timeout=5)
+        close_pool()
         root.destroy()
 
     root.protocol("WM_DELETE_WINDOW", on_closing)
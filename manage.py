@@ -0,0 +1,181 @@
+# manage.py
+"""Comandos de manutenção da Agenda Virtual.
+
+Uso:
+    python manage.py migrate [--status]
+    python manage.py rebuild-stats
+    python manage.py backup [--full]
+    python manage.py list-backups
+    python manage.py restore <id>
+    python manage.py snapshot <arquivo.tar>
+    python manage.py restore-snapshot <arquivo.tar>
+    python manage.py extend-horizon [--dias N]
+    python manage.py archive [--dias N] [--tablespace NOME]
+    python manage.py cleanup [--lote N]
+    python manage.py import <arquivo> [--formato json|ndjson|csv|ics] [--permitir-duplicadas]
+"""
+import argparse
+import logging
+import sys
+from model.db.repository import AgendaRepository
+from model.db import migrations
+from services.backup_service import BackupService
+from services import snapshot_service, import_service
+from services.horizon_service import EventHorizonMaintainer
+from services.partition_service import TaskPartitionMaintainer
+from services.retention_service import RetentionJob
+
+def migrate(args):
+    """Aplica as migrações de schema pendentes (model/db/NN_nome.sql)."""
+    if args.status:
+        pending = migrations.pending_migrations()
+        for version, name in pending:
+            print(f"pendente: {version:02d}_{name}")
+        if not pending:
+            print("Nenhuma migração pendente")
+        return
+    applied = migrations.apply_migrations()
+    for version, name in applied:
+        print(f"aplicada: {version:02d}_{name}")
+    if not applied:
+        print("Banco já está atualizado")
+
+def rebuild_stats(args):
+    """Reconstrói a tabela task_daily_stats a partir de tasks."""
+    repository = AgendaRepository()
+    rows = repository.rebuild_task_daily_stats()
+    print(f"Estatísticas diárias reconstruídas: {rows} linhas")
+
+def backup(args):
+    """Cria um backup incremental (ou completo, com --full)."""
+    result = BackupService(AgendaRepository()).create_backup(full=args.full)
+    if result['skipped']:
+        print("Nenhuma alteração desde o último backup")
+    else:
+        print(f"Backup {result['id']} ({result['tipo']}) criado: {result['linhas']} registros")
+
+def list_backups(args):
+    """Lista os backups gravados."""
+    for backup_id, data_backup, tipo, base_id, compressao, linhas, tamanho in AgendaRepository().list_backups():
+        base = f" base={base_id}" if base_id else ""
+        print(f"{backup_id:>5}  {data_backup:%d/%m/%Y %H:%M}  {tipo:<5}{base}  {linhas or '-'} registros  {tamanho or 0} bytes  {compressao or 'json'}")
+
+def restore(args):
+    """Restaura tarefas e eventos a partir de um backup."""
+    result = BackupService(AgendaRepository()).restore(args.backup_id)
+    print(f"Backup {args.backup_id} restaurado; nova base: {result['id'] or 'inalterada'}")
+
+def snapshot(args):
+    """Grava um snapshot binário (COPY) de users, eventos e tasks."""
+    manifest = snapshot_service.create_snapshot(AgendaRepository(), args.arquivo)
+    sizes = ", ".join(f"{table}: {info['bytes']} bytes" for table, info in manifest['tables'].items())
+    print(f"Snapshot gravado em {args.arquivo} em {manifest['seconds']:.2f}s ({sizes})")
+
+def restore_snapshot(args):
+    """Substitui eventos e tasks pelo conteúdo de um snapshot binário."""
+    counts, seconds = snapshot_service.restore_snapshot(AgendaRepository(), args.arquivo)
+    rows = ", ".join(f"{table}: {total}" for table, total in counts.items())
+    print(f"Snapshot restaurado em {seconds:.2f}s ({rows})")
+
+def import_data(args):
+    """Importa uma exportação (JSON/NDJSON), um CSV de tarefas ou um .ics via COPY."""
+    def progress(lidos, por_segundo):
+        print(f"  {lidos} registros lidos ({por_segundo:.0f}/s)")
+
+    report = import_service.import_file(
+        AgendaRepository(), args.arquivo, fmt=args.formato,
+        skip_duplicates=not args.permitir_duplicadas, progress=progress
+    )
+    print(f"Importação concluída em {report['segundos']:.2f}s ({report['linhas_por_segundo']:.0f} registros/s)")
+    print(f"  tarefas inseridas: {report['tarefas_inseridas']}, ignoradas: {report['tarefas_ignoradas']}")
+    print(f"  eventos inseridos: {report['eventos_inseridos']}, reaproveitados: {report['eventos_reaproveitados']}")
+    if report['invalidos']:
+        print(f"  registros inválidos: {report['invalidos']}")
+        for erro in report['erros']:
+            print(f"    {erro}")
+
+def extend_horizon(args):
+    """Grava as ocorrências de eventos até o horizonte configurado."""
+    maintainer = EventHorizonMaintainer(AgendaRepository(), **({'horizon_days': args.dias} if args.dias else {}))
+    eventos, ocorrencias = maintainer.run_once()
+    print(f"Horizonte estendido: {ocorrencias} ocorrências para {eventos} eventos")
+
+def archive(args):
+    """Arquiva as partições mensais de tarefas encerradas há mais de N dias, exceto as com tarefas pendentes."""
+    options = {}
+    if args.dias is not None:
+        options['archive_after_days'] = args.dias
+    if args.tablespace:
+        options['archive_tablespace'] = args.tablespace
+    archived = TaskPartitionMaintainer(AgendaRepository(), **options).archive_once()
+    if not archived:
+        print("Nenhuma partição a arquivar")
+
+def cleanup(args):
+    """Remove em lotes as tarefas gravadas de eventos encerrados."""
+    def progress(removidas, processados, total):
+        print(f"  {removidas} tarefas removidas ({processados}/{total} eventos)")
+
+    options = {'batch_size': args.lote} if args.lote else {}
+    removed = RetentionJob(AgendaRepository(), progress=progress, **options).run()
+    print(f"Limpeza concluída: {removed} tarefas removidas")
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s:%(message)s')
+
+    parser = argparse.ArgumentParser(description="Comandos de manutenção da Agenda Virtual")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    migrate_parser = subparsers.add_parser('migrate', help="Aplica as migrações de schema pendentes")
+    migrate_parser.add_argument('--status', action='store_true', help="Apenas lista as pendentes")
+    migrate_parser.set_defaults(func=migrate)
+
+    rebuild_parser = subparsers.add_parser('rebuild-stats', help="Reconstrói o rollup diário do dashboard")
+    rebuild_parser.set_defaults(func=rebuild_stats)
+
+    backup_parser = subparsers.add_parser('backup', help="Cria um backup incremental")
+    backup_parser.add_argument('--full', action='store_true', help="Força uma nova base completa")
+    backup_parser.set_defaults(func=backup)
+
+    list_parser = subparsers.add_parser('list-backups', help="Lista os backups gravados")
+    list_parser.set_defaults(func=list_backups)
+
+    restore_parser = subparsers.add_parser('restore', help="Restaura a base e os deltas até o backup informado")
+    restore_parser.add_argument('backup_id', type=int)
+    restore_parser.set_defaults(func=restore)
+
+    snapshot_parser = subparsers.add_parser('snapshot', help="Grava um snapshot binário rápido (COPY)")
+    snapshot_parser.add_argument('arquivo')
+    snapshot_parser.set_defaults(func=snapshot)
+
+    restore_snapshot_parser = subparsers.add_parser('restore-snapshot', help="Restaura um snapshot binário")
+    restore_snapshot_parser.add_argument('arquivo')
+    restore_snapshot_parser.set_defaults(func=restore_snapshot)
+
+    horizon_parser = subparsers.add_parser('extend-horizon', help="Grava as ocorrências futuras dos eventos")
+    horizon_parser.add_argument('--dias', type=int, help="Dias à frente de hoje (padrão: AGENDA_EVENT_HORIZON_DAYS)")
+    horizon_parser.set_defaults(func=extend_horizon)
+
+    archive_help = "Compacta as partições de meses antigos de tarefas (meses com tarefas pendentes são mantidos)"
+    archive_parser = subparsers.add_parser('archive', help=archive_help, description=archive_help)
+    archive_parser.add_argument('--dias', type=int, help="Idade mínima em dias (padrão: AGENDA_ARCHIVE_AFTER_DAYS)")
+    archive_parser.add_argument('--tablespace', help="Tablespace de destino (padrão: AGENDA_ARCHIVE_TABLESPACE)")
+    archive_parser.set_defaults(func=archive)
+
+    cleanup_parser = subparsers.add_parser('cleanup', help="Remove as tarefas de eventos encerrados, em lotes")
+    cleanup_parser.add_argument('--lote', type=int, help="Linhas por lote (padrão: AGENDA_RETENTION_BATCH_SIZE)")
+    cleanup_parser.set_defaults(func=cleanup)
+
+    import_parser = subparsers.add_parser('import', help="Importa uma exportação ou CSV em massa")
+    import_parser.add_argument('arquivo')
+    import_parser.add_argument('--formato', choices=['json', 'ndjson', 'csv', 'ics'], help="Padrão: pela extensão")
+    import_parser.add_argument('--permitir-duplicadas', action='store_true',
+                               help="Importa também tarefas iguais (data, descrição, nome) a existentes")
+    import_parser.set_defaults(func=import_data)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -16,10 +16,14 @@ CREATE TABLE IF NOT EXISTS eventos (
     nome VARCHAR(100),
     dias_semana VARCHAR(3)[] NOT NULL, -- Ex: ['seg', 'qua']
     ativo BOOLEAN DEFAULT TRUE,
+    data_inicio DATE DEFAULT CURRENT_DATE,
     data_encerramento DATE,
     user_id INTEGER REFERENCES users(id) ON DELETE CASCADE
 );
 
+-- Bancos criados antes da expansão virtual de eventos
+ALTER TABLE eventos ADD COLUMN IF NOT EXISTS data_inicio DATE DEFAULT CURRENT_DATE;
+
 -- Tarefas
 CREATE TABLE IF NOT EXISTS tasks (
     id SERIAL PRIMARY KEY,
@@ -52,9 +56,197 @@ CREATE TABLE IF NOT EXISTS backups (
     arquivo BYTEA
 );
 
--- Índices para performance
-CREATE INDEX IF NOT EXISTS idx_tasks_date ON tasks(date);
-CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status);
-CREATE INDEX IF NOT EXISTS idx_tasks_is_agendamento ON tasks(is_agendamento);
-CREATE INDEX IF NOT EXISTS idx_tasks_is_evento ON tasks(is_evento);
-CREATE INDEX IF NOT EXISTS idx_eventos_dias_semana ON eventos USING GIN(dias_semana); 
\ No newline at end of file
+-- Índices para performance (os de tasks por formato de consulta estão em 03_query_indexes.sql)
+CREATE INDEX IF NOT EXISTS idx_eventos_dias_semana ON eventos USING GIN(dias_semana);
+
+-- Busca textual por trecho (ILIKE '%termo%') em descrição e nome
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS idx_tasks_description_trgm ON tasks USING GIN (description gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_tasks_nome_trgm ON tasks USING GIN (nome gin_trgm_ops);
+
+-- Busca global em português, sem distinção de acentos ('media' encontra 'média')
+CREATE EXTENSION IF NOT EXISTS unaccent;
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'agenda_pt') THEN
+        CREATE TEXT SEARCH CONFIGURATION agenda_pt (COPY = portuguese);
+        ALTER TEXT SEARCH CONFIGURATION agenda_pt
+            ALTER MAPPING FOR hword, hword_part, word WITH unaccent, portuguese_stem;
+    END IF;
+END
+$$;
+
+ALTER TABLE tasks ADD COLUMN IF NOT EXISTS search_vector TSVECTOR
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('agenda_pt', COALESCE(nome, '')), 'A') ||
+        setweight(to_tsvector('agenda_pt', COALESCE(description, '')), 'B')
+    ) STORED;
+CREATE INDEX IF NOT EXISTS idx_tasks_search_vector ON tasks USING GIN (search_vector);
+
+-- Uma ocorrência por evento e data: permite regenerar com ON CONFLICT DO NOTHING
+CREATE UNIQUE INDEX IF NOT EXISTS uq_tasks_evento_date ON tasks(evento_id, date);
+
+-- Dia da semana em português no mesmo formato de eventos.dias_semana
+CREATE OR REPLACE FUNCTION dia_semana_pt(d DATE) RETURNS VARCHAR(3) AS $$
+    SELECT (ARRAY['seg', 'ter', 'qua', 'qui', 'sex', 'sáb', 'dom'])[EXTRACT(ISODOW FROM d)::INT];
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Ocorrências virtuais dos eventos ativos entre duas datas.
+-- São calculadas na leitura a partir de dias_semana, data_inicio e data_encerramento;
+-- apenas as exceções (concluída, cancelada, editada) ficam gravadas em tasks e,
+-- quando existem, substituem a ocorrência virtual da mesma data.
+CREATE OR REPLACE FUNCTION ocorrencias_eventos(inicio DATE, fim DATE)
+RETURNS TABLE (
+    id INTEGER,
+    description TEXT,
+    priority VARCHAR(20),
+    nome VARCHAR(100),
+    is_agendamento BOOLEAN,
+    is_evento BOOLEAN,
+    dias_evento VARCHAR(3)[],
+    date DATE,
+    status VARCHAR(20),
+    evento_id INTEGER,
+    user_id INTEGER
+) AS $$
+    SELECT NULL::INTEGER, e.description, NULL::VARCHAR(20), e.nome, FALSE, TRUE, e.dias_semana,
+           d::date, 'pendente'::VARCHAR(20), e.id, e.user_id
+    FROM eventos e
+    CROSS JOIN generate_series(
+        GREATEST(inicio, e.data_inicio)::timestamp,
+        LEAST(fim, COALESCE(e.data_encerramento, fim))::timestamp,
+        INTERVAL '1 day'
+    ) AS d
+    WHERE e.ativo = TRUE
+      AND dia_semana_pt(d::date) = ANY(e.dias_semana)
+      AND NOT EXISTS (
+          SELECT 1 FROM tasks t WHERE t.evento_id = e.id AND t.date = d::date
+      );
+$$ LANGUAGE sql STABLE;
+
+-- Estatísticas diárias por (usuário, data, tipo, prioridade, status), mantidas por gatilhos em tasks.
+-- Atendem o dashboard em períodos longos sem varrer a tabela tasks.
+CREATE TABLE IF NOT EXISTS task_daily_stats (
+    user_id INTEGER NOT NULL DEFAULT 0,
+    date DATE NOT NULL,
+    kind VARCHAR(20) NOT NULL, -- tarefa, agendamento, evento
+    priority VARCHAR(20) NOT NULL DEFAULT '', -- '' para itens sem prioridade
+    status VARCHAR(20) NOT NULL,
+    total INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, date, kind, priority, status)
+);
+
+CREATE INDEX IF NOT EXISTS idx_task_daily_stats_date ON task_daily_stats(date);
+
+CREATE OR REPLACE FUNCTION task_kind(is_agendamento BOOLEAN, is_evento BOOLEAN) RETURNS VARCHAR(20) AS $$
+    SELECT CASE WHEN is_evento THEN 'evento' WHEN is_agendamento THEN 'agendamento' ELSE 'tarefa' END;
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION task_daily_stats_trigger() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE task_daily_stats SET total = total - 1
+        WHERE user_id = COALESCE(OLD.user_id, 0)
+          AND date = OLD.date
+          AND kind = task_kind(OLD.is_agendamento, OLD.is_evento)
+          AND priority = COALESCE(OLD.priority, '')
+          AND status = COALESCE(OLD.status, 'pendente');
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO task_daily_stats (user_id, date, kind, priority, status, total)
+        VALUES (COALESCE(NEW.user_id, 0), NEW.date, task_kind(NEW.is_agendamento, NEW.is_evento),
+                COALESCE(NEW.priority, ''), COALESCE(NEW.status, 'pendente'), 1)
+        ON CONFLICT (user_id, date, kind, priority, status)
+        DO UPDATE SET total = task_daily_stats.total + 1;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_task_daily_stats_insert_delete ON tasks;
+CREATE TRIGGER trg_task_daily_stats_insert_delete
+    AFTER INSERT OR DELETE ON tasks
+    FOR EACH ROW EXECUTE FUNCTION task_daily_stats_trigger();
+
+DROP TRIGGER IF EXISTS trg_task_daily_stats_update ON tasks;
+CREATE TRIGGER trg_task_daily_stats_update
+    AFTER UPDATE OF user_id, date, is_agendamento, is_evento, priority, status ON tasks
+    FOR EACH ROW
+    WHEN ((OLD.user_id, OLD.date, OLD.is_agendamento, OLD.is_evento, OLD.priority, OLD.status)
+          IS DISTINCT FROM (NEW.user_id, NEW.date, NEW.is_agendamento, NEW.is_evento, NEW.priority, NEW.status))
+    EXECUTE FUNCTION task_daily_stats_trigger();
+
+-- Reconstrói o rollup a partir de tasks (carga inicial ou correção)
+CREATE OR REPLACE FUNCTION rebuild_task_daily_stats() RETURNS BIGINT AS $$
+    DELETE FROM task_daily_stats;
+    INSERT INTO task_daily_stats (user_id, date, kind, priority, status, total)
+    SELECT COALESCE(user_id, 0), date, task_kind(is_agendamento, is_evento),
+           COALESCE(priority, ''), COALESCE(status, 'pendente'), COUNT(*)
+    FROM tasks
+    GROUP BY 1, 2, 3, 4, 5;
+    SELECT COUNT(*) FROM task_daily_stats;
+$$ LANGUAGE sql;
+
+-- Carga inicial: bancos anteriores ao rollup já têm tarefas que os gatilhos não contaram
+SELECT rebuild_task_daily_stats();
+
+-- Backups incrementais: uma base completa ('full') seguida de deltas com as linhas
+-- alteradas desde o backup anterior. Backups antigos (JSON sem compressão) viram bases.
+ALTER TABLE backups ADD COLUMN IF NOT EXISTS tipo VARCHAR(10) NOT NULL DEFAULT 'full'; -- full, delta
+ALTER TABLE backups ADD COLUMN IF NOT EXISTS base_id INTEGER REFERENCES backups(id) ON DELETE CASCADE;
+ALTER TABLE backups ADD COLUMN IF NOT EXISTS snapshot_at TIMESTAMPTZ;
+ALTER TABLE backups ADD COLUMN IF NOT EXISTS content_hash CHAR(64);
+ALTER TABLE backups ADD COLUMN IF NOT EXISTS compressao VARCHAR(10); -- NULL (JSON puro) ou gzip
+ALTER TABLE backups ADD COLUMN IF NOT EXISTS total_linhas INTEGER;
+CREATE INDEX IF NOT EXISTS idx_backups_base_id ON backups(base_id);
+
+-- Última alteração de cada linha, usada para montar os deltas
+ALTER TABLE tasks ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW();
+ALTER TABLE eventos ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW();
+CREATE INDEX IF NOT EXISTS idx_tasks_updated_at ON tasks(updated_at);
+
+CREATE OR REPLACE FUNCTION touch_updated_at() RETURNS trigger AS $$
+BEGIN
+    NEW.updated_at := NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_tasks_updated_at ON tasks;
+CREATE TRIGGER trg_tasks_updated_at
+    BEFORE UPDATE ON tasks
+    FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+
+-- Só colunas do próprio evento: o avanço de materializado_ate não gera delta de backup
+DROP TRIGGER IF EXISTS trg_eventos_updated_at ON eventos;
+CREATE TRIGGER trg_eventos_updated_at
+    BEFORE UPDATE OF description, nome, dias_semana, ativo, data_inicio, data_encerramento, user_id ON eventos
+    FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+
+-- Linhas excluídas desde a última base, para que os deltas também repliquem exclusões
+CREATE TABLE IF NOT EXISTS backup_tombstones (
+    tabela VARCHAR(20) NOT NULL, -- tasks, eventos
+    row_id INTEGER NOT NULL,
+    deleted_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+CREATE INDEX IF NOT EXISTS idx_backup_tombstones_deleted_at ON backup_tombstones(deleted_at);
+
+CREATE OR REPLACE FUNCTION backup_tombstone_trigger() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO backup_tombstones (tabela, row_id) VALUES (TG_TABLE_NAME, OLD.id);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_tasks_backup_tombstone ON tasks;
+CREATE TRIGGER trg_tasks_backup_tombstone
+    AFTER DELETE ON tasks
+    FOR EACH ROW EXECUTE FUNCTION backup_tombstone_trigger();
+
+DROP TRIGGER IF EXISTS trg_eventos_backup_tombstone ON eventos;
+CREATE TRIGGER trg_eventos_backup_tombstone
+    AFTER DELETE ON eventos
+    FOR EACH ROW EXECUTE FUNCTION backup_tombstone_trigger();
+
+-- Última data com ocorrências gravadas em tasks, mantida pelo job de horizonte
+ALTER TABLE eventos ADD COLUMN IF NOT EXISTS materializado_ate DATE;
@@ -0,0 +1,60 @@
+-- model/db/02_backfill_evento_id.sql
+-- Versões antigas de add_task não gravavam evento_id: as ocorrências de eventos já
+-- salvas ficaram com evento_id NULL. ocorrencias_eventos não as reconhecia (a mesma
+-- data aparecia duas vezes), o índice uq_tasks_evento_date não impedia o job de
+-- horizonte de gravar outra ao lado, e a edição, o encerramento e a limpeza de eventos
+-- não as alcançavam. Aqui cada uma é ligada ao seu evento; roda antes dos índices (03)
+-- e do particionamento (04).
+
+-- Evento de cada ocorrência órfã: mesma descrição e nome, com o dia da semana da data
+-- em dias_semana. Havendo mais de um, prefere o que estava vigente na data.
+CREATE TEMP TABLE evento_backfill ON COMMIT DROP AS
+SELECT DISTINCT ON (t.id) t.id AS task_id, t.date, e.id AS evento_id
+FROM tasks t
+JOIN eventos e
+  ON e.description = t.description
+ AND e.nome IS NOT DISTINCT FROM t.nome
+ AND dia_semana_pt(t.date) = ANY(e.dias_semana)
+WHERE t.is_evento = TRUE AND t.evento_id IS NULL
+ORDER BY t.id,
+         (t.date >= COALESCE(e.data_inicio, t.date) AND t.date <= COALESCE(e.data_encerramento, t.date)) DESC,
+         e.id;
+
+-- Uma ocorrência por (evento, data): entre as órfãs e as já ligadas, fica a que guarda
+-- uma exceção (concluída, cancelada), depois a já ligada, depois a mais antiga
+WITH candidatas AS (
+    SELECT t.id, t.evento_id, t.date, t.status, 0 AS orfa
+    FROM tasks t
+    WHERE t.evento_id IS NOT NULL
+      AND (t.evento_id, t.date) IN (SELECT evento_id, date FROM evento_backfill)
+    UNION ALL
+    SELECT t.id, b.evento_id, b.date, t.status, 1
+    FROM evento_backfill b
+    JOIN tasks t ON t.id = b.task_id
+),
+ordenadas AS (
+    SELECT id, ROW_NUMBER() OVER (
+        PARTITION BY evento_id, date
+        ORDER BY (COALESCE(status, 'pendente') <> 'pendente') DESC, orfa, id
+    ) AS n
+    FROM candidatas
+)
+DELETE FROM tasks WHERE id IN (SELECT id FROM ordenadas WHERE n > 1);
+
+UPDATE tasks t SET evento_id = b.evento_id
+FROM evento_backfill b
+WHERE t.id = b.task_id;
+
+-- Órfãs sem evento correspondente (evento excluído ou alterado): ficam como histórico,
+-- mas sem duplicatas da mesma data, pelo mesmo critério
+DELETE FROM tasks WHERE id IN (
+    SELECT id FROM (
+        SELECT id, ROW_NUMBER() OVER (
+            PARTITION BY description, nome, date
+            ORDER BY (COALESCE(status, 'pendente') <> 'pendente') DESC, id
+        ) AS n
+        FROM tasks
+        WHERE is_evento = TRUE AND evento_id IS NULL
+    ) s
+    WHERE n > 1
+);
@@ -0,0 +1,25 @@
+-- model/db/03_query_indexes.sql
+-- Índices compostos e parciais nos formatos das consultas do repositório.
+-- Substitui os índices de coluna única (inclusive os booleanos, que o planejador
+-- praticamente não usa). Benchmark: benchmarks/explain_indexes.py
+
+-- Visão diária, filtros e intervalos: date = ? (ou BETWEEN) com tipo e status
+-- (get_tasks_by_date, get_tasks_with_filters, get_tasks_in_range, estatísticas)
+CREATE INDEX IF NOT EXISTS idx_tasks_date_kind_status ON tasks(date, is_agendamento, is_evento, status);
+
+-- Agendamentos pendentes em um intervalo de datas
+-- (get_upcoming_schedules, get_upcoming_appointments, snapshot da tela)
+CREATE INDEX IF NOT EXISTS idx_tasks_agendamentos_pendentes ON tasks(date)
+    WHERE is_agendamento = TRUE AND status = 'pendente';
+
+-- Busca por conteúdo: date = ? AND description = ? AND nome = ?
+-- (find_task_id, delete_task_by_content, is_item_completed_today, deduplicação da importação).
+-- md5(description) mantém a entrada pequena: descrições longas estourariam o limite do btree.
+CREATE INDEX IF NOT EXISTS idx_tasks_date_description_nome ON tasks(date, md5(description), nome);
+
+-- evento_id = ? AND date >= ? já é atendido pelo índice único uq_tasks_evento_date (evento_id, date).
+
+DROP INDEX IF EXISTS idx_tasks_date;
+DROP INDEX IF EXISTS idx_tasks_status;
+DROP INDEX IF EXISTS idx_tasks_is_agendamento;
+DROP INDEX IF EXISTS idx_tasks_is_evento;
@@ -0,0 +1,192 @@
+-- model/db/04_partition_tasks.sql
+-- tasks particionada por mês (RANGE em date). Consultas com date = ? ou BETWEEN
+-- (visão diária, agendamentos das notificações, exclusões por data) só tocam as
+-- partições do período, por mais anos de histórico que o banco guarde.
+-- Requer PostgreSQL 13+ (gatilhos BEFORE por linha em tabelas particionadas).
+--
+-- Partições: tasks_AAAA_MM, criadas à frente pelo job diário (ensure_task_partitions),
+-- e tasks_default, que recebe datas ainda sem partição até o job seguinte realocá-las.
+-- Meses mais antigos que AGENDA_ARCHIVE_AFTER_DAYS viram partições de arquivo
+-- (AgendaRepository.archive_task_partitions): reescritas sem espaço morto, congeladas
+-- e, opcionalmente, movidas para outro tablespace.
+
+DO $$
+BEGIN
+    IF current_setting('server_version_num')::INT < 130000 THEN
+        RAISE EXCEPTION 'O particionamento de tasks requer PostgreSQL 13 ou superior';
+    END IF;
+END
+$$;
+
+-- Gatilhos de tasks com desvio opcional na transação: cargas em massa e a realocação
+-- de linhas entre partições usam SET LOCAL em vez de ALTER TABLE ... DISABLE TRIGGER,
+-- que pediria lock exclusivo e não se propaga igual em todas as versões.
+CREATE OR REPLACE FUNCTION task_daily_stats_trigger() RETURNS TRIGGER AS $$
+BEGIN
+    IF current_setting('agenda.skip_task_stats', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE task_daily_stats SET total = total - 1
+        WHERE user_id = COALESCE(OLD.user_id, 0)
+          AND date = OLD.date
+          AND kind = task_kind(OLD.is_agendamento, OLD.is_evento)
+          AND priority = COALESCE(OLD.priority, '')
+          AND status = COALESCE(OLD.status, 'pendente');
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO task_daily_stats (user_id, date, kind, priority, status, total)
+        VALUES (COALESCE(NEW.user_id, 0), NEW.date, task_kind(NEW.is_agendamento, NEW.is_evento),
+                COALESCE(NEW.priority, ''), COALESCE(NEW.status, 'pendente'), 1)
+        ON CONFLICT (user_id, date, kind, priority, status)
+        DO UPDATE SET total = task_daily_stats.total + 1;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Em tabelas particionadas TG_TABLE_NAME é o nome da partição; o gatilho de tasks
+-- informa o nome lógico como argumento
+CREATE OR REPLACE FUNCTION backup_tombstone_trigger() RETURNS trigger AS $$
+BEGIN
+    IF current_setting('agenda.skip_tombstones', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+    INSERT INTO backup_tombstones (tabela, row_id) VALUES (COALESCE(TG_ARGV[0], TG_TABLE_NAME), OLD.id);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Conversão: a tabela atual vira tasks_legacy e seus dados são copiados para a nova
+ALTER TABLE tasks RENAME TO tasks_legacy;
+ALTER TABLE tasks_legacy RENAME CONSTRAINT tasks_pkey TO tasks_legacy_pkey;
+ALTER SEQUENCE tasks_id_seq OWNED BY NONE;
+
+-- Mesma ordem de colunas da tabela original (TASK_COLUMNS, search_vector, updated_at).
+-- A chave primária precisa conter a chave de partição; os ids continuam vindo da sequência.
+CREATE TABLE tasks (
+    id INTEGER NOT NULL DEFAULT nextval('tasks_id_seq'),
+    description TEXT NOT NULL,
+    priority VARCHAR(20),
+    nome VARCHAR(100),
+    is_agendamento BOOLEAN DEFAULT FALSE,
+    is_evento BOOLEAN DEFAULT FALSE,
+    dias_evento VARCHAR(3)[],
+    date DATE NOT NULL,
+    status VARCHAR(20) DEFAULT 'pendente',
+    evento_id INTEGER REFERENCES eventos(id) ON DELETE SET NULL,
+    user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+    search_vector TSVECTOR GENERATED ALWAYS AS (
+        setweight(to_tsvector('agenda_pt', COALESCE(nome, '')), 'A') ||
+        setweight(to_tsvector('agenda_pt', COALESCE(description, '')), 'B')
+    ) STORED,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id, date)
+) PARTITION BY RANGE (date);
+
+ALTER SEQUENCE tasks_id_seq OWNED BY tasks.id;
+
+CREATE TABLE tasks_default PARTITION OF tasks DEFAULT;
+
+-- Cria as partições mensais de inicio a fim (inclusive) que ainda não existem, mais as
+-- dos meses que tenham linhas na partição padrão. Essas linhas são movidas para a
+-- partição nova sem passar pelos gatilhos: o rollup, os tombstones e updated_at ficam
+-- como estavam. Aceita NULL nos dois limites (só esvazia a partição padrão).
+-- Retorna o número de partições criadas.
+CREATE OR REPLACE FUNCTION ensure_task_partitions(inicio DATE, fim DATE) RETURNS INTEGER AS $$
+DECLARE
+    meses DATE[];
+    mes DATE;
+    proximo DATE;
+    particao TEXT;
+    criadas INTEGER := 0;
+    skip_stats TEXT := COALESCE(current_setting('agenda.skip_task_stats', true), '');
+    skip_tombstones TEXT := COALESCE(current_setting('agenda.skip_tombstones', true), '');
+BEGIN
+    -- Serializa com outras sessões (job diário, importação) criando as mesmas partições
+    PERFORM pg_advisory_xact_lock(742002);
+    meses := ARRAY(
+        SELECT m::date FROM generate_series(date_trunc('month', inicio), date_trunc('month', fim), INTERVAL '1 month') AS m
+        UNION
+        SELECT DISTINCT date_trunc('month', date)::date FROM tasks_default
+        ORDER BY 1
+    );
+    FOREACH mes IN ARRAY meses LOOP
+        particao := 'tasks_' || to_char(mes, 'YYYY_MM');
+        CONTINUE WHEN to_regclass(particao) IS NOT NULL;
+        proximo := (mes + INTERVAL '1 month')::date;
+
+        IF EXISTS (SELECT 1 FROM tasks_default WHERE date >= mes AND date < proximo) THEN
+            PERFORM set_config('agenda.skip_task_stats', 'on', true);
+            PERFORM set_config('agenda.skip_tombstones', 'on', true);
+            CREATE TEMP TABLE tasks_realocadas ON COMMIT DROP AS
+                SELECT id, description, priority, nome, is_agendamento, is_evento, dias_evento,
+                       date, status, evento_id, user_id, updated_at
+                FROM tasks_default WHERE date >= mes AND date < proximo;
+            DELETE FROM tasks_default WHERE date >= mes AND date < proximo;
+            EXECUTE format('CREATE TABLE %I PARTITION OF tasks FOR VALUES FROM (%L) TO (%L)', particao, mes, proximo);
+            INSERT INTO tasks (id, description, priority, nome, is_agendamento, is_evento, dias_evento,
+                               date, status, evento_id, user_id, updated_at)
+            SELECT * FROM tasks_realocadas;
+            DROP TABLE tasks_realocadas;
+            PERFORM set_config('agenda.skip_task_stats', skip_stats, true);
+            PERFORM set_config('agenda.skip_tombstones', skip_tombstones, true);
+        ELSE
+            EXECUTE format('CREATE TABLE %I PARTITION OF tasks FOR VALUES FROM (%L) TO (%L)', particao, mes, proximo);
+        END IF;
+        criadas := criadas + 1;
+    END LOOP;
+    RETURN criadas;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Partições para todo o histórico e o próximo ano
+SELECT ensure_task_partitions(LEAST(MIN(date), CURRENT_DATE), GREATEST(MAX(date), CURRENT_DATE + 365))
+FROM tasks_legacy;
+
+-- Ainda sem gatilhos na tabela nova: nada vira tombstone (o rollup é refeito abaixo)
+INSERT INTO tasks (id, description, priority, nome, is_agendamento, is_evento, dias_evento,
+                   date, status, evento_id, user_id, updated_at)
+SELECT id, description, priority, nome, is_agendamento, is_evento, dias_evento,
+       date, status, evento_id, user_id, updated_at
+FROM tasks_legacy;
+
+DROP TABLE tasks_legacy;
+
+-- Refaz o rollup a partir das linhas copiadas, mesmo que o banco nunca o tenha mantido
+SELECT rebuild_task_daily_stats();
+
+-- Índices (definidos na tabela-mãe, criados em cada partição)
+CREATE UNIQUE INDEX uq_tasks_evento_date ON tasks(evento_id, date);
+CREATE INDEX idx_tasks_date_kind_status ON tasks(date, is_agendamento, is_evento, status);
+CREATE INDEX idx_tasks_agendamentos_pendentes ON tasks(date)
+    WHERE is_agendamento = TRUE AND status = 'pendente';
+CREATE INDEX idx_tasks_date_description_nome ON tasks(date, md5(description), nome);
+CREATE INDEX idx_tasks_description_trgm ON tasks USING GIN (description gin_trgm_ops);
+CREATE INDEX idx_tasks_nome_trgm ON tasks USING GIN (nome gin_trgm_ops);
+CREATE INDEX idx_tasks_search_vector ON tasks USING GIN (search_vector);
+CREATE INDEX idx_tasks_updated_at ON tasks(updated_at);
+
+-- Gatilhos (também propagados para as partições)
+CREATE TRIGGER trg_task_daily_stats_insert_delete
+    AFTER INSERT OR DELETE ON tasks
+    FOR EACH ROW EXECUTE FUNCTION task_daily_stats_trigger();
+
+CREATE TRIGGER trg_task_daily_stats_update
+    AFTER UPDATE OF user_id, date, is_agendamento, is_evento, priority, status ON tasks
+    FOR EACH ROW
+    WHEN ((OLD.user_id, OLD.date, OLD.is_agendamento, OLD.is_evento, OLD.priority, OLD.status)
+          IS DISTINCT FROM (NEW.user_id, NEW.date, NEW.is_agendamento, NEW.is_evento, NEW.priority, NEW.status))
+    EXECUTE FUNCTION task_daily_stats_trigger();
+
+CREATE TRIGGER trg_tasks_updated_at
+    BEFORE UPDATE ON tasks
+    FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+
+-- Mudar a data de uma tarefa para outro mês a move de partição (DELETE + INSERT),
+-- o que também grava um tombstone; a restauração aplica as exclusões antes das linhas.
+CREATE TRIGGER trg_tasks_backup_tombstone
+    AFTER DELETE ON tasks
+    FOR EACH ROW EXECUTE FUNCTION backup_tombstone_trigger('tasks');
+
+ANALYZE tasks;
@@ -0,0 +1,28 @@
+-- model/db/05_notify_agendamentos.sql
+-- Avisa (NOTIFY agenda_agendamentos) quando um agendamento é criado, alterado ou removido.
+-- O agendador de notificações escuta o canal e só recarrega os lembretes nessas horas,
+-- inclusive quando a alteração vem de outra instância do app.
+
+CREATE OR REPLACE FUNCTION notify_agendamentos_changed() RETURNS trigger AS $$
+DECLARE
+    changed BOOLEAN;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        changed := NEW.is_agendamento;
+    ELSIF TG_OP = 'DELETE' THEN
+        changed := OLD.is_agendamento;
+    ELSE
+        changed := NEW.is_agendamento OR OLD.is_agendamento;
+    END IF;
+    IF changed THEN
+        -- Payload fixo: notificações iguais na mesma transação chegam como uma só
+        PERFORM pg_notify('agenda_agendamentos', '');
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_tasks_notify_agendamentos ON tasks;
+CREATE TRIGGER trg_tasks_notify_agendamentos
+    AFTER INSERT OR UPDATE OR DELETE ON tasks
+    FOR EACH ROW EXECUTE FUNCTION notify_agendamentos_changed();
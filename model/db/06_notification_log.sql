@@ -0,0 +1,17 @@
+-- model/db/06_notification_log.sql
+-- Registro dos lembretes enviados, compartilhado por todas as instâncias do app.
+-- Cada lembrete é reivindicado com INSERT ... ON CONFLICT antes do envio: só quem
+-- gravou a linha notifica, então reinícios e vários desktops no mesmo banco não
+-- repetem o aviso. Sem chave estrangeira: a chave de tasks é (id, date) e mudar a
+-- data de um agendamento não pode falhar por causa do registro; as linhas antigas
+-- são removidas pela data (AgendaRepository.prune_notification_log).
+CREATE TABLE IF NOT EXISTS notification_log (
+    task_id INTEGER NOT NULL,
+    reminder_kind VARCHAR(20) NOT NULL, -- vespera (24 horas antes do dia)
+    task_date DATE NOT NULL,            -- data do agendamento quando foi notificado
+    notified_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    instancia VARCHAR(100),             -- host:pid que enviou
+    PRIMARY KEY (task_id, reminder_kind)
+);
+
+CREATE INDEX IF NOT EXISTS idx_notification_log_task_date ON notification_log(task_date);
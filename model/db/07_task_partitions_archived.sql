@@ -0,0 +1,36 @@
+-- model/db/07_task_partitions_archived.sql
+-- Catálogo das partições mensais de tasks já arquivadas (VACUUM FULL/FREEZE e, se
+-- configurado, movidas de tablespace). O job de partições consulta esta tabela para
+-- não reescrever de novo o mesmo mês. Antes dela, o arquivamento marcava a partição
+-- com fillfactor = 100; essas marcas viram linhas aqui e a opção volta ao padrão.
+CREATE TABLE IF NOT EXISTS task_partitions_archived (
+    particao VARCHAR(63) PRIMARY KEY,   -- tasks_AAAA_MM
+    mes DATE NOT NULL,                  -- primeiro dia do mês da partição
+    arquivada_em TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    tablespace VARCHAR(63),             -- NULL: tablespace padrão
+    bytes_antes BIGINT,
+    bytes_depois BIGINT
+);
+
+DO $$
+DECLARE
+    rel TEXT;
+BEGIN
+    FOR rel IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'tasks'::regclass
+          AND c.relname ~ '^tasks_[0-9]{4}_[0-9]{2}$'
+          AND 'fillfactor=100' = ANY(c.reloptions)
+    LOOP
+        INSERT INTO task_partitions_archived (particao, mes, tablespace, bytes_depois)
+        SELECT rel, to_date(substr(rel, 7), 'YYYY_MM'), t.spcname,
+               pg_total_relation_size(rel::regclass)
+        FROM pg_class c LEFT JOIN pg_tablespace t ON t.oid = c.reltablespace
+        WHERE c.oid = rel::regclass
+        ON CONFLICT (particao) DO NOTHING;
+        EXECUTE format('ALTER TABLE %I RESET (fillfactor)', rel);
+    END LOOP;
+END;
+$$;
@@ -4,4 +4,58 @@ DB_HOST = os.getenv('AGENDA_DB_HOST', 'localhost')
 DB_PORT = os.getenv('AGENDA_DB_PORT', '5433')
 DB_NAME = os.getenv('AGENDA_DB_NAME', 'agenda_virtual')
 DB_USER = os.getenv('AGENDA_DB_USER', 'postgres')
-DB_PASSWORD = os.getenv('AGENDA_DB_PASSWORD', 'admin') 
\ No newline at end of file
+DB_PASSWORD = os.getenv('AGENDA_DB_PASSWORD', 'admin')
+
+# Pool de conexões
+DB_POOL_MIN = int(os.getenv('AGENDA_DB_POOL_MIN', '1'))
+DB_POOL_MAX = int(os.getenv('AGENDA_DB_POOL_MAX', '10'))
+# Conexões ociosas há mais tempo que isso (segundos) são validadas antes do uso
+DB_POOL_VALIDATE_AFTER = float(os.getenv('AGENDA_DB_POOL_VALIDATE_AFTER', '30'))
+# Tempo máximo (segundos) esperando uma conexão livre
+DB_POOL_TIMEOUT = float(os.getenv('AGENDA_DB_POOL_TIMEOUT', '30'))
+
+# Prepara (PREPARE/EXECUTE) as consultas mais frequentes do repositório. Desligado por
+# padrão: no benchmark (README) não houve ganho mensurável
+DB_PREPARED_STATEMENTS = os.getenv('AGENDA_DB_PREPARED_STATEMENTS', 'false').lower() in ('1', 'true', 'yes')
+
+# Linhas buscadas por ida ao servidor nas leituras em streaming (cursores nomeados)
+DB_CURSOR_ITERSIZE = int(os.getenv('AGENDA_DB_CURSOR_ITERSIZE', '2000'))
+
+# Backups incrementais: deltas por base antes de gerar uma nova base completa,
+# quantas cadeias (base + deltas) manter, e a margem (segundos) que cada delta
+# volta no tempo para cobrir transações que gravaram durante o backup anterior
+BACKUP_MAX_DELTAS = int(os.getenv('AGENDA_BACKUP_MAX_DELTAS', '20'))
+BACKUP_KEEP_CHAINS = int(os.getenv('AGENDA_BACKUP_KEEP_CHAINS', '3'))
+BACKUP_OVERLAP = float(os.getenv('AGENDA_BACKUP_OVERLAP', '600'))
+
+# Ocorrências de eventos gravadas à frente de hoje e intervalo (segundos) entre as execuções do job
+EVENT_HORIZON_DAYS = int(os.getenv('AGENDA_EVENT_HORIZON_DAYS', '90'))
+EVENT_HORIZON_INTERVAL = float(os.getenv('AGENDA_EVENT_HORIZON_INTERVAL', '86400'))
+
+# Partições mensais de tasks: criadas com esta antecedência (dias) por um job que roda
+# a cada PARTITION_INTERVAL segundos
+PARTITION_AHEAD_DAYS = int(os.getenv('AGENDA_PARTITION_AHEAD_DAYS', '180'))
+PARTITION_INTERVAL = float(os.getenv('AGENDA_PARTITION_INTERVAL', '86400'))
+
+# Meses de tasks encerrados há mais que isso (dias) viram partições de arquivo (0 desativa)
+# e, se informado, vão para este tablespace (ex.: em disco com compressão)
+ARCHIVE_AFTER_DAYS = int(os.getenv('AGENDA_ARCHIVE_AFTER_DAYS', '365'))
+ARCHIVE_TABLESPACE = os.getenv('AGENDA_ARCHIVE_TABLESPACE') or None
+
+# Limpeza em segundo plano: linhas por lote e pausa (segundos) entre os lotes
+RETENTION_BATCH_SIZE = int(os.getenv('AGENDA_RETENTION_BATCH_SIZE', '1000'))
+RETENTION_PAUSE = float(os.getenv('AGENDA_RETENTION_PAUSE', '0.2'))
+
+# Intervalo (segundos) de recarga dos lembretes quando LISTEN/NOTIFY não está disponível
+NOTIFICATION_INTERVAL = float(os.getenv('AGENDA_NOTIFICATION_INTERVAL', '60'))
+# Dias que um lembrete enviado fica em notification_log depois da data do agendamento
+NOTIFICATION_LOG_KEEP_DAYS = int(os.getenv('AGENDA_NOTIFICATION_LOG_KEEP_DAYS', '30'))
+
+# Entrega das notificações: backends (plyer, log, painel), janela (segundos) em que
+# lembretes próximos viram um único resumo, intervalo mínimo entre entregas, limite
+# de cada chamada a um backend e tamanho máximo da fila
+NOTIFICATION_BACKENDS = [b.strip() for b in os.getenv('AGENDA_NOTIFICATION_BACKENDS', 'plyer').split(',') if b.strip()]
+NOTIFICATION_COALESCE_WINDOW = float(os.getenv('AGENDA_NOTIFICATION_COALESCE_WINDOW', '2'))
+NOTIFICATION_MIN_INTERVAL = float(os.getenv('AGENDA_NOTIFICATION_MIN_INTERVAL', '10'))
+NOTIFICATION_SEND_TIMEOUT = float(os.getenv('AGENDA_NOTIFICATION_SEND_TIMEOUT', '5'))
+NOTIFICATION_MAX_PENDING = int(os.getenv('AGENDA_NOTIFICATION_MAX_PENDING', '200'))
@@ -1,20 +1,186 @@
+import logging
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
+import psycopg2
 import psycopg2.pool
-from .config import DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD
-
-# Pool de conexões para otimizar a comunicação com o banco
-db_pool = psycopg2.pool.SimpleConnectionPool(
-    1, 10,
-    host=DB_HOST,
-    port=DB_PORT,
-    dbname=DB_NAME,
-    user=DB_USER,
-    password=DB_PASSWORD
+from .config import (
+    DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD,
+    DB_POOL_MIN, DB_POOL_MAX, DB_POOL_VALIDATE_AFTER, DB_POOL_TIMEOUT
 )
 
+# Pool de conexões para otimizar a comunicação com o banco.
+# É criado no primeiro uso (importar este módulo não abre conexões) e é seguro
+# entre threads: a thread do Tk e o agendador de notificações o compartilham.
+_pool = None
+_pool_lock = threading.Lock()
+# Limita as retiradas simultâneas a DB_POOL_MAX; quem excede espera em vez de receber PoolError
+_slots = threading.BoundedSemaphore(DB_POOL_MAX)
+_last_used = {}  # id(conexão) -> instante da última devolução
+# Nomes já preparados (PREPARE) em cada conexão. A chave é o próprio objeto da conexão,
+# não o PID do backend, que o servidor reaproveita: uma conexão nova nunca herda nomes
+# de outra, e a entrada some junto com a conexão.
+_prepared = weakref.WeakKeyDictionary()
+_prepared_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {
+    'checkouts': 0,
+    'in_use': 0,
+    'wait_total': 0.0,
+    'wait_max': 0.0,
+    'stale_discarded': 0,
+}
+
+def _get_pool():
+    """Cria o pool na primeira chamada."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = psycopg2.pool.ThreadedConnectionPool(
+                    DB_POOL_MIN, DB_POOL_MAX,
+                    host=DB_HOST,
+                    port=DB_PORT,
+                    dbname=DB_NAME,
+                    user=DB_USER,
+                    password=DB_PASSWORD
+                )
+    return _pool
+
+def _is_alive(conn):
+    """Verifica se uma conexão ociosa ainda responde."""
+    if conn.closed:
+        return False
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1;")
+        conn.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
 def get_db_connection():
-    """Obtém uma conexão do pool."""
-    return db_pool.getconn()
+    """Obtém uma conexão do pool, esperando se todas estiverem em uso."""
+    started = time.monotonic()
+    if not _slots.acquire(timeout=DB_POOL_TIMEOUT):
+        raise psycopg2.pool.PoolError("Tempo esgotado esperando uma conexão livre no pool")
+    try:
+        pool = _get_pool()
+        conn = pool.getconn()
+        # Conexões paradas há muito tempo podem ter sido derrubadas pelo servidor
+        idle_since = _last_used.get(id(conn))
+        while conn.closed or (idle_since is not None and time.monotonic() - idle_since > DB_POOL_VALIDATE_AFTER and not _is_alive(conn)):
+            with _stats_lock:
+                _stats['stale_discarded'] += 1
+            _last_used.pop(id(conn), None)
+            forget_prepared_statements(conn)
+            pool.putconn(conn, close=True)
+            conn = pool.getconn()
+            idle_since = _last_used.get(id(conn))
+    except Exception:
+        _slots.release()
+        raise
+
+    waited = time.monotonic() - started
+    with _stats_lock:
+        _stats['checkouts'] += 1
+        _stats['in_use'] += 1
+        _stats['wait_total'] += waited
+        _stats['wait_max'] = max(_stats['wait_max'], waited)
+    return conn
+
+def prepared_statements(conn):
+    """Conjunto dos nomes já preparados na conexão (vazio para uma conexão nova)."""
+    with _prepared_lock:
+        return _prepared.setdefault(conn, set())
+
+def forget_prepared_statements(conn):
+    """Esquece os nomes preparados na conexão (ao descartá-la)."""
+    with _prepared_lock:
+        _prepared.pop(conn, None)
 
 def release_db_connection(conn):
     """Devolve a conexão ao pool."""
-    db_pool.putconn(conn) 
\ No newline at end of file
+    try:
+        if conn.closed:
+            _last_used.pop(id(conn), None)
+            forget_prepared_statements(conn)
+        else:
+            _last_used[id(conn)] = time.monotonic()
+        _get_pool().putconn(conn, close=conn.closed)
+    finally:
+        with _stats_lock:
+            _stats['in_use'] -= 1
+        _slots.release()
+
+@contextmanager
+def connection():
+    """Retira uma conexão do pool e a devolve ao sair do bloco.
+
+    Em caso de exceção a transação aberta é desfeita antes da devolução.
+
+        with connection() as conn:
+            with conn.cursor() as cur:
+                ...
+    """
+    conn = get_db_connection()
+    try:
+        yield conn
+    except Exception:
+        if not conn.closed:
+            conn.rollback()
+        raise
+    finally:
+        release_db_connection(conn)
+
+def open_listen_connection(*channels):
+    """Abre uma conexão dedicada (fora do pool), em autocommit, escutando os canais.
+
+    Fica aberta enquanto quem escuta viver; por isso não ocupa uma vaga do pool.
+    Use conn.fileno() com select e conn.poll() para receber as notificações.
+    """
+    conn = psycopg2.connect(
+        host=DB_HOST,
+        port=DB_PORT,
+        dbname=DB_NAME,
+        user=DB_USER,
+        password=DB_PASSWORD
+    )
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        for channel in channels:
+            cur.execute(f"LISTEN {channel};")
+    return conn
+
+def warm_up_pool():
+    """Abre as conexões iniciais do pool em segundo plano, sem bloquear a interface."""
+    def warm_up():
+        try:
+            _get_pool()
+            logging.info("Pool de conexões pronto")
+        except Exception as e:
+            logging.error(f"Erro ao inicializar o pool de conexões: {e}")
+
+    thread = threading.Thread(target=warm_up, name="db-pool-warmup", daemon=True)
+    thread.start()
+    return thread
+
+def get_pool_stats():
+    """Estatísticas do pool: retiradas, conexões em uso e tempo de espera (segundos)."""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats['wait_avg'] = stats['wait_total'] / stats['checkouts'] if stats['checkouts'] else 0.0
+    return stats
+
+def close_pool():
+    """Fecha todas as conexões do pool (ao encerrar a aplicação)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+            _last_used.clear()
+    with _prepared_lock:
+        _prepared.clear()
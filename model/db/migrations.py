@@ -0,0 +1,96 @@
+import logging
+import os
+import re
+
+from .database import get_db_connection, release_db_connection
+
+# Migrações versionadas: arquivos NN_nome.sql nesta pasta, aplicados em ordem numérica.
+# 01_schema.sql é idempotente e também serve para bancos criados antes do controle de versão.
+MIGRATIONS_DIR = os.path.dirname(os.path.abspath(__file__))
+MIGRATION_FILE = re.compile(r'^(\d+)_(\w+)\.sql$')
+
+# Chave do advisory lock que impede duas instâncias migrando ao mesmo tempo
+MIGRATION_LOCK_KEY = 742001
+
+def list_migrations():
+    """Retorna [(versão, nome, caminho)] dos arquivos de migração, em ordem."""
+    migrations = []
+    for filename in os.listdir(MIGRATIONS_DIR):
+        match = MIGRATION_FILE.match(filename)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), os.path.join(MIGRATIONS_DIR, filename)))
+    return sorted(migrations)
+
+def applied_versions(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        );
+    """)
+    cur.execute("SELECT version, name FROM schema_migrations;")
+    return dict(cur.fetchall())
+
+def check_applied(done):
+    """Falha se uma versão registrada corresponde hoje a outro arquivo (migrações renumeradas)."""
+    for version, name, _ in list_migrations():
+        if version in done and done[version] != name:
+            raise RuntimeError(
+                f"A migração {version:02d} foi aplicada como '{done[version]}', mas o arquivo atual é "
+                f"'{version:02d}_{name}.sql'. Recrie o banco ou ajuste schema_migrations antes de migrar."
+            )
+
+def apply_migrations():
+    """
+    Aplica as migrações ainda não registradas em schema_migrations.
+    Cada arquivo roda em sua própria transação, junto com seu registro; se falhar,
+    nada dele fica gravado e as seguintes não são aplicadas.
+    Retorna a lista de (versão, nome) aplicados.
+    """
+    conn = get_db_connection()
+    applied = []
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_lock(%s);", (MIGRATION_LOCK_KEY,))
+            conn.commit()
+            try:
+                done = applied_versions(cur)
+                conn.commit()
+                check_applied(done)
+                for version, name, path in list_migrations():
+                    if version in done:
+                        continue
+                    with open(path, encoding='utf-8') as f:
+                        sql = f.read()
+                    try:
+                        cur.execute(sql)
+                        cur.execute(
+                            "INSERT INTO schema_migrations (version, name) VALUES (%s, %s);",
+                            (version, name)
+                        )
+                        conn.commit()
+                    except Exception as e:
+                        conn.rollback()
+                        logging.error(f"Erro ao aplicar a migração {version:02d}_{name}: {e}")
+                        raise
+                    logging.info(f"Migração aplicada: {version:02d}_{name}")
+                    applied.append((version, name))
+            finally:
+                cur.execute("SELECT pg_advisory_unlock(%s);", (MIGRATION_LOCK_KEY,))
+                conn.commit()
+        return applied
+    finally:
+        release_db_connection(conn)
+
+def pending_migrations():
+    """Retorna [(versão, nome)] das migrações ainda não aplicadas."""
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            done = applied_versions(cur)
+            conn.commit()
+        check_applied(done)
+        return [(version, name) for version, name, _ in list_migrations() if version not in done]
+    finally:
+        release_db_connection(conn)
@@ -1,17 +1,148 @@
-from .database import get_db_connection, release_db_connection
+from .database import get_db_connection, release_db_connection, prepared_statements
+from .config import DB_PREPARED_STATEMENTS, DB_CURSOR_ITERSIZE
 from datetime import datetime, timedelta
+from contextlib import contextmanager
+from psycopg2.extras import execute_values
+import psycopg2
+import psycopg2.errors
 import logging
 import json
+import re
+import uuid
+
+# Colunas de tasks na ordem esperada por AgendaController._db_to_task.
+# As ocorrências virtuais de ocorrencias_eventos() seguem exatamente esta ordem.
+TASK_COLUMNS = "id, description, priority, nome, is_agendamento, is_evento, dias_evento, date, status, evento_id, user_id"
+
+# Colunas de eventos na ordem esperada por AgendaController._db_to_evento.
+# Explícitas porque data_inicio ocupa posições diferentes em bancos novos e migrados.
+EVENTO_COLUMNS = "id, description, nome, dias_semana, ativo, data_encerramento, user_id"
+
+# Colunas de eventos gravadas nos backups (inclui data_inicio, ausente em EVENTO_COLUMNS)
+BACKUP_EVENTO_COLUMNS = "id, description, nome, dias_semana, ativo, data_inicio, data_encerramento, user_id"
+
+# Regras de visibilidade da visão diária, compartilhadas pelas consultas por data e por intervalo
+VISIBILITY_SQL = """
+    (t.is_evento = FALSE AND t.is_agendamento = FALSE) OR  -- Tarefas normais (sempre visíveis)
+    (t.is_agendamento = TRUE AND t.status = 'pendente') OR  -- Agendamentos pendentes
+    (t.is_evento = TRUE AND t.status = 'pendente') OR  -- Eventos pendentes
+    (t.is_agendamento = TRUE AND t.status = 'concluída') OR  -- Agendamentos concluídos apenas no dia
+    (t.is_evento = TRUE AND t.status = 'concluída')  -- Eventos concluídos apenas no dia
+"""
+
+# Tipos aceitos em get_tasks_in_range e o predicado correspondente
+KIND_SQL = {
+    'tarefa': "(t.is_agendamento = FALSE AND t.is_evento = FALSE)",
+    'agendamento': "(t.is_agendamento = TRUE AND t.is_evento = FALSE)",
+    'evento': "(t.is_evento = TRUE)",
+}
 
 class AgendaRepository:
+    # Consultas executadas a cada atualização da interface, preparadas uma vez por conexão
+    PREPARED_SQL = {
+        'agenda_tasks_by_date': f"""
+            SELECT t.* FROM (
+                SELECT {TASK_COLUMNS} FROM tasks WHERE date = $1
+                UNION ALL
+                SELECT * FROM ocorrencias_eventos($1::date, $1::date)
+            ) t
+            WHERE ({VISIBILITY_SQL})
+            ORDER BY t.id NULLS LAST, t.evento_id
+        """,
+        'agenda_eventos_ativos': f"""
+            SELECT {EVENTO_COLUMNS} FROM eventos
+            WHERE ativo = TRUE
+            AND (data_encerramento IS NULL OR data_encerramento >= $1)
+        """,
+        'agenda_find_task_id': """
+            SELECT id FROM tasks
+            WHERE date = $1 AND md5(description) = md5($2) AND description = $2 AND nome = $3 LIMIT 1
+        """,
+        'agenda_find_task_id_sem_nome': """
+            SELECT id FROM tasks
+            WHERE date = $1 AND md5(description) = md5($2) AND description = $2 AND nome IS NULL LIMIT 1
+        """,
+        'agenda_upcoming_schedules': """
+            SELECT id, description, nome, date FROM tasks
+            WHERE is_agendamento = TRUE
+              AND status = 'pendente'
+              AND date >= $1 AND date <= $2
+            ORDER BY date
+        """,
+        # Tudo o que uma atualização da tela precisa, em uma ida ao banco.
+        # $1 = data selecionada, $2 = hoje
+        'agenda_refresh_snapshot': f"""
+            WITH day_tasks AS (
+                SELECT t.* FROM (
+                    SELECT {TASK_COLUMNS} FROM tasks WHERE date = $1
+                    UNION ALL
+                    SELECT * FROM ocorrencias_eventos($1::date, $1::date)
+                ) t
+                WHERE ({VISIBILITY_SQL})
+            ),
+            active_eventos AS (
+                SELECT {EVENTO_COLUMNS} FROM eventos
+                WHERE ativo = TRUE
+                AND (data_encerramento IS NULL OR data_encerramento >= $2)
+            ),
+            upcoming_agendamentos AS (
+                SELECT {TASK_COLUMNS} FROM tasks
+                WHERE is_agendamento = TRUE AND is_evento = FALSE
+                  AND status = 'pendente'
+                  AND date > $2
+            )
+            SELECT
+                (SELECT COALESCE(json_agg(json_build_array({TASK_COLUMNS})
+                                          ORDER BY id NULLS LAST, evento_id), '[]')
+                 FROM day_tasks),
+                (SELECT COALESCE(json_agg(json_build_array({EVENTO_COLUMNS}) ORDER BY id), '[]')
+                 FROM active_eventos),
+                (SELECT COALESCE(json_agg(json_build_array({TASK_COLUMNS}) ORDER BY date, id), '[]')
+                 FROM upcoming_agendamentos)
+        """,
+    }
+
+    def __init__(self, use_prepared_statements=DB_PREPARED_STATEMENTS):
+        self.use_prepared_statements = use_prepared_statements
+
+    def _execute_prepared(self, conn, cur, name, params):
+        """Executa uma das consultas de PREPARED_SQL.
+
+        Na primeira execução em uma conexão a consulta é preparada (PREPARE) e nas
+        seguintes apenas executada (EXECUTE), sem que o servidor precise analisar e
+        planejar o texto de novo. Com use_prepared_statements desligado, envia o SQL completo.
+        """
+        sql = self.PREPARED_SQL[name]
+        if not self.use_prepared_statements:
+            # $n pode se repetir na consulta; parâmetros nomeados preservam isso
+            for i in range(len(params), 0, -1):
+                sql = sql.replace(f"${i}", f"%(p{i})s")
+            cur.execute(sql, {f"p{i}": value for i, value in enumerate(params, 1)})
+            return
+
+        prepared = prepared_statements(conn)
+        execute_sql = f"EXECUTE {name} ({', '.join(['%s'] * len(params))});"
+        try:
+            if name not in prepared:
+                cur.execute(f"PREPARE {name} AS {sql};")
+                prepared.add(name)
+            cur.execute(execute_sql, params)
+        except psycopg2.errors.InvalidSqlStatementName:
+            # A sessão perdeu as instruções preparadas (ex.: reinício do servidor): prepara de novo
+            conn.rollback()
+            prepared.clear()
+            cur.execute(f"PREPARE {name} AS {sql};")
+            prepared.add(name)
+            cur.execute(execute_sql, params)
+
     def add_task(self, task_data):
         conn = get_db_connection()
         try:
             with conn.cursor() as cur:
                 cur.execute(
                     """
-                    INSERT INTO tasks (description, priority, nome, is_agendamento, is_evento, dias_evento, date, status, user_id)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                    INSERT INTO tasks (description, priority, nome, is_agendamento, is_evento, dias_evento, date, status, evento_id, user_id)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                     RETURNING id;
                     """,
                     (
@@ -23,6 +154,7 @@ class AgendaRepository:
                         task_data.get('dias_evento'),
                         task_data['date'],
                         'pendente',
+                        task_data.get('evento_id'),
                         1  #  Hardcoded para o usuário 1 por enquanto
                     )
                 )
@@ -38,40 +170,348 @@ class AgendaRepository:
             if conn:
                 release_db_connection(conn)
 
+    def extend_event_horizons(self, horizon_days):
+        """Garante ocorrências gravadas até hoje + horizon_days para todos os eventos ativos.
+
+        Uma única instrução: seleciona os eventos cujo materializado_ate ficou para
+        trás, gera as datas que faltam com generate_series (respeitando dias_semana e
+        data_encerramento) e avança materializado_ate. Sem eventos pendentes,
+        não grava nada. Retorna (eventos atualizados, ocorrências inseridas).
+        """
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    WITH due AS (
+                        SELECT e.id,
+                               COALESCE(e.materializado_ate + 1, GREATEST(e.data_inicio, CURRENT_DATE)) AS inicio,
+                               LEAST(CURRENT_DATE + %s, COALESCE(e.data_encerramento, CURRENT_DATE + %s)) AS fim
+                        FROM eventos e
+                        WHERE e.ativo = TRUE
+                          AND COALESCE(e.materializado_ate, GREATEST(e.data_inicio, CURRENT_DATE) - 1)
+                              < LEAST(CURRENT_DATE + %s, COALESCE(e.data_encerramento, CURRENT_DATE + %s))
+                        FOR UPDATE OF e
+                    ),
+                    inserted AS (
+                        INSERT INTO tasks (description, priority, nome, is_agendamento, is_evento, dias_evento, date, status, evento_id, user_id)
+                        SELECT e.description, NULL, e.nome, FALSE, TRUE, e.dias_semana, d::date, 'pendente', e.id, e.user_id
+                        FROM due
+                        JOIN eventos e ON e.id = due.id
+                        CROSS JOIN generate_series(due.inicio::timestamp, due.fim::timestamp, INTERVAL '1 day') AS d
+                        WHERE dia_semana_pt(d::date) = ANY(e.dias_semana)
+                        ON CONFLICT (evento_id, date) DO NOTHING
+                        RETURNING 1
+                    ),
+                    marked AS (
+                        UPDATE eventos e SET materializado_ate = due.fim
+                        FROM due
+                        WHERE e.id = due.id
+                        RETURNING 1
+                    )
+                    SELECT (SELECT COUNT(*) FROM marked), (SELECT COUNT(*) FROM inserted);
+                    """,
+                    (horizon_days, horizon_days, horizon_days, horizon_days)
+                )
+                result = cur.fetchone()
+                conn.commit()
+                return result
+        except Exception as e:
+            logging.error(f"Erro ao estender o horizonte dos eventos: {e}")
+            if conn:
+                conn.rollback()
+            return (0, 0)
+        finally:
+            if conn:
+                release_db_connection(conn)
+
     def get_tasks_by_date(self, date):
         conn = get_db_connection()
         try:
             with conn.cursor() as cur:
                 # Buscar tarefas normais, agendamentos pendentes e eventos pendentes
                 # Também incluir eventos e agendamentos concluídos APENAS no dia da conclusão
-                cur.execute("""
-                    SELECT t.* FROM tasks t 
-                    WHERE t.date = %s 
-                    AND (
-                        (t.is_evento = FALSE AND t.is_agendamento = FALSE) OR  -- Tarefas normais (sempre visíveis)
-                        (t.is_agendamento = TRUE AND t.status = 'pendente') OR  -- Agendamentos pendentes
-                        (t.is_evento = TRUE AND t.status = 'pendente') OR  -- Eventos pendentes
-                        (t.is_agendamento = TRUE AND t.status = 'concluída' AND t.date = %s) OR  -- Agendamentos concluídos apenas no dia
-                        (t.is_evento = TRUE AND t.status = 'concluída' AND t.date = %s)  -- Eventos concluídos apenas no dia
-                    )
-                    ORDER BY t.id;
-                """, (date, date, date))
+                # Eventos são expandidos na leitura e mesclados às exceções gravadas
+                self._execute_prepared(conn, cur, 'agenda_tasks_by_date', (date,))
                 tasks = cur.fetchall()
                 return tasks
         finally:
             release_db_connection(conn)
+
+    def get_refresh_snapshot(self, date):
+        """Busca, em uma única consulta, os dados de uma atualização da tela.
+
+        Retorna um dict com 'tasks' (tarefas visíveis da data, incluindo ocorrências
+        virtuais de eventos), 'eventos' (eventos ativos) e 'agendamentos' (agendamentos
+        pendentes a partir de amanhã). As linhas mantêm a ordem de TASK_COLUMNS e
+        EVENTO_COLUMNS, como nas consultas separadas.
+        """
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cur:
+                self._execute_prepared(conn, cur, 'agenda_refresh_snapshot',
+                                       (date, datetime.today().date()))
+                tasks, eventos, agendamentos = cur.fetchone()
+                return {
+                    'tasks': [self._task_from_json(row) for row in tasks],
+                    'eventos': [self._evento_from_json(row) for row in eventos],
+                    'agendamentos': [self._task_from_json(row) for row in agendamentos],
+                }
+        finally:
+            release_db_connection(conn)
+
+    @staticmethod
+    def _task_from_json(row):
+        """Converte uma linha JSON (ordem de TASK_COLUMNS) de volta para tupla."""
+        row[7] = datetime.strptime(row[7], '%Y-%m-%d').date()
+        return tuple(row)
+
+    @staticmethod
+    def _evento_from_json(row):
+        """Converte uma linha JSON (ordem de EVENTO_COLUMNS) de volta para tupla."""
+        if row[5]:
+            row[5] = datetime.strptime(row[5], '%Y-%m-%d').date()
+        return tuple(row)
+
+    def get_tasks_in_range(self, start_date, end_date, kinds=None, statuses=None):
+        """Busca as tarefas visíveis entre duas datas (inclusive) em uma única consulta.
+
+        Aplica as mesmas regras de visibilidade de get_tasks_by_date e inclui as
+        ocorrências virtuais de eventos. `kinds` aceita 'tarefa', 'agendamento' e
+        'evento'; `statuses` restringe os status. Retorna um dict data -> linhas.
+        """
+        conditions = [f"({VISIBILITY_SQL})"]
+        params = [start_date, end_date, start_date, end_date]
+        if kinds:
+            conditions.append("(" + " OR ".join(KIND_SQL[k] for k in kinds) + ")")
+        if statuses:
+            conditions.append("t.status = ANY(%s)")
+            params.append(list(statuses))
+
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(f"""
+                    SELECT t.* FROM (
+                        SELECT {TASK_COLUMNS} FROM tasks WHERE date BETWEEN %s AND %s
+                        UNION ALL
+                        SELECT * FROM ocorrencias_eventos(%s::date, %s::date)
+                    ) t
+                    WHERE {" AND ".join(conditions)}
+                    ORDER BY t.date, t.id NULLS LAST, t.evento_id;
+                """, tuple(params))
+                tasks_by_date = {}
+                for row in cur.fetchall():
+                    tasks_by_date.setdefault(row[7], []).append(row)
+                return tasks_by_date
+        finally:
+            release_db_connection(conn)
     
-    def get_all_tasks(self):
-        """Retornar todas as tarefas do banco de dados"""
+    def get_task_statistics(self, start_date, end_date):
+        """Calcula no PostgreSQL os contadores do dashboard para um intervalo de datas.
+
+        Considera as mesmas tarefas visíveis de get_tasks_in_range, mas transfere
+        apenas os totais por status, prioridade e tipo.
+        """
         conn = get_db_connection()
         try:
             with conn.cursor() as cur:
-                cur.execute("SELECT * FROM tasks ORDER BY date DESC;")
-                tasks = cur.fetchall()
-                return tasks
+                cur.execute(f"""
+                    SELECT
+                        COUNT(*) AS total,
+                        COUNT(*) FILTER (WHERE t.status = 'concluída') AS completed,
+                        COUNT(*) FILTER (WHERE t.status <> 'concluída') AS pending,
+                        COUNT(*) FILTER (WHERE t.priority IN ('muito-importante', 'importante')) AS priority_high,
+                        COUNT(*) FILTER (WHERE t.priority = 'média') AS priority_normal,
+                        COUNT(*) FILTER (WHERE t.priority = 'simples') AS priority_low,
+                        COUNT(*) FILTER (WHERE t.is_agendamento = FALSE AND t.is_evento = FALSE) AS type_task,
+                        COUNT(*) FILTER (WHERE t.is_agendamento = TRUE AND t.is_evento = FALSE) AS type_meeting,
+                        COUNT(*) FILTER (WHERE t.is_evento = TRUE) AS type_reminder
+                    FROM (
+                        SELECT {TASK_COLUMNS} FROM tasks WHERE date BETWEEN %s AND %s
+                        UNION ALL
+                        SELECT * FROM ocorrencias_eventos(%s::date, %s::date)
+                    ) t
+                    WHERE ({VISIBILITY_SQL});
+                """, (start_date, end_date, start_date, end_date))
+                row = cur.fetchone()
+                return dict(zip([col[0] for col in cur.description], row))
+        finally:
+            release_db_connection(conn)
+
+    def get_task_statistics_rollup(self, start_date, end_date):
+        """Calcula os contadores do dashboard a partir da tabela task_daily_stats.
+
+        Indicado para períodos longos: lê uma linha pequena por combinação diária
+        em vez de varrer tasks. `start_date` None significa todo o histórico. As
+        ocorrências virtuais de eventos do período são somadas aos totais gravados.
+        """
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    WITH t AS (
+                        SELECT kind, priority, status, total
+                        FROM task_daily_stats
+                        WHERE (%s::date IS NULL OR date >= %s::date) AND date <= %s::date
+                          AND (kind = 'tarefa' OR status IN ('pendente', 'concluída'))
+                        UNION ALL
+                        SELECT task_kind(is_agendamento, is_evento), COALESCE(priority, ''), status, 1
+                        FROM ocorrencias_eventos(%s::date, %s::date)
+                    )
+                    SELECT
+                        COALESCE(SUM(total), 0) AS total,
+                        COALESCE(SUM(total) FILTER (WHERE status = 'concluída'), 0) AS completed,
+                        COALESCE(SUM(total) FILTER (WHERE status <> 'concluída'), 0) AS pending,
+                        COALESCE(SUM(total) FILTER (WHERE priority IN ('muito-importante', 'importante')), 0) AS priority_high,
+                        COALESCE(SUM(total) FILTER (WHERE priority = 'média'), 0) AS priority_normal,
+                        COALESCE(SUM(total) FILTER (WHERE priority = 'simples'), 0) AS priority_low,
+                        COALESCE(SUM(total) FILTER (WHERE kind = 'tarefa'), 0) AS type_task,
+                        COALESCE(SUM(total) FILTER (WHERE kind = 'agendamento'), 0) AS type_meeting,
+                        COALESCE(SUM(total) FILTER (WHERE kind = 'evento'), 0) AS type_reminder
+                    FROM t;
+                """, (start_date, start_date, end_date, start_date, end_date))
+                row = cur.fetchone()
+                return dict(zip([col[0] for col in cur.description], [int(v) for v in row]))
+        finally:
+            release_db_connection(conn)
+
+    def rebuild_task_daily_stats(self):
+        """Reconstrói task_daily_stats a partir de tasks. Retorna o número de linhas do rollup."""
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cur:
+                # Bloqueia escritas em tasks para que os gatilhos não concorram com a reconstrução
+                cur.execute("LOCK TABLE tasks IN SHARE MODE;")
+                cur.execute("SELECT rebuild_task_daily_stats();")
+                rows = cur.fetchone()[0]
+                conn.commit()
+                return rows
+        except Exception as e:
+            logging.error(f"Erro ao reconstruir estatísticas diárias: {e}")
+            if conn:
+                conn.rollback()
+            raise e
+        finally:
+            if conn:
+                release_db_connection(conn)
+
+    def ensure_task_partitions(self, start_date, end_date):
+        """Cria as partições mensais de tasks entre as duas datas e esvazia tasks_default.
+
+        Criar uma partição bloqueia a tabela tasks por um instante; por isso o job
+        diário as cria com antecedência. Retorna o número de partições criadas.
+        """
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT ensure_task_partitions(%s, %s);", (start_date, end_date))
+                created = cur.fetchone()[0]
+                conn.commit()
+                return created
+        except Exception as e:
+            logging.error(f"Erro ao criar partições de tarefas: {e}")
+            if conn:
+                conn.rollback()
+            return 0
+        finally:
+            if conn:
+                release_db_connection(conn)
+
+    def archive_task_partitions(self, before, tablespace=None, lock_timeout='5s'):
+        """Converte em partições de arquivo os meses de tasks encerrados antes de `before`
+        que não tenham mais tarefas pendentes.
+
+        Cada partição é reescrita sem espaço morto e congelada (VACUUM FULL, FREEZE),
+        com os índices reconstruídos, e opcionalmente movida com eles para `tablespace`
+        (ex.: um disco barato ou com compressão no sistema de arquivos; o PostgreSQL
+        não comprime o heap por conta própria). As partições arquivadas são registradas
+        em task_partitions_archived. As linhas continuam em
+        tasks: leituras, backups e exportações não mudam. A reescrita bloqueia só a
+        partição; se ela estiver em uso por mais de `lock_timeout`, fica para a
+        próxima execução. Retorna [(partição, bytes antes, bytes depois)].
+        """
+        conn = get_db_connection()
+        archived = []
+        try:
+            # VACUUM FULL não roda dentro de uma transação
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT c.relname, pg_total_relation_size(c.oid)
+                    FROM pg_inherits i
+                    JOIN pg_class c ON c.oid = i.inhrelid
+                    WHERE i.inhparent = 'tasks'::regclass
+                      AND CASE WHEN c.relname ~ '^tasks_[0-9]{4}_[0-9]{2}$'
+                               THEN (to_date(substr(c.relname, 7), 'YYYY_MM') + INTERVAL '1 month')::date <= %s
+                               ELSE FALSE END
+                      AND NOT EXISTS (SELECT 1 FROM task_partitions_archived a WHERE a.particao = c.relname)
+                    ORDER BY c.relname;
+                """, (before,))
+                candidates = cur.fetchall()
+                cur.execute("SELECT set_config('lock_timeout', %s, false);", (lock_timeout,))
+                for partition, size_before in candidates:
+                    # Mês com tarefas ainda pendentes continua em uso: fica para depois
+                    cur.execute(f"""SELECT EXISTS (SELECT 1 FROM "{partition}" WHERE COALESCE(status, 'pendente') = 'pendente');""")
+                    if cur.fetchone()[0]:
+                        logging.info(f"Partição {partition} tem tarefas pendentes; arquivamento adiado")
+                        continue
+                    try:
+                        cur.execute(f'VACUUM (FULL, FREEZE, ANALYZE) "{partition}";')
+                        if tablespace:
+                            target = psycopg2.extensions.quote_ident(tablespace, cur)
+                            cur.execute(f'ALTER TABLE "{partition}" SET TABLESPACE {target};')
+                            cur.execute("SELECT indexrelid::regclass::text FROM pg_index WHERE indrelid = %s::regclass;", (partition,))
+                            for (index,) in cur.fetchall():
+                                cur.execute(f"ALTER INDEX {index} SET TABLESPACE {target};")
+                        cur.execute("""
+                            INSERT INTO task_partitions_archived (particao, mes, tablespace, bytes_antes, bytes_depois)
+                            VALUES (%s, to_date(substr(%s, 7), 'YYYY_MM'), %s, %s, pg_total_relation_size(%s::regclass))
+                            ON CONFLICT (particao) DO UPDATE SET arquivada_em = NOW(), tablespace = EXCLUDED.tablespace,
+                                bytes_antes = EXCLUDED.bytes_antes, bytes_depois = EXCLUDED.bytes_depois
+                            RETURNING bytes_depois;
+                        """, (partition, partition, tablespace, size_before, partition))
+                        archived.append((partition, size_before, cur.fetchone()[0]))
+                    except psycopg2.errors.LockNotAvailable:
+                        logging.warning(f"Partição {partition} em uso; arquivamento adiado")
+            return archived
+        except Exception as e:
+            logging.error(f"Erro ao arquivar partições de tarefas: {e}")
+            return archived
         finally:
+            if conn:
+                # lock_timeout foi definido para a sessão: não pode voltar assim ao pool
+                try:
+                    with conn.cursor() as cur:
+                        cur.execute("RESET lock_timeout;")
+                except psycopg2.Error as e:
+                    logging.error(f"Erro ao restaurar lock_timeout: {e}")
+                conn.autocommit = False
+                release_db_connection(conn)
+
+    def _stream(self, query, params=None, itersize=None):
+        """Executa uma consulta em um cursor nomeado (no servidor) e gera as linhas sob demanda.
+
+        Apenas `itersize` linhas ficam na memória por vez. A conexão só volta ao pool
+        quando o gerador é esgotado ou fechado, então consuma-o por completo ou use
+        contextlib.closing.
+        """
+        conn = get_db_connection()
+        try:
+            with conn.cursor(name=f"agenda_stream_{uuid.uuid4().hex}") as cur:
+                cur.itersize = itersize or DB_CURSOR_ITERSIZE
+                cur.execute(query, params)
+                for row in cur:
+                    yield row
+        finally:
+            # Cursores nomeados vivem dentro de uma transação; encerrá-la antes de devolver
+            conn.rollback()
             release_db_connection(conn)
 
+    def get_all_tasks(self, itersize=None):
+        """Gerar todas as tarefas do banco de dados, da mais recente para a mais antiga."""
+        return self._stream(f"SELECT {TASK_COLUMNS} FROM tasks ORDER BY date DESC;", itersize=itersize)
+
     def add_evento(self, evento_data):
         conn = get_db_connection()
         try:
@@ -101,11 +541,26 @@ class AgendaRepository:
             if conn:
                 release_db_connection(conn)
 
-    def update_event(self, evento_id, evento_data):
-        """Atualizar um evento existente."""
+    def update_event(self, evento_id, evento_data, from_date=None):
+        """Atualizar um evento existente.
+
+        Com from_date, as ocorrências gravadas a partir dessa data são ajustadas na
+        mesma transação pela diferença entre os dias antigos e os novos: as dos dias
+        removidos são excluídas, as dos dias mantidos recebem a nova descrição e nome
+        (preservando o status) e os dias adicionados são gerados até materializado_ate.
+        Retorna {'removidas', 'atualizadas', 'inseridas'}.
+        """
         conn = get_db_connection()
         try:
             with conn.cursor() as cur:
+                cur.execute(
+                    "SELECT dias_semana FROM eventos WHERE id = %s FOR UPDATE;",
+                    (evento_id,)
+                )
+                row = cur.fetchone()
+                old_dias = set(row[0]) if row else set()
+                new_dias = evento_data['dias_semana']
+
                 cur.execute(
                     """
                     UPDATE eventos
@@ -115,11 +570,55 @@ class AgendaRepository:
                     (
                         evento_data['description'],
                         evento_data.get('nome'),
-                        evento_data['dias_semana'],
+                        new_dias,
                         evento_id
                     )
                 )
+
+                counts = {'removidas': 0, 'atualizadas': 0, 'inseridas': 0}
+                if from_date is not None:
+                    removed = sorted(old_dias - set(new_dias))
+                    added = sorted(set(new_dias) - old_dias)
+                    if removed:
+                        cur.execute(
+                            """
+                            DELETE FROM tasks
+                            WHERE evento_id = %s AND date >= %s AND dia_semana_pt(date) = ANY(%s);
+                            """,
+                            (evento_id, from_date, removed)
+                        )
+                        counts['removidas'] = cur.rowcount
+                    cur.execute(
+                        """
+                        UPDATE tasks
+                        SET description = %s, nome = %s, dias_evento = %s
+                        WHERE evento_id = %s AND date >= %s
+                          AND (description, nome, dias_evento) IS DISTINCT FROM (%s, %s, %s::varchar(3)[]);
+                        """,
+                        (evento_data['description'], evento_data.get('nome'), new_dias, evento_id, from_date,
+                         evento_data['description'], evento_data.get('nome'), new_dias)
+                    )
+                    counts['atualizadas'] = cur.rowcount
+                    if added:
+                        cur.execute(
+                            """
+                            INSERT INTO tasks (description, priority, nome, is_agendamento, is_evento, dias_evento, date, status, evento_id, user_id)
+                            SELECT e.description, NULL, e.nome, FALSE, TRUE, e.dias_semana, d::date, 'pendente', e.id, e.user_id
+                            FROM eventos e
+                            CROSS JOIN generate_series(
+                                GREATEST(%s::date, e.data_inicio)::timestamp,
+                                LEAST(e.materializado_ate, COALESCE(e.data_encerramento, e.materializado_ate))::timestamp,
+                                INTERVAL '1 day'
+                            ) AS d
+                            WHERE e.id = %s
+                              AND dia_semana_pt(d::date) = ANY(%s)
+                            ON CONFLICT (evento_id, date) DO NOTHING;
+                            """,
+                            (from_date, evento_id, added)
+                        )
+                        counts['inseridas'] = cur.rowcount
                 conn.commit()
+                return counts
         except Exception as e:
             logging.error(f"Erro ao atualizar evento: {e}")
             if conn:
@@ -134,11 +633,7 @@ class AgendaRepository:
         try:
             with conn.cursor() as cur:
                 # Buscar eventos ativos que não foram encerrados ou que foram encerrados após hoje
-                cur.execute("""
-                    SELECT * FROM eventos 
-                    WHERE ativo = TRUE 
-                    AND (data_encerramento IS NULL OR data_encerramento >= %s);
-                """, (datetime.today().date(),))
+                self._execute_prepared(conn, cur, 'agenda_eventos_ativos', (datetime.today().date(),))
                 eventos = cur.fetchall()
                 return eventos
         finally:
@@ -169,6 +664,11 @@ class AgendaRepository:
                     "DELETE FROM tasks WHERE evento_id = %s AND date >= %s;",
                     (evento_id, from_date)
                 )
+                # O job de horizonte volta a gerar a partir de from_date
+                cur.execute(
+                    "UPDATE eventos SET materializado_ate = LEAST(materializado_ate, %s::date - 1) WHERE id = %s;",
+                    (from_date, evento_id)
+                )
                 conn.commit()
         except Exception as e:
             logging.error(f"Erro ao deletar tarefas de evento futuro: {e}")
@@ -185,13 +685,13 @@ class AgendaRepository:
                 # Lógica para deletar baseado no conteúdo, já que a view não tem ID
                 if nome:
                     cur.execute(
-                        "DELETE FROM tasks WHERE date = %s AND description = %s AND nome = %s;",
-                        (date, description, nome)
+                        "DELETE FROM tasks WHERE date = %s AND md5(description) = md5(%s) AND description = %s AND nome = %s;",
+                        (date, description, description, nome)
                     )
                 else:
                     cur.execute(
-                        "DELETE FROM tasks WHERE date = %s AND description = %s AND nome IS NULL;",
-                        (date, description)
+                        "DELETE FROM tasks WHERE date = %s AND md5(description) = md5(%s) AND description = %s AND nome IS NULL;",
+                        (date, description, description)
                     )
                 conn.commit()
         except Exception as e:
@@ -203,14 +703,16 @@ class AgendaRepository:
                 release_db_connection(conn)
 
     def update_task(self, task_id, task_data):
+        """Atualiza descrição, prioridade e nome de uma tarefa. Retorna a linha atualizada."""
         conn = get_db_connection()
         try:
             with conn.cursor() as cur:
                 cur.execute(
-                    """
+                    f"""
                     UPDATE tasks
                     SET description = %s, priority = %s, nome = %s
-                    WHERE id = %s;
+                    WHERE id = %s
+                    RETURNING {TASK_COLUMNS};
                     """,
                     (
                         task_data['description'],
@@ -219,29 +721,53 @@ class AgendaRepository:
                         task_id
                     )
                 )
+                task = cur.fetchone()
                 conn.commit()
+                return task
         except Exception as e:
             logging.error(f"Erro ao atualizar tarefa: {e}")
             if conn:
                 conn.rollback()
+            return None
         finally:
             if conn:
                 release_db_connection(conn)
 
     def update_task_status(self, task_id, status):
-        """Atualiza o status de uma tarefa (ex: 'pendente', 'concluída')."""
+        """Atualiza o status de uma tarefa (ex: 'pendente', 'concluída'). Retorna a linha atualizada."""
         conn = get_db_connection()
         try:
             with conn.cursor() as cur:
                 cur.execute(
-                    "UPDATE tasks SET status = %s WHERE id = %s;",
+                    f"UPDATE tasks SET status = %s WHERE id = %s RETURNING {TASK_COLUMNS};",
                     (status, task_id)
                 )
+                task = cur.fetchone()
                 conn.commit()
+                return task
         except Exception as e:
             logging.error(f"Erro ao atualizar status da tarefa: {e}")
             if conn:
                 conn.rollback()
+            return None
+        finally:
+            if conn:
+                release_db_connection(conn)
+
+    def delete_task(self, task_id):
+        """Remove uma tarefa pelo ID. Retorna a linha removida."""
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(f"DELETE FROM tasks WHERE id = %s RETURNING {TASK_COLUMNS};", (task_id,))
+                task = cur.fetchone()
+                conn.commit()
+                return task
+        except Exception as e:
+            logging.error(f"Erro ao deletar tarefa: {e}")
+            if conn:
+                conn.rollback()
+            return None
         finally:
             if conn:
                 release_db_connection(conn)
@@ -252,63 +778,528 @@ class AgendaRepository:
         try:
             with conn.cursor() as cur:
                 if nome:
-                    cur.execute(
-                        "SELECT id FROM tasks WHERE date = %s AND description = %s AND nome = %s LIMIT 1;",
-                        (date, description, nome)
-                    )
+                    self._execute_prepared(conn, cur, 'agenda_find_task_id', (date, description, nome))
                 else:
-                    cur.execute(
-                        "SELECT id FROM tasks WHERE date = %s AND description = %s AND nome IS NULL LIMIT 1;",
-                        (date, description)
-                    )
+                    self._execute_prepared(conn, cur, 'agenda_find_task_id_sem_nome', (date, description))
                 result = cur.fetchone()
                 return result[0] if result else None
         finally:
             release_db_connection(conn)
 
-    def get_all_data(self):
-        """Busca todas as tarefas e eventos para exportação."""
+    def get_all_data(self, start_date=None, end_date=None, itersize=None):
+        """Busca todas as tarefas e eventos para exportação.
+
+        'tasks' é um gerador de dicts lido em streaming, opcionalmente limitado às
+        datas entre start_date e end_date (inclusive); 'eventos' é uma lista.
+        """
         conn = get_db_connection()
-        data = {'tasks': [], 'eventos': []}
+        data = {'tasks': None, 'eventos': []}
         try:
             with conn.cursor() as cur:
-                # Exportar tarefas
-                cur.execute("SELECT id, description, priority, nome, is_agendamento, is_evento, dias_evento, date, status, evento_id, user_id FROM tasks;")
-                tasks_db = cur.fetchall()
-                for t in tasks_db:
-                    data['tasks'].append({
-                        'id': t[0], 'description': t[1], 'priority': t[2], 'nome': t[3],
-                        'is_agendamento': t[4], 'is_evento': t[5], 'dias_evento': t[6],
-                        'date': t[7].strftime('%Y-%m-%d'), 'status': t[8], 'evento_id': t[9], 'user_id': t[10]
-                    })
-                
-                # Exportar eventos
-                cur.execute("SELECT id, description, nome, dias_semana, ativo, data_encerramento, user_id FROM eventos;")
+                # Exportar eventos (tabela pequena)
+                cur.execute(f"SELECT {BACKUP_EVENTO_COLUMNS} FROM eventos;")
                 eventos_db = cur.fetchall()
                 for e in eventos_db:
                     data['eventos'].append({
-                        'id': e[0], 'description': e[1], 'nome': e[2], 'dias_semana': e[3],
-                        'ativo': e[4], 'data_encerramento': e[5].strftime('%Y-%m-%d') if e[5] else None, 'user_id': e[6]
+                        'id': e[0], 'description': e[1], 'nome': e[2], 'dias_semana': e[3], 'ativo': e[4],
+                        'data_inicio': e[5].strftime('%Y-%m-%d') if e[5] else None,
+                        'data_encerramento': e[6].strftime('%Y-%m-%d') if e[6] else None, 'user_id': e[7]
                     })
-            return data
         finally:
             if conn:
                 release_db_connection(conn)
 
-    def create_backup(self, json_data):
-        """Salva um backup na tabela 'backups'."""
+        # Exportar tarefas sem carregar a tabela inteira
+        data['tasks'] = (
+            {
+                'id': t[0], 'description': t[1], 'priority': t[2], 'nome': t[3],
+                'is_agendamento': t[4], 'is_evento': t[5], 'dias_evento': t[6],
+                'date': t[7].strftime('%Y-%m-%d'), 'status': t[8], 'evento_id': t[9], 'user_id': t[10]
+            }
+            for t in self._stream(
+                f"SELECT {TASK_COLUMNS} FROM tasks WHERE {self._date_range_sql(start_date, end_date)} ORDER BY date, id;",
+                self._date_range_params(start_date, end_date),
+                itersize=itersize
+            )
+        )
+        return data
+
+    def count_tasks(self, start_date=None, end_date=None):
+        """Conta as tarefas entre start_date e end_date (inclusive); sem limites, conta todas."""
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(
+                    f"SELECT COUNT(*) FROM tasks WHERE {self._date_range_sql(start_date, end_date)};",
+                    self._date_range_params(start_date, end_date)
+                )
+                return cur.fetchone()[0]
+        finally:
+            release_db_connection(conn)
+
+    @staticmethod
+    def _date_range_sql(start_date, end_date):
+        conditions = ["TRUE"]
+        if start_date:
+            conditions.append("date >= %s")
+        if end_date:
+            conditions.append("date <= %s")
+        return " AND ".join(conditions)
+
+    @staticmethod
+    def _date_range_params(start_date, end_date):
+        return [d for d in (start_date, end_date) if d]
+
+    def create_backup(self, json_data, tipo='full', base_id=None, snapshot_at=None,
+                      content_hash=None, compressao=None, total_linhas=None):
+        """Salva um backup na tabela 'backups' e retorna seu id (None em caso de erro)."""
         conn = get_db_connection()
         try:
             with conn.cursor() as cur:
                 cur.execute(
-                    "INSERT INTO backups (user_id, arquivo) VALUES (%s, %s);",
-                    (1, json_data) # Hardcoded user_id 1
+                    """
+                    INSERT INTO backups (user_id, arquivo, tipo, base_id, snapshot_at, content_hash, compressao, total_linhas)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                    RETURNING id;
+                    """,
+                    (1, psycopg2.Binary(json_data), tipo, base_id, snapshot_at,  # Hardcoded user_id 1
+                     content_hash, compressao, total_linhas)
                 )
+                backup_id = cur.fetchone()[0]
                 conn.commit()
+                return backup_id
         except Exception as e:
             logging.error(f"Erro ao criar backup: {e}")
             if conn:
                 conn.rollback()
+            return None
+        finally:
+            if conn:
+                release_db_connection(conn)
+
+    @contextmanager
+    def backup_snapshot(self, since=None, itersize=None):
+        """Lê, em uma única transação REPEATABLE READ, os dados de um backup.
+
+        Sem `since`, traz todas as linhas; com `since`, apenas as alteradas ou
+        excluídas a partir desse instante. Fornece um dict com 'snapshot_at'
+        (início da transação), 'eventos' (lista), 'deleted' ({'tasks': [...],
+        'eventos': [...]}) e 'tasks' (iterador em streaming, válido apenas dentro
+        do bloco with). Linhas ordenadas por id, na ordem de BACKUP_*_COLUMNS.
+        """
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ;")
+                cur.execute("SELECT NOW();")
+                snapshot_at = cur.fetchone()[0]
+
+                where, params = ("TRUE", []) if since is None else ("updated_at >= %s", [since])
+                cur.execute(f"SELECT {BACKUP_EVENTO_COLUMNS} FROM eventos WHERE {where} ORDER BY id;", params)
+                eventos = cur.fetchall()
+
+                deleted = {'tasks': [], 'eventos': []}
+                if since is not None:
+                    cur.execute(
+                        "SELECT DISTINCT tabela, row_id FROM backup_tombstones WHERE deleted_at >= %s ORDER BY tabela, row_id;",
+                        (since,)
+                    )
+                    for tabela, row_id in cur.fetchall():
+                        deleted[tabela].append(row_id)
+
+            with conn.cursor(name=f"agenda_backup_{uuid.uuid4().hex}") as tasks_cur:
+                tasks_cur.itersize = itersize or DB_CURSOR_ITERSIZE
+                tasks_cur.execute(f"SELECT {TASK_COLUMNS} FROM tasks WHERE {where} ORDER BY id;", params)
+                yield {
+                    'snapshot_at': snapshot_at,
+                    'eventos': eventos,
+                    'deleted': deleted,
+                    'tasks': iter(tasks_cur),
+                }
+        finally:
+            conn.rollback()
+            release_db_connection(conn)
+
+    def get_latest_backup(self):
+        """Retorna (id, tipo, base_id, snapshot_at, content_hash, deltas desde a base) do
+        backup mais recente, ou None se não houver nenhum."""
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT b.id, b.tipo, b.base_id, b.snapshot_at, b.content_hash,
+                           (SELECT COUNT(*) FROM backups d WHERE d.base_id = COALESCE(b.base_id, b.id))
+                    FROM backups b
+                    ORDER BY b.id DESC
+                    LIMIT 1;
+                """)
+                return cur.fetchone()
+        finally:
+            release_db_connection(conn)
+
+    def list_backups(self):
+        """Lista os backups: (id, data_backup, tipo, base_id, compressao, total_linhas, tamanho em bytes)."""
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT id, data_backup, tipo, base_id, compressao, total_linhas, octet_length(arquivo)
+                    FROM backups
+                    ORDER BY id;
+                """)
+                return cur.fetchall()
+        finally:
+            release_db_connection(conn)
+
+    def get_backup_chain(self, backup_id):
+        """Retorna a cadeia (id, tipo, compressao, arquivo) necessária para restaurar
+        backup_id: sua base seguida dos deltas até ele, em ordem."""
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    WITH alvo AS (
+                        SELECT id, COALESCE(base_id, id) AS base FROM backups WHERE id = %s
+                    )
+                    SELECT b.id, b.tipo, b.compressao, b.arquivo
+                    FROM backups b, alvo
+                    WHERE b.id = alvo.base
+                       OR (b.base_id = alvo.base AND b.id <= alvo.id)
+                    ORDER BY b.id;
+                """, (backup_id,))
+                return [(r[0], r[1], r[2], bytes(r[3])) for r in cur.fetchall()]
+        finally:
+            release_db_connection(conn)
+
+    def prune_backups(self, keep_chains):
+        """Mantém apenas as `keep_chains` cadeias mais recentes (os deltas caem junto com a
+        base via ON DELETE CASCADE) e descarta as exclusões registradas antes da base mais
+        recente. Retorna o número de backups removidos."""
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    WITH manter AS (
+                        SELECT id FROM backups WHERE tipo = 'full' ORDER BY id DESC LIMIT %s
+                    )
+                    DELETE FROM backups
+                    WHERE tipo = 'full' AND id NOT IN (SELECT id FROM manter);
+                """, (keep_chains,))
+                removed = cur.rowcount
+                cur.execute("""
+                    DELETE FROM backup_tombstones
+                    WHERE deleted_at < (
+                        SELECT snapshot_at FROM backups
+                        WHERE tipo = 'full' AND snapshot_at IS NOT NULL
+                        ORDER BY id DESC LIMIT 1
+                    ) - INTERVAL '1 day';
+                """)
+                conn.commit()
+                return removed
+        except Exception as e:
+            logging.error(f"Erro ao remover backups antigos: {e}")
+            if conn:
+                conn.rollback()
+            return 0
+        finally:
+            if conn:
+                release_db_connection(conn)
+
+    def restore_backup_rows(self, steps):
+        """Substitui tasks e eventos pelo estado de um backup, em uma única transação.
+
+        `steps` é a sequência base + deltas, cada um um dict com 'tipo', 'eventos',
+        'tasks' (linhas na ordem de BACKUP_EVENTO_COLUMNS e TASK_COLUMNS) e 'deleted'.
+        A base substitui todo o conteúdo; cada delta aplica as exclusões e depois
+        grava as linhas: uma tarefa que mudou de mês trocou de partição e aparece
+        nas duas listas. Retorna True se a restauração foi concluída.
+        """
+        evento_updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in BACKUP_EVENTO_COLUMNS.split(", ")[1:])
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cur:
+                cur.execute("LOCK TABLE tasks, eventos IN EXCLUSIVE MODE;")
+                for step in steps:
+                    if step['tipo'] == 'full':
+                        cur.execute("DELETE FROM tasks;")
+                        cur.execute("DELETE FROM eventos;")
+                    deleted = step.get('deleted') or {}
+                    if deleted.get('tasks'):
+                        cur.execute("DELETE FROM tasks t USING unnest(%s::int[]) AS d(id) WHERE t.id = d.id;", (deleted['tasks'],))
+                    if deleted.get('eventos'):
+                        cur.execute("DELETE FROM eventos WHERE id = ANY(%s);", (deleted['eventos'],))
+                    if step['eventos']:
+                        execute_values(cur, f"""
+                            INSERT INTO eventos ({BACKUP_EVENTO_COLUMNS}) VALUES %s
+                            ON CONFLICT (id) DO UPDATE SET {evento_updates};
+                        """, step['eventos'], page_size=1000)
+                    if step['tasks']:
+                        # A chave de tasks é (id, date): sem ON CONFLICT (id), a versão
+                        # atual sai antes (em qualquer partição) e a do backup entra.
+                        # Os ids vão em unnest: um "id = ANY(array)" seria copiado no
+                        # plano de cada partição e, com muitos ids, esgota a memória.
+                        # Na base completa a tabela já foi esvaziada.
+                        if step['tipo'] != 'full':
+                            cur.execute("SET LOCAL agenda.skip_tombstones = on;")
+                            cur.execute("DELETE FROM tasks t USING unnest(%s::int[]) AS d(id) WHERE t.id = d.id;",
+                                        ([row[0] for row in step['tasks']],))
+                            cur.execute("SET LOCAL agenda.skip_tombstones = off;")
+                        execute_values(cur, f"INSERT INTO tasks ({TASK_COLUMNS}) VALUES %s;", step['tasks'], page_size=1000)
+
+                # Datas sem partição caíram em tasks_default; move-as para partições mensais
+                cur.execute("SELECT ensure_task_partitions(NULL, NULL);")
+                # Os ids vieram do backup; as sequências precisam continuar depois deles
+                cur.execute("SELECT setval(pg_get_serial_sequence('tasks', 'id'), COALESCE(MAX(id), 0) + 1, false) FROM tasks;")
+                cur.execute("SELECT setval(pg_get_serial_sequence('eventos', 'id'), COALESCE(MAX(id), 0) + 1, false) FROM eventos;")
+                conn.commit()
+                return True
+        except Exception as e:
+            logging.error(f"Erro ao restaurar backup: {e}")
+            if conn:
+                conn.rollback()
+            return False
+        finally:
+            if conn:
+                release_db_connection(conn)
+
+    # Tabelas do snapshot binário, na ordem de restauração (respeita as chaves estrangeiras)
+    SNAPSHOT_TABLES = ('users', 'eventos', 'tasks')
+
+    def _copy_columns(self, cur, table):
+        """Colunas graváveis da tabela (sem as geradas), como [(nome, tipo)]."""
+        cur.execute("""
+            SELECT attname, format_type(atttypid, atttypmod)
+            FROM pg_attribute
+            WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped AND attgenerated = ''
+            ORDER BY attnum;
+        """, (table,))
+        return [(name, type_) for name, type_ in cur.fetchall()]
+
+    def copy_tables_to(self, targets):
+        """Copia as tabelas com COPY (SELECT ...) TO STDOUT (FORMAT binary), todas no mesmo snapshot.
+
+        A forma com SELECT também lê tabelas particionadas (tasks), que COPY tabela TO recusa.
+
+        `targets` mapeia nome da tabela -> arquivo binário aberto para escrita.
+        Retorna nome da tabela -> [(coluna, tipo)] na ordem gravada, necessário
+        para restaurar o formato binário.
+        """
+        conn = get_db_connection()
+        try:
+            columns = {}
+            with conn.cursor() as cur:
+                cur.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY;")
+                for table, f in targets.items():
+                    columns[table] = self._copy_columns(cur, table)
+                    column_list = ", ".join(name for name, _ in columns[table])
+                    cur.copy_expert(f"COPY (SELECT {column_list} FROM {table}) TO STDOUT (FORMAT binary);", f)
+            return columns
+        finally:
+            conn.rollback()
+            release_db_connection(conn)
+
+    def restore_tables_from(self, sources, columns):
+        """Restaura users, eventos e tasks a partir de arquivos COPY binários, em uma transação.
+
+        Cada tabela é carregada com COPY FROM em uma tabela temporária e só depois
+        trocada pelo conteúdo atual: eventos e tasks são substituídos por inteiro;
+        users recebe upsert (apagar usuários levaria junto os backups em cascata).
+        `columns` é o retorno de copy_tables_to e precisa coincidir com o esquema atual.
+        Retorna nome da tabela -> linhas restauradas.
+        """
+        conn = get_db_connection()
+        try:
+            counts = {}
+            names = {}
+            with conn.cursor() as cur:
+                for table in self.SNAPSHOT_TABLES:
+                    if table not in sources:
+                        continue
+                    current = self._copy_columns(cur, table)
+                    if [tuple(c) for c in columns[table]] != current:
+                        raise ValueError(f"O snapshot de '{table}' foi gerado com outro esquema do banco.")
+                    names[table] = [name for name, _ in current]
+                    column_list = ", ".join(names[table])
+                    cur.execute(f"CREATE TEMP TABLE stg_{table} (LIKE {table}) ON COMMIT DROP;")
+                    cur.copy_expert(f"COPY stg_{table} ({column_list}) FROM STDIN (FORMAT binary);", sources[table])
+                    cur.execute(f"SELECT COUNT(*) FROM stg_{table};")
+                    counts[table] = cur.fetchone()[0]
+
+                # Troca: a partir daqui nenhuma escrita concorrente enxerga um estado parcial
+                cur.execute("LOCK TABLE users, eventos, tasks IN ACCESS EXCLUSIVE MODE;")
+
+                if 'users' in counts:
+                    updates = ", ".join(f"{n} = EXCLUDED.{n}" for n in names['users'] if n != 'id')
+                    cur.execute(f"""
+                        INSERT INTO users ({", ".join(names['users'])})
+                        SELECT {", ".join(names['users'])} FROM stg_users
+                        ON CONFLICT (id) DO UPDATE SET {updates};
+                    """)
+
+                # Exclusões em relação ao snapshot viram tombstones, para o próximo backup incremental
+                for table in ('tasks', 'eventos'):
+                    if table in counts:
+                        cur.execute(f"""
+                            INSERT INTO backup_tombstones (tabela, row_id)
+                            SELECT '{table}', t.id FROM {table} t
+                            WHERE NOT EXISTS (SELECT 1 FROM stg_{table} s WHERE s.id = t.id);
+                        """)
+
+                swapped = [t for t in ('tasks', 'eventos') if t in counts]
+                if swapped:
+                    cur.execute(f"TRUNCATE {', '.join(swapped)};")
+                if 'tasks' in counts:
+                    # Partições para as datas do snapshot antes da carga (nada passa por tasks_default)
+                    cur.execute("SELECT ensure_task_partitions(MIN(date), MAX(date)) FROM stg_tasks;")
+                # Sem o rollup por linha na carga; ele é reconstruído de uma vez abaixo
+                cur.execute("SET LOCAL agenda.skip_task_stats = on;")
+                for table in ('eventos', 'tasks'):
+                    if table not in counts:
+                        continue
+                    # updated_at = NOW(): as linhas restauradas entram no próximo delta
+                    select_list = ", ".join("NOW()" if n == 'updated_at' else n for n in names[table])
+                    cur.execute(f"INSERT INTO {table} ({', '.join(names[table])}) SELECT {select_list} FROM stg_{table};")
+                cur.execute("SET LOCAL agenda.skip_task_stats = off;")
+
+                if 'tasks' in counts:
+                    cur.execute("SELECT rebuild_task_daily_stats();")
+                for table in counts:
+                    cur.execute(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE(MAX(id), 0) + 1, false) FROM {table};")
+                conn.commit()
+                return counts
+        except Exception as e:
+            logging.error(f"Erro ao restaurar snapshot: {e}")
+            if conn:
+                conn.rollback()
+            raise e
+        finally:
+            if conn:
+                release_db_connection(conn)
+
+    # Colunas de stg_import, na ordem gerada por services.import_service
+    IMPORT_COLUMNS = ("kind", "src_id", "description", "priority", "nome", "is_agendamento", "is_evento",
+                      "dias", "date", "status", "evento_src_id", "ativo", "data_inicio", "data_encerramento")
+
+    def bulk_import(self, stream, user_id=1, skip_duplicates=True):
+        """Importa eventos e tarefas em massa, em uma única transação.
+
+        `stream` é um arquivo (ou objeto com read) no formato texto do COPY, com as
+        colunas de IMPORT_COLUMNS: kind é 'evento' ou 'task'; dias guarda dias_semana
+        dos eventos e dias_evento das tarefas. Tudo vai por COPY para uma tabela
+        temporária e depois é mesclado: eventos idênticos (descrição, nome e dias) já
+        existentes são reaproveitados, os demais recebem ids novos, e o evento_id das
+        tarefas é remapeado para esses ids. Com skip_duplicates, tarefas com mesma
+        data, descrição e nome de uma já existente são ignoradas.
+        Retorna um dict com os contadores da mesclagem.
+        """
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    CREATE TEMP TABLE stg_import (
+                        kind VARCHAR(10) NOT NULL,
+                        src_id INTEGER,
+                        description TEXT NOT NULL,
+                        priority VARCHAR(20),
+                        nome VARCHAR(100),
+                        is_agendamento BOOLEAN,
+                        is_evento BOOLEAN,
+                        dias VARCHAR(3)[],
+                        date DATE,
+                        status VARCHAR(20),
+                        evento_src_id INTEGER,
+                        ativo BOOLEAN,
+                        data_inicio DATE,
+                        data_encerramento DATE,
+                        new_id INTEGER
+                    ) ON COMMIT DROP;
+                """)
+                cur.copy_expert(f"COPY stg_import ({', '.join(self.IMPORT_COLUMNS)}) FROM STDIN;", stream)
+
+                # Eventos: reaproveitar os idênticos, reservar ids para os novos
+                cur.execute("""
+                    UPDATE stg_import s
+                    SET new_id = (
+                        SELECT e.id FROM eventos e
+                        WHERE e.description = s.description
+                          AND e.nome IS NOT DISTINCT FROM s.nome
+                          AND e.dias_semana = s.dias
+                        ORDER BY e.id LIMIT 1
+                    )
+                    WHERE s.kind = 'evento';
+                """)
+                cur.execute("SELECT COUNT(*) FROM stg_import WHERE kind = 'evento' AND new_id IS NOT NULL;")
+                eventos_reused = cur.fetchone()[0]
+                cur.execute("""
+                    UPDATE stg_import
+                    SET new_id = nextval(pg_get_serial_sequence('eventos', 'id'))
+                    WHERE kind = 'evento' AND new_id IS NULL;
+                """)
+                cur.execute("""
+                    INSERT INTO eventos (id, description, nome, dias_semana, ativo, data_inicio, data_encerramento, user_id)
+                    SELECT s.new_id, s.description, s.nome, s.dias, COALESCE(s.ativo, TRUE),
+                           COALESCE(s.data_inicio, CURRENT_DATE), s.data_encerramento, %s
+                    FROM stg_import s
+                    WHERE s.kind = 'evento'
+                      AND NOT EXISTS (SELECT 1 FROM eventos e WHERE e.id = s.new_id);
+                """, (user_id,))
+                eventos_inserted = cur.rowcount
+
+                # Partições para as datas importadas antes da carga (histórico antigo não passa por tasks_default)
+                cur.execute("SELECT ensure_task_partitions(MIN(date), MAX(date)) FROM stg_import WHERE kind = 'task';")
+
+                # Tarefas: o rollup diário é somado uma vez por grupo, não por linha
+                cur.execute("SET LOCAL agenda.skip_task_stats = on;")
+                duplicate_sql = """
+                      AND NOT EXISTS (
+                          SELECT 1 FROM tasks t
+                          WHERE t.date = s.date AND md5(t.description) = md5(s.description)
+                            AND t.description = s.description
+                            AND t.nome IS NOT DISTINCT FROM s.nome
+                      )
+                """ if skip_duplicates else ""
+                cur.execute(f"""
+                    WITH inserted AS (
+                        INSERT INTO tasks (description, priority, nome, is_agendamento, is_evento,
+                                           dias_evento, date, status, evento_id, user_id)
+                        SELECT s.description, s.priority, s.nome, COALESCE(s.is_agendamento, FALSE),
+                               COALESCE(s.is_evento, FALSE), s.dias, s.date, COALESCE(s.status, 'pendente'),
+                               ev.new_id, %s
+                        FROM stg_import s
+                        LEFT JOIN stg_import ev ON ev.kind = 'evento' AND ev.src_id = s.evento_src_id
+                        WHERE s.kind = 'task'
+                        {duplicate_sql}
+                        ON CONFLICT DO NOTHING
+                        RETURNING user_id, date, is_agendamento, is_evento, priority, status
+                    ),
+                    stats AS (
+                        INSERT INTO task_daily_stats (user_id, date, kind, priority, status, total)
+                        SELECT COALESCE(user_id, 0), date, task_kind(is_agendamento, is_evento),
+                               COALESCE(priority, ''), COALESCE(status, 'pendente'), COUNT(*)
+                        FROM inserted
+                        GROUP BY 1, 2, 3, 4, 5
+                        ON CONFLICT (user_id, date, kind, priority, status)
+                        DO UPDATE SET total = task_daily_stats.total + EXCLUDED.total
+                    )
+                    SELECT COUNT(*) FROM inserted;
+                """, (user_id,))
+                tasks_inserted = cur.fetchone()[0]
+                cur.execute("SET LOCAL agenda.skip_task_stats = off;")
+
+                cur.execute("SELECT COUNT(*) FROM stg_import WHERE kind = 'task';")
+                tasks_total = cur.fetchone()[0]
+                conn.commit()
+                return {
+                    'eventos_inseridos': eventos_inserted,
+                    'eventos_reaproveitados': eventos_reused,
+                    'tarefas_inseridas': tasks_inserted,
+                    'tarefas_ignoradas': tasks_total - tasks_inserted,
+                }
+        except Exception as e:
+            logging.error(f"Erro ao importar dados: {e}")
+            if conn:
+                conn.rollback()
+            raise e
         finally:
             if conn:
                 release_db_connection(conn)
@@ -321,10 +1312,11 @@ class AgendaRepository:
                 query_conditions = []
                 params = []
 
-                # Filtro por nome (busca textual)
+                # Filtro por nome (busca textual em descrição e nome, atendida pelos índices trigram)
                 if filters.get('nome'):
-                    query_conditions.append("description ILIKE %s")
-                    params.append(f"%{filters['nome']}%")
+                    pattern = self._like_pattern(filters['nome'])
+                    query_conditions.append("(description ILIKE %s OR nome ILIKE %s)")
+                    params.extend([pattern, pattern])
                 else:
                     # Se não houver busca por nome, filtra pela data selecionada
                     query_conditions.append("date = %s")
@@ -352,11 +1344,22 @@ class AgendaRepository:
                     elif tipo_filter == 'Evento':
                         query_conditions.append("is_evento = TRUE")
 
+                # Consultas por data também enxergam as ocorrências virtuais de eventos
+                if filters.get('nome'):
+                    source = "tasks"
+                else:
+                    source = f"""(
+                        SELECT {TASK_COLUMNS} FROM tasks WHERE date = %s
+                        UNION ALL
+                        SELECT * FROM ocorrencias_eventos(%s::date, %s::date)
+                    ) AS tasks"""
+                    params = [date, date, date] + params
+
                 # Constrói a query final
                 if not query_conditions:
                     # Fallback para buscar todas as tarefas do dia se nenhum filtro for válido
-                    base_query = """
-                        SELECT * FROM tasks WHERE date = %s 
+                    base_query = f"""
+                        SELECT * FROM {source} WHERE date = %s 
                         AND (
                             (is_evento = FALSE AND is_agendamento = FALSE) OR
                             (is_agendamento = TRUE AND status = 'pendente') OR
@@ -365,9 +1368,9 @@ class AgendaRepository:
                             (is_evento = TRUE AND status = 'concluída' AND date = %s)
                         );
                     """
-                    params = [date, date, date]
+                    params = params + [date, date, date]
                 else:
-                    base_query = "SELECT * FROM tasks WHERE " + " AND ".join(query_conditions) + ";"
+                    base_query = f"SELECT * FROM {source} WHERE " + " AND ".join(query_conditions) + ";"
                 
                 cur.execute(base_query, tuple(params))
                 tasks = cur.fetchall()
@@ -375,28 +1378,163 @@ class AgendaRepository:
         finally:
             release_db_connection(conn)
 
-    def get_upcoming_schedules(self):
-        """Busca agendamentos pendentes que ocorrerão nas próximas 24 horas."""
+    def search_tasks(self, term, limit=50, cursor=None, kinds=None, statuses=None, priorities=None):
+        """Busca global por texto em todas as datas, ordenada por relevância.
+
+        Usa a coluna search_vector (português, sem acentos) e o índice GIN. Cada
+        palavra digitada é tratada como prefixo. Se o termo só tiver stopwords (ex.:
+        "de", "para"), a consulta de texto ficaria vazia: nesse caso a busca é por
+        ILIKE em descrição e nome (índices trigram), sem relevância. A paginação é por
+        keyset: passe como `cursor` o valor retornado pela página anterior. Retorna
+        (linhas, próximo cursor ou None).
+        """
+        if not term.strip():
+            return [], None
+        words = re.findall(r"[^\W_]+", term)
+        tsquery = " & ".join(f"{word}:*" for word in words)
+
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cur:
+                use_text_search = False
+                if words:
+                    cur.execute("SELECT numnode(to_tsquery('agenda_pt', %s));", (tsquery,))
+                    use_text_search = cur.fetchone()[0] > 0
+
+                if use_text_search:
+                    source = "tasks t, to_tsquery('agenda_pt', %s) AS q(query)"
+                    rank = "ts_rank(t.search_vector, q.query)"
+                    conditions = ["t.search_vector @@ q.query"]
+                    params = [tsquery]
+                else:
+                    pattern = self._like_pattern(term.strip())
+                    source = "tasks t"
+                    rank = "0::real"
+                    conditions = ["(t.description ILIKE %s OR t.nome ILIKE %s)"]
+                    params = [pattern, pattern]
+                if cursor:
+                    conditions.append(f"({rank}, t.id) < (%s::real, %s)")
+                    params.extend(cursor)
+                if kinds:
+                    conditions.append("(" + " OR ".join(KIND_SQL[k] for k in kinds) + ")")
+                if statuses:
+                    conditions.append("t.status = ANY(%s)")
+                    params.append(list(statuses))
+                if priorities:
+                    conditions.append("t.priority = ANY(%s)")
+                    params.append(list(priorities))
+                params.append(limit)
+
+                cur.execute(f"""
+                    SELECT {", ".join("t." + c for c in TASK_COLUMNS.split(", "))}, {rank} AS rank
+                    FROM {source}
+                    WHERE {" AND ".join(conditions)}
+                    ORDER BY rank DESC, t.id DESC
+                    LIMIT %s;
+                """, tuple(params))
+                rows = cur.fetchall()
+                next_cursor = (rows[-1][-1], rows[-1][0]) if len(rows) == limit else None
+                return [row[:-1] for row in rows], next_cursor
+        finally:
+            release_db_connection(conn)
+
+    @staticmethod
+    def _like_pattern(term):
+        """Monta o padrão '%termo%' escapando os curingas do LIKE digitados pelo usuário."""
+        escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        return f"%{escaped}%"
+
+    def get_upcoming_schedules(self, days=1):
+        """Busca agendamentos pendentes de hoje até `days` dias à frente (padrão: próximas 24 horas)."""
         conn = get_db_connection()
         try:
             with conn.cursor() as cur:
                 now = datetime.now()
-                tomorrow_24h = now + timedelta(days=1)
+                until = now + timedelta(days=days)
                 
-                query = """
-                    SELECT id, description, nome, date FROM tasks
-                    WHERE is_agendamento = TRUE
-                      AND status = 'pendente'
-                      AND date >= %s AND date <= %s
-                    ORDER BY date;
-                """
-                cur.execute(query, (now.date(), tomorrow_24h.date()))
+                self._execute_prepared(conn, cur, 'agenda_upcoming_schedules', (now.date(), until.date()))
                 schedules = cur.fetchall()
                 return schedules
         finally:
             if conn:
                 release_db_connection(conn)
 
+    def get_unnotified_schedules(self, reminder_kind, days=1):
+        """Como get_upcoming_schedules, mas sem os agendamentos já notificados com esse lembrete.
+
+        Um agendamento cuja data mudou depois do aviso volta a aparecer.
+        """
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cur:
+                now = datetime.now()
+                cur.execute("""
+                    SELECT t.id, t.description, t.nome, t.date FROM tasks t
+                    WHERE t.is_agendamento = TRUE
+                      AND t.status = 'pendente'
+                      AND t.date >= %s AND t.date <= %s
+                      AND NOT EXISTS (
+                          SELECT 1 FROM notification_log n
+                          WHERE n.task_id = t.id AND n.reminder_kind = %s AND n.task_date = t.date
+                      )
+                    ORDER BY t.date;
+                """, (now.date(), (now + timedelta(days=days)).date(), reminder_kind))
+                return cur.fetchall()
+        finally:
+            release_db_connection(conn)
+
+    def claim_notifications(self, reminder_kind, items, instance=None):
+        """Reivindica os lembretes antes do envio. `items` é [(task_id, date)].
+
+        Uma única instrução INSERT ... ON CONFLICT: entre várias instâncias, só uma
+        recebe cada task_id de volta. Um registro existente só é retomado se a data do
+        agendamento mudou desde o aviso. Retorna o conjunto de task_ids reivindicados.
+        """
+        if not items:
+            return set()
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cur:
+                rows = execute_values(cur, """
+                    INSERT INTO notification_log (task_id, reminder_kind, task_date, instancia)
+                    VALUES %s
+                    ON CONFLICT (task_id, reminder_kind) DO UPDATE
+                        SET task_date = EXCLUDED.task_date, notified_at = NOW(), instancia = EXCLUDED.instancia
+                        WHERE notification_log.task_date <> EXCLUDED.task_date
+                    RETURNING task_id;
+                """, [(task_id, reminder_kind, date, instance) for task_id, date in items], fetch=True)
+                conn.commit()
+                return {row[0] for row in rows}
+        except Exception as e:
+            logging.error(f"Erro ao registrar notificações: {e}")
+            if conn:
+                conn.rollback()
+            return set()
+        finally:
+            if conn:
+                release_db_connection(conn)
+
+    def prune_notification_log(self, keep_days):
+        """Remove os registros de lembretes de agendamentos com mais de `keep_days` dias."""
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "DELETE FROM notification_log WHERE task_date < %s;",
+                    (datetime.today().date() - timedelta(days=keep_days),)
+                )
+                removed = cur.rowcount
+                conn.commit()
+                return removed
+        except Exception as e:
+            logging.error(f"Erro ao limpar o registro de notificações: {e}")
+            if conn:
+                conn.rollback()
+            return 0
+        finally:
+            if conn:
+                release_db_connection(conn)
+
     def get_upcoming_appointments(self, days=15):
         """Busca agendamentos pendentes para os próximos X dias."""
         conn = get_db_connection()
@@ -461,13 +1599,53 @@ class AgendaRepository:
         try:
             with conn.cursor() as cur:
                 cur.execute(
-                    "SELECT * FROM tasks WHERE date = %s AND is_evento = TRUE ORDER BY id;",
-                    (date,)
+                    f"""
+                    SELECT t.* FROM (
+                        SELECT {TASK_COLUMNS} FROM tasks WHERE date = %s AND is_evento = TRUE
+                        UNION ALL
+                        SELECT * FROM ocorrencias_eventos(%s::date, %s::date)
+                    ) t
+                    WHERE t.status <> 'cancelada'
+                    ORDER BY t.id NULLS LAST, t.evento_id;
+                    """,
+                    (date, date, date)
                 )
                 return cur.fetchall()
         finally:
             release_db_connection(conn)
 
+    def set_event_occurrence_status(self, evento_id, date, status):
+        """Grava a exceção de uma ocorrência de evento com o status informado.
+
+        Se a ocorrência ainda é virtual, ela é materializada a partir do evento;
+        se já existe, apenas o status é atualizado. Retorna a linha gravada.
+        """
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(
+                    f"""
+                    INSERT INTO tasks (description, priority, nome, is_agendamento, is_evento, dias_evento, date, status, evento_id, user_id)
+                    SELECT e.description, NULL, e.nome, FALSE, TRUE, e.dias_semana, %s::date, %s, e.id, e.user_id
+                    FROM eventos e
+                    WHERE e.id = %s
+                    ON CONFLICT (evento_id, date) DO UPDATE SET status = EXCLUDED.status
+                    RETURNING {TASK_COLUMNS};
+                    """,
+                    (date, status, evento_id)
+                )
+                task = cur.fetchone()
+                conn.commit()
+                return task
+        except Exception as e:
+            logging.error(f"Erro ao gravar ocorrência de evento: {e}")
+            if conn:
+                conn.rollback()
+            return None
+        finally:
+            if conn:
+                release_db_connection(conn)
+
     def get_task_by_id(self, task_id):
         """Busca uma tarefa específica pelo ID."""
         conn = get_db_connection()
@@ -486,12 +1664,12 @@ class AgendaRepository:
             with conn.cursor() as cur:
                 if nome:
                     cur.execute(
-                        "SELECT * FROM eventos WHERE description = %s AND nome = %s LIMIT 1;",
+                        f"SELECT {EVENTO_COLUMNS} FROM eventos WHERE description = %s AND nome = %s LIMIT 1;",
                         (description, nome)
                     )
                 else:
                     cur.execute(
-                        "SELECT * FROM eventos WHERE description = %s AND nome IS NULL LIMIT 1;",
+                        f"SELECT {EVENTO_COLUMNS} FROM eventos WHERE description = %s AND nome IS NULL LIMIT 1;",
                         (description,)
                     )
                 result = cur.fetchone()
@@ -541,33 +1719,88 @@ class AgendaRepository:
             if conn:
                 release_db_connection(conn)
 
-    def cleanup_old_event_tasks(self):
-        """Limpar tarefas antigas de eventos encerrados."""
+    def get_closed_evento_ids(self, before):
+        """Ids dos eventos desativados com data de encerramento anterior a `before`."""
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "SELECT id FROM eventos WHERE ativo = FALSE AND data_encerramento < %s ORDER BY id;",
+                    (before,)
+                )
+                return [row[0] for row in cur.fetchall()]
+        finally:
+            release_db_connection(conn)
+
+    def delete_event_tasks_batch(self, evento_id, after_date=None, limit=1000):
+        """Remove até `limit` tarefas do evento com data posterior a `after_date`, em ordem de data.
+
+        Cada lote é uma transação curta que percorre o índice (evento_id, date) a partir
+        do cursor, então o custo e os locks são proporcionais ao lote, não ao histórico.
+        Retorna (removidas, última data do lote); a data é None quando não há mais
+        tarefas e serve de `after_date` para o próximo lote.
+        """
         conn = get_db_connection()
         try:
             with conn.cursor() as cur:
-                # Remover tarefas de eventos que foram encerrados antes de hoje
                 cur.execute("""
-                    DELETE FROM tasks 
-                    WHERE is_evento = TRUE 
-                    AND evento_id IN (
-                        SELECT id FROM eventos 
-                        WHERE ativo = FALSE 
-                        AND data_encerramento < %s
-                    );
-                """, (datetime.today().date(),))
-                deleted_count = cur.rowcount
+                    WITH lote AS (
+                        SELECT id, date FROM tasks
+                        WHERE evento_id = %s AND is_evento = TRUE AND date > %s
+                        ORDER BY date
+                        LIMIT %s
+                    ),
+                    removidas AS (
+                        DELETE FROM tasks t
+                        USING lote
+                        WHERE t.id = lote.id AND t.date = lote.date
+                        RETURNING 1
+                    )
+                    SELECT (SELECT COUNT(*) FROM removidas), (SELECT MAX(date) FROM lote);
+                """, (evento_id, after_date or datetime.min.date(), limit))
+                deleted, last_date = cur.fetchone()
                 conn.commit()
-                return deleted_count
+                return deleted, last_date
         except Exception as e:
-            logging.error(f"Erro ao limpar tarefas antigas de eventos: {e}")
+            logging.error(f"Erro ao remover lote de tarefas do evento {evento_id}: {e}")
             if conn:
                 conn.rollback()
-            return 0
+            raise e
         finally:
             if conn:
                 release_db_connection(conn)
 
+    def analyze_tables(self, tables):
+        """Atualiza as estatísticas do planejador depois de uma remoção grande."""
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cur:
+                for table in tables:
+                    cur.execute(f"ANALYZE {table};")
+                conn.commit()
+        except Exception as e:
+            logging.error(f"Erro ao analisar tabelas: {e}")
+            if conn:
+                conn.rollback()
+        finally:
+            if conn:
+                release_db_connection(conn)
+
+    def cleanup_old_event_tasks(self, batch_size=1000):
+        """Limpar tarefas antigas de eventos encerrados, em lotes. Retorna o total removido."""
+        deleted_count = 0
+        try:
+            for evento_id in self.get_closed_evento_ids(datetime.today().date()):
+                last_date = None
+                while True:
+                    deleted, last_date = self.delete_event_tasks_batch(evento_id, last_date, batch_size)
+                    deleted_count += deleted
+                    if last_date is None:
+                        break
+        except Exception as e:
+            logging.error(f"Erro ao limpar tarefas antigas de eventos: {e}")
+        return deleted_count
+
     def is_item_completed_today(self, description, nome, date):
         """Verifica se um item foi concluído no dia especificado."""
         conn = get_db_connection()
@@ -575,13 +1808,13 @@ class AgendaRepository:
             with conn.cursor() as cur:
                 if nome:
                     cur.execute(
-                        "SELECT status FROM tasks WHERE description = %s AND nome = %s AND date = %s LIMIT 1;",
-                        (description, nome, date)
+                        "SELECT status FROM tasks WHERE date = %s AND md5(description) = md5(%s) AND description = %s AND nome = %s LIMIT 1;",
+                        (date, description, description, nome)
                     )
                 else:
                     cur.execute(
-                        "SELECT status FROM tasks WHERE description = %s AND nome IS NULL AND date = %s LIMIT 1;",
-                        (description, date)
+                        "SELECT status FROM tasks WHERE date = %s AND md5(description) = md5(%s) AND description = %s AND nome IS NULL LIMIT 1;",
+                        (date, description, description)
                     )
                 result = cur.fetchone()
                 return result[0] == 'concluída' if result else False
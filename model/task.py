@@ -9,5 +9,6 @@ class Task:
         self.dias_evento = dias_evento or []
         self.status = status
         self.id = None
+        self.evento_id = None  # Evento de origem, para ocorrências de eventos
         self.date = date
         self.deadline = deadline  # Data limite da tarefa
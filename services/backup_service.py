@@ -0,0 +1,123 @@
+import gzip
+import hashlib
+import io
+import json
+from datetime import timedelta
+
+from model.db.config import BACKUP_MAX_DELTAS, BACKUP_KEEP_CHAINS, BACKUP_OVERLAP
+from model.db.repository import TASK_COLUMNS, BACKUP_EVENTO_COLUMNS
+
+# Versão do formato gravado em backups.arquivo (backups sem compressão são o JSON antigo)
+BACKUP_FORMAT = 2
+
+class BackupService:
+    """
+    Backups incrementais na tabela 'backups'.
+
+    Cada cadeia começa com uma base completa ('full'), seguida de deltas com as linhas
+    alteradas e excluídas desde o backup anterior. O conteúdo é JSON compactado com gzip;
+    um backup cujo conteúdo tem o mesmo hash do anterior (ou um delta vazio) não é gravado.
+    Ao criar uma nova base, as cadeias além de keep_chains são removidas.
+    """
+
+    def __init__(self, repository, max_deltas=BACKUP_MAX_DELTAS, keep_chains=BACKUP_KEEP_CHAINS,
+                 overlap=BACKUP_OVERLAP):
+        self.repository = repository
+        self.max_deltas = max_deltas
+        self.keep_chains = keep_chains
+        self.overlap = timedelta(seconds=overlap)
+
+    def create_backup(self, full=False):
+        """
+        Cria um backup e retorna um dict com 'id' (None se nada foi gravado), 'tipo',
+        'linhas' e 'skipped' (True quando não havia mudanças desde o backup anterior).
+        """
+        latest = self.repository.get_latest_backup()
+        since = None
+        base_id = None
+        if latest and not full:
+            latest_id, tipo, latest_base_id, snapshot_at, _, deltas = latest
+            if snapshot_at is not None and deltas < self.max_deltas:
+                # Volta `overlap` no tempo: transações em andamento no backup anterior
+                # gravaram updated_at antes do seu snapshot. Repetir linhas é inofensivo.
+                since = snapshot_at - self.overlap
+                base_id = latest_base_id or latest_id
+        tipo = 'full' if since is None else 'delta'
+
+        with self.repository.backup_snapshot(since) as snapshot:
+            arquivo, content_hash, linhas = self._encode(tipo, snapshot)
+            snapshot_at = snapshot['snapshot_at']
+
+        if tipo == 'delta' and linhas == 0:
+            return {'id': None, 'tipo': tipo, 'linhas': 0, 'skipped': True}
+        if latest and latest[4] == content_hash:
+            return {'id': None, 'tipo': tipo, 'linhas': linhas, 'skipped': True}
+
+        backup_id = self.repository.create_backup(
+            arquivo, tipo=tipo, base_id=base_id, snapshot_at=snapshot_at,
+            content_hash=content_hash, compressao='gzip', total_linhas=linhas
+        )
+        if backup_id is None:
+            raise RuntimeError("Não foi possível gravar o backup.")
+        if tipo == 'full':
+            self.repository.prune_backups(self.keep_chains)
+        return {'id': backup_id, 'tipo': tipo, 'linhas': linhas, 'skipped': False}
+
+    def restore(self, backup_id):
+        """
+        Restaura o estado do backup informado, aplicando sua base e os deltas até ele.
+        Em seguida grava uma nova base, para que os próximos deltas partam do estado restaurado.
+        """
+        chain = self.repository.get_backup_chain(backup_id)
+        if not chain or chain[-1][0] != backup_id:
+            raise ValueError(f"Backup {backup_id} não encontrado.")
+        steps = [self._decode(tipo, compressao, arquivo) for _, tipo, compressao, arquivo in chain]
+        if not self.repository.restore_backup_rows(steps):
+            raise RuntimeError(f"Não foi possível restaurar o backup {backup_id}.")
+        return self.create_backup(full=True)
+
+    def _encode(self, tipo, snapshot):
+        """Serializa o snapshot em JSON compactado, calculando o hash do conteúdo sem
+        compressão. As tarefas são escritas à medida que chegam do cursor."""
+        buffer = io.BytesIO()
+        digest = hashlib.sha256()
+        linhas = 0
+        # mtime=0 deixa o gzip determinístico para o mesmo conteúdo
+        with gzip.GzipFile(fileobj=buffer, mode='wb', mtime=0) as gz:
+            def write(text):
+                data = text.encode('utf-8')
+                digest.update(data)
+                gz.write(data)
+
+            write('{"format": %d, "tipo": %s, "deleted": %s, "eventos": [' % (
+                BACKUP_FORMAT, json.dumps(tipo), json.dumps(snapshot['deleted'], sort_keys=True)))
+            for i, row in enumerate(snapshot['eventos']):
+                write((',' if i else '') + json.dumps(row, ensure_ascii=False, default=str))
+            write('], "tasks": [')
+            for i, row in enumerate(snapshot['tasks']):
+                write((',' if i else '') + json.dumps(row, ensure_ascii=False, default=str))
+                linhas += 1
+            write(']}')
+
+        linhas += len(snapshot['eventos']) + sum(len(ids) for ids in snapshot['deleted'].values())
+        return buffer.getvalue(), digest.hexdigest(), linhas
+
+    def _decode(self, tipo, compressao, arquivo):
+        """Lê um backup gravado, no formato atual ou no JSON antigo sem compressão."""
+        if compressao == 'gzip':
+            arquivo = gzip.decompress(arquivo)
+        data = json.loads(arquivo.decode('utf-8'))
+        if data.get('format') == BACKUP_FORMAT:
+            return {
+                'tipo': data['tipo'],
+                'eventos': [tuple(row) for row in data['eventos']],
+                'tasks': [tuple(row) for row in data['tasks']],
+                'deleted': data['deleted'],
+            }
+        # Formato antigo: {'tasks': [dict, ...], 'eventos': [dict, ...]}, sempre completo
+        return {
+            'tipo': 'full',
+            'eventos': [tuple(e.get(c) for c in BACKUP_EVENTO_COLUMNS.split(", ")) for e in data.get('eventos', [])],
+            'tasks': [tuple(t.get(c) for c in TASK_COLUMNS.split(", ")) for t in data.get('tasks', [])],
+            'deleted': {},
+        }
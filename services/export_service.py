@@ -0,0 +1,99 @@
+import gzip
+import json
+import os
+
+from services import ics_service
+
+# Extensões reconhecidas em export_data (com ou sem .gz no final)
+NDJSON_EXTENSIONS = ('.ndjson', '.jsonl')
+
+def write_json(data, f, progress=None, progress_every=500):
+    """
+    Escreve {'tasks': [...], 'eventos': [...]} como JSON indentado, uma tarefa por vez.
+    data['tasks'] pode ser um gerador; nada além da tarefa atual fica na memória.
+    Retorna o número de tarefas escritas.
+    """
+    f.write('{\n    "eventos": [')
+    for i, evento in enumerate(data['eventos']):
+        f.write(',' if i else '')
+        f.write('\n        ' + _indent(json.dumps(evento, ensure_ascii=False, indent=4)))
+    f.write('\n    ],\n    "tasks": [')
+    count = 0
+    for count, task in enumerate(data['tasks'], 1):
+        f.write(',' if count > 1 else '')
+        f.write('\n        ' + _indent(json.dumps(task, ensure_ascii=False, indent=4)))
+        if progress and count % progress_every == 0:
+            progress(count)
+    f.write('\n    ]\n}\n')
+    return count
+
+def write_ndjson(data, f, progress=None, progress_every=500):
+    """
+    Escreve um registro JSON por linha, com o campo "type" ('evento' ou 'task').
+    Os eventos vêm primeiro, para que uma importação encontre o evento antes das suas ocorrências.
+    Retorna o número de tarefas escritas.
+    """
+    for evento in data['eventos']:
+        f.write(json.dumps({'type': 'evento', **evento}, ensure_ascii=False) + '\n')
+    count = 0
+    for count, task in enumerate(data['tasks'], 1):
+        f.write(json.dumps({'type': 'task', **task}, ensure_ascii=False) + '\n')
+        if progress and count % progress_every == 0:
+            progress(count)
+    return count
+
+def export_data(repository, filepath, fmt=None, compress=None, start_date=None, end_date=None, progress=None):
+    """
+    Exporta tarefas e eventos para um arquivo, lendo as tarefas em streaming do banco.
+
+    fmt: 'json', 'ndjson' ou 'ics'; por padrão, deduzido da extensão (.ndjson/.jsonl, .ics).
+    compress: grava em gzip; por padrão, quando o arquivo termina em .gz.
+    start_date/end_date: limitam as tarefas exportadas (os eventos vão sempre por inteiro).
+    progress: chamado como progress(escritas, total). Roda na thread da exportação,
+    então quem atualiza a interface deve repassar a chamada para a thread do Tk.
+
+    O arquivo é escrito em <filepath>.part e só substitui o destino ao final,
+    então uma exportação interrompida não deixa um arquivo truncado.
+    Retorna o número de tarefas exportadas.
+    """
+    base = filepath[:-3] if filepath.endswith('.gz') else filepath
+    if compress is None:
+        compress = filepath.endswith('.gz')
+    if fmt is None:
+        if base.endswith(NDJSON_EXTENSIONS):
+            fmt = 'ndjson'
+        elif base.endswith('.ics'):
+            fmt = 'ics'
+        else:
+            fmt = 'json'
+    writers = {'json': write_json, 'ndjson': write_ndjson, 'ics': ics_service.write_ics}
+    if fmt not in writers:
+        raise ValueError(f"Formato de exportação desconhecido: {fmt}")
+
+    total = repository.count_tasks(start_date, end_date)
+    report = (lambda done: progress(done, total)) if progress else None
+    writer = writers[fmt]
+
+    tmp_path = filepath + '.part'
+    opener = gzip.open if compress else open
+    data = repository.get_all_data(start_date, end_date)
+    try:
+        # newline='' preserva o CRLF exigido pelo iCalendar
+        with opener(tmp_path, 'wt', encoding='utf-8', newline='') as f:
+            count = writer(data, f, report)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    finally:
+        # Devolve a conexão do cursor ao pool mesmo se a escrita falhar no meio
+        data['tasks'].close()
+
+    if progress:
+        progress(count, total)
+    return count
+
+def _indent(text, prefix='        '):
+    """Recuar as linhas seguintes de um objeto JSON para o nível da lista."""
+    return text.replace('\n', '\n' + prefix)
@@ -0,0 +1,58 @@
+import threading
+
+from model.db.config import EVENT_HORIZON_DAYS, EVENT_HORIZON_INTERVAL
+
+class EventHorizonMaintainer:
+    """
+    Mantém gravadas em tasks as ocorrências dos próximos `horizon_days` dias de todos os
+    eventos ativos. Roda na inicialização e depois a cada `interval` segundos, sempre em
+    uma thread própria (nunca na thread do Tk). Cada execução é uma única instrução no
+    banco, que só toca os eventos cujo materializado_ate ficou para trás.
+    """
+
+    def __init__(self, repository, horizon_days=EVENT_HORIZON_DAYS, interval=EVENT_HORIZON_INTERVAL):
+        self.repository = repository
+        self.horizon_days = horizon_days
+        self.interval = interval
+        self._timer = None
+        self._running = False
+        self._lock = threading.Lock()
+
+    def run_once(self):
+        """Estende o horizonte agora. Retorna (eventos atualizados, ocorrências inseridas)."""
+        # Evita duas execuções simultâneas (ex.: run_once manual durante a periódica)
+        with self._lock:
+            eventos, ocorrencias = self.repository.extend_event_horizons(self.horizon_days)
+        if eventos:
+            print(f"Horizonte de eventos: {ocorrencias} ocorrências geradas para {eventos} eventos.")
+        return eventos, ocorrencias
+
+    def _run(self):
+        if not self._running:
+            return
+        try:
+            self.run_once()
+        except Exception as e:
+            print(f"Erro no job de horizonte de eventos: {e}")
+
+        # Reagenda a próxima execução
+        if self._running:
+            self._timer = threading.Timer(self.interval, self._run)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def start(self):
+        """Inicia o job; a primeira execução acontece imediatamente, em segundo plano."""
+        if not self._running:
+            self._running = True
+            print("Job de horizonte de eventos iniciado.")
+            self._timer = threading.Timer(0, self._run)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def stop(self):
+        """Para o job."""
+        self._running = False
+        if self._timer:
+            self._timer.cancel()
+        print("Job de horizonte de eventos parado.")
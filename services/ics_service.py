@@ -0,0 +1,316 @@
+from datetime import date, datetime, timedelta
+
+PRODID = "-//Agenda Virtual//PT-BR"
+
+# Dias da semana da agenda <-> BYDAY do iCalendar
+BYDAY = {'seg': 'MO', 'ter': 'TU', 'qua': 'WE', 'qui': 'TH', 'sex': 'FR', 'sáb': 'SA', 'dom': 'SU'}
+DIAS = {code: dia for dia, code in BYDAY.items()}
+WEEKDAY_CODES = ('MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU')  # índice = date.weekday()
+
+# Prioridades da agenda <-> PRIORITY (1 = mais alta, 9 = mais baixa)
+PRIORITY_TO_ICS = {'muito-importante': 1, 'importante': 3, 'média': 5, 'simples': 9}
+
+STATUS_TO_VTODO = {'pendente': 'NEEDS-ACTION', 'concluída': 'COMPLETED', 'cancelada': 'CANCELLED'}
+STATUS_FROM_ICS = {'NEEDS-ACTION': 'pendente', 'IN-PROCESS': 'pendente', 'COMPLETED': 'concluída',
+                   'CANCELLED': 'cancelada', 'CONFIRMED': 'pendente', 'TENTATIVE': 'pendente'}
+
+def write_ics(data, f, progress=None, progress_every=500):
+    """
+    Escreve os dados de AgendaRepository.get_all_data como um VCALENDAR.
+
+    Cada evento vira um único VEVENT com RRULE:FREQ=WEEKLY;BYDAY=...;UNTIL=..., e as
+    ocorrências canceladas viram EXDATE; as demais ocorrências gravadas não são
+    repetidas. Agendamentos viram VEVENT de dia inteiro e tarefas viram VTODO.
+    As tarefas são escritas à medida que chegam; só as datas canceladas dos eventos
+    ficam na memória até o fim. Retorna o número de tarefas lidas.
+    """
+    f.write(_line("BEGIN:VCALENDAR"))
+    f.write(_line("VERSION:2.0"))
+    f.write(_line(f"PRODID:{PRODID}"))
+    f.write(_line("CALSCALE:GREGORIAN"))
+
+    exdates = {}
+    count = 0
+    for count, task in enumerate(data['tasks'], 1):
+        if task['is_evento'] and task['evento_id']:
+            if task['status'] == 'cancelada':
+                exdates.setdefault(task['evento_id'], []).append(task['date'])
+        else:
+            f.write(_task_component(task))
+        if progress and count % progress_every == 0:
+            progress(count)
+
+    for evento in data['eventos']:
+        f.write(_evento_component(evento, exdates.get(evento['id'], [])))
+
+    f.write(_line("END:VCALENDAR"))
+    return count
+
+def _evento_component(evento, exdates):
+    if not evento['ativo'] and not evento['data_encerramento']:
+        return ''
+    start = _parse_iso(evento.get('data_inicio')) or date.today()
+    dias = [d for d in evento['dias_semana'] if d in BYDAY]
+    if not dias:
+        return ''
+    # DTSTART conta como ocorrência; avançar até o primeiro dia da regra
+    codes = {BYDAY[d] for d in dias}
+    while WEEKDAY_CODES[start.weekday()] not in codes:
+        start += timedelta(days=1)
+
+    rule = f"RRULE:FREQ=WEEKLY;BYDAY={','.join(BYDAY[d] for d in dias)}"
+    if evento['data_encerramento']:
+        rule += f";UNTIL={_ics_date(evento['data_encerramento'])}"
+
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:evento-{evento['id']}@agenda-virtual",
+        f"DTSTAMP:{_dtstamp()}",
+        f"DTSTART;VALUE=DATE:{_ics_date(start)}",
+        rule,
+    ]
+    lines += _summary_lines(evento['description'], evento['nome'])
+    if exdates:
+        lines.append(f"EXDATE;VALUE=DATE:{','.join(_ics_date(d) for d in sorted(exdates))}")
+    lines.append("END:VEVENT")
+    return ''.join(_line(l) for l in lines)
+
+def _task_component(task):
+    day = _ics_date(task['date'])
+    if task['is_agendamento']:
+        end = _ics_date(_parse_iso(task['date']) + timedelta(days=1))
+        lines = [
+            "BEGIN:VEVENT",
+            f"UID:task-{task['id']}@agenda-virtual",
+            f"DTSTAMP:{_dtstamp()}",
+            f"DTSTART;VALUE=DATE:{day}",
+            f"DTEND;VALUE=DATE:{end}",
+            f"STATUS:{'CANCELLED' if task['status'] == 'cancelada' else 'CONFIRMED'}",
+            f"X-AGENDA-STATUS:{task['status']}",
+        ]
+        end_tag = "END:VEVENT"
+    else:
+        lines = [
+            "BEGIN:VTODO",
+            f"UID:task-{task['id']}@agenda-virtual",
+            f"DTSTAMP:{_dtstamp()}",
+            f"DTSTART;VALUE=DATE:{day}",
+            f"DUE;VALUE=DATE:{day}",
+            f"STATUS:{STATUS_TO_VTODO.get(task['status'], 'NEEDS-ACTION')}",
+        ]
+        end_tag = "END:VTODO"
+    if task['priority'] in PRIORITY_TO_ICS:
+        lines.append(f"PRIORITY:{PRIORITY_TO_ICS[task['priority']]}")
+    lines += _summary_lines(task['description'], task['nome'])
+    lines.append(end_tag)
+    return ''.join(_line(l) for l in lines)
+
+def _summary_lines(description, nome):
+    if nome:
+        return [f"SUMMARY:{_escape(nome)}", f"DESCRIPTION:{_escape(description)}"]
+    return [f"SUMMARY:{_escape(description)}"]
+
+def iter_ics_records(f):
+    """
+    Lê um arquivo .ics em streaming e gera (posição, tipo, registro) no formato de
+    services.import_service: 'evento' para VEVENT com RRULE semanal (ou diária),
+    'task' para VEVENT sem RRULE (agendamento), VTODO (tarefa) e cada EXDATE
+    (ocorrência cancelada do evento). Componentes não suportados viram 'invalido'.
+    """
+    next_evento_id = 1
+    for position, name, props in _iter_components(f):
+        try:
+            if name == 'VTODO':
+                yield position, 'task', _todo_record(props)
+            elif name == 'VEVENT' and 'RRULE' not in props:
+                yield position, 'task', _appointment_record(props)
+            elif name == 'VEVENT':
+                evento_id = next_evento_id
+                next_evento_id += 1
+                evento, exdates = _evento_record(evento_id, props)
+                yield position, 'evento', evento
+                for day in exdates:
+                    yield position, 'task', {
+                        'description': evento['description'], 'nome': evento['nome'],
+                        'is_evento': True, 'dias_evento': evento['dias_semana'],
+                        'date': day, 'status': 'cancelada', 'evento_id': evento_id,
+                    }
+        except ValueError as e:
+            yield position, 'invalido', {'erro': str(e)}
+
+def _evento_record(evento_id, props):
+    start = _prop_date(props, 'DTSTART')
+    if start is None:
+        raise ValueError("VEVENT recorrente sem DTSTART")
+    rule = dict(part.split('=', 1) for part in props['RRULE'][0][1].split(';') if '=' in part)
+    freq = rule.get('FREQ', '').upper()
+    if rule.get('INTERVAL', '1') != '1' or freq not in ('WEEKLY', 'DAILY'):
+        raise ValueError(f"RRULE não suportada: {props['RRULE'][0][1]}")
+    if freq == 'DAILY':
+        codes = list(WEEKDAY_CODES)
+    elif rule.get('BYDAY'):
+        codes = [code.strip().lstrip('+-0123456789').upper() for code in rule['BYDAY'].split(',')]
+    else:
+        codes = [WEEKDAY_CODES[start.weekday()]]
+    if any(code not in DIAS for code in codes):
+        raise ValueError(f"BYDAY inválido: {rule.get('BYDAY')}")
+
+    until = _parse_ics_date(rule['UNTIL']) if rule.get('UNTIL') else None
+    if rule.get('COUNT'):
+        until = _until_from_count(start, set(codes), int(rule['COUNT']))
+
+    description, nome = _description_and_nome(props)
+    exdates = []
+    for _, value in props.get('EXDATE', []):
+        exdates += [_parse_ics_date(v) for v in value.split(',') if v]
+    evento = {
+        'id': evento_id, 'description': description, 'nome': nome,
+        'dias_semana': [DIAS[code] for code in codes], 'ativo': True,
+        'data_inicio': start, 'data_encerramento': until,
+    }
+    return evento, exdates
+
+def _appointment_record(props):
+    day = _prop_date(props, 'DTSTART')
+    if day is None:
+        raise ValueError("VEVENT sem DTSTART")
+    description, nome = _description_and_nome(props)
+    status = _prop_value(props, 'X-AGENDA-STATUS') or STATUS_FROM_ICS.get(
+        (_prop_value(props, 'STATUS') or '').upper(), 'pendente')
+    return {'description': description, 'nome': nome, 'is_agendamento': True,
+            'date': day, 'status': status, 'priority': _priority_from_ics(props)}
+
+def _todo_record(props):
+    day = _prop_date(props, 'DUE') or _prop_date(props, 'DTSTART')
+    if day is None:
+        raise ValueError("VTODO sem DUE nem DTSTART")
+    description, nome = _description_and_nome(props)
+    status = STATUS_FROM_ICS.get((_prop_value(props, 'STATUS') or '').upper(), 'pendente')
+    return {'description': description, 'nome': nome, 'date': day, 'status': status,
+            'priority': _priority_from_ics(props)}
+
+def _priority_from_ics(props):
+    value = _prop_value(props, 'PRIORITY')
+    if not value or value == '0':
+        return None
+    value = int(value)
+    if value <= 2:
+        return 'muito-importante'
+    if value <= 4:
+        return 'importante'
+    if value <= 6:
+        return 'média'
+    return 'simples'
+
+def _description_and_nome(props):
+    summary = _prop_value(props, 'SUMMARY')
+    description = _prop_value(props, 'DESCRIPTION')
+    if description:
+        return description, summary
+    if not summary:
+        raise ValueError("componente sem SUMMARY")
+    return summary, None
+
+def _until_from_count(start, codes, count):
+    day = start
+    seen = 0
+    while True:
+        if WEEKDAY_CODES[day.weekday()] in codes:
+            seen += 1
+            if seen == count:
+                return day
+        day += timedelta(days=1)
+
+def _iter_components(f):
+    """Desdobra as linhas e gera (posição, nome, {PROPRIEDADE: [(parâmetros, valor)]})
+    para cada VEVENT/VTODO, sem guardar o calendário inteiro."""
+    current = None
+    start_line = 0
+    for number, line in _unfolded(f):
+        name, params, value = _parse_line(line)
+        if name == 'BEGIN' and value.upper() in ('VEVENT', 'VTODO') and current is None:
+            current = (value.upper(), {})
+            start_line = number
+        elif name == 'END' and current is not None and value.upper() == current[0]:
+            yield f"linha {start_line}", current[0], current[1]
+            current = None
+        elif current is not None and name not in ('BEGIN', 'END'):
+            current[1].setdefault(name, []).append((params, value))
+
+def _unfolded(f):
+    buffered = None
+    start = 0
+    for number, raw in enumerate(f, 1):
+        raw = raw.rstrip('\r\n')
+        if raw[:1] in (' ', '\t') and buffered is not None:
+            buffered += raw[1:]
+            continue
+        if buffered is not None:
+            yield start, buffered
+        buffered, start = raw, number
+    if buffered:
+        yield start, buffered
+
+def _parse_line(line):
+    head, _, value = line.partition(':')
+    name, *params = head.split(';')
+    return name.upper(), params, _unescape(value)
+
+def _prop_value(props, name):
+    values = props.get(name)
+    return values[0][1].strip() if values else None
+
+def _prop_date(props, name):
+    value = _prop_value(props, name)
+    return _parse_ics_date(value) if value else None
+
+def _parse_ics_date(value):
+    """DATE (AAAAMMDD) ou DATE-TIME (AAAAMMDDTHHMMSS[Z]); só a data interessa à agenda."""
+    try:
+        return datetime.strptime(value.strip()[:8], '%Y%m%d').date()
+    except ValueError:
+        raise ValueError(f"data iCalendar inválida: {value}")
+
+def _parse_iso(value):
+    if value is None or isinstance(value, date):
+        return value
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+def _ics_date(value):
+    return _parse_iso(value).strftime('%Y%m%d')
+
+def _dtstamp():
+    return datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')
+
+def _escape(text):
+    return (str(text).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\r\n', '\\n').replace('\n', '\\n'))
+
+def _unescape(text):
+    result = []
+    chars = iter(text)
+    for char in chars:
+        if char == '\\':
+            nxt = next(chars, '')
+            result.append('\n' if nxt in ('n', 'N') else nxt)
+        else:
+            result.append(char)
+    return ''.join(result)
+
+def _line(text):
+    """Dobra a linha em 75 octetos (RFC 5545) sem partir caracteres UTF-8."""
+    if not text:
+        return ''
+    parts = []
+    current = ''
+    size = 0
+    limit = 75
+    for char in text:
+        char_size = len(char.encode('utf-8'))
+        if size + char_size > limit:
+            parts.append(current)
+            current, size, limit = '', 0, 74  # continuações começam com um espaço
+        current += char
+        size += char_size
+    parts.append(current)
+    return '\r\n '.join(parts) + '\r\n'
@@ -0,0 +1,296 @@
+import csv
+import gzip
+import io
+import json
+import time
+from datetime import datetime
+
+from model.priority_flag import PriorityFlag
+from services import ics_service
+
+DIAS_SEMANA = ('seg', 'ter', 'qua', 'qui', 'sex', 'sáb', 'dom')
+STATUS_VALIDOS = ('pendente', 'concluída', 'cancelada')
+PRIORIDADES = {flag.value for flag in PriorityFlag}
+
+# Erros guardados no relatório (as demais linhas inválidas só entram na contagem)
+MAX_ERRORS_REPORTED = 50
+
+def import_file(repository, filepath, fmt=None, user_id=1, skip_duplicates=True, progress=None, progress_every=10000):
+    """
+    Importa um arquivo de exportação (JSON, NDJSON, com ou sem .gz), um CSV de tarefas
+    ou um calendário iCalendar (.ics).
+
+    O arquivo é lido em streaming, validado linha a linha e enviado direto ao COPY do
+    banco; nada além do registro atual fica na memória. Linhas inválidas são ignoradas
+    e relatadas. progress(linhas lidas, linhas por segundo) é chamado a cada
+    progress_every registros.
+    Retorna o relatório da importação (contadores, erros e linhas por segundo).
+    """
+    base = filepath[:-3] if filepath.endswith('.gz') else filepath
+    if fmt is None:
+        if base.endswith('.csv'):
+            fmt = 'csv'
+        elif base.endswith(('.ndjson', '.jsonl')):
+            fmt = 'ndjson'
+        elif base.endswith('.ics'):
+            fmt = 'ics'
+        else:
+            fmt = 'json'
+    readers = {'json': _iter_json_document, 'ndjson': _iter_ndjson, 'csv': _iter_csv,
+               'ics': ics_service.iter_ics_records}
+    if fmt not in readers:
+        raise ValueError(f"Formato de importação desconhecido: {fmt}")
+
+    report = {'lidos': 0, 'invalidos': 0, 'erros': []}
+    started = time.perf_counter()
+    opener = gzip.open if filepath.endswith('.gz') else open
+    encoding = 'utf-8-sig' if fmt == 'csv' else 'utf-8'
+
+    with opener(filepath, 'rt', encoding=encoding, newline='' if fmt == 'csv' else None) as f:
+        def lines():
+            seen_eventos = set()
+            for position, kind, record in readers[fmt](f):
+                report['lidos'] += 1
+                if progress and report['lidos'] % progress_every == 0:
+                    progress(report['lidos'], report['lidos'] / (time.perf_counter() - started))
+                try:
+                    if kind == 'evento':
+                        row = _evento_row(record)
+                        if row[1] is not None:
+                            if row[1] in seen_eventos:
+                                raise ValueError(f"id de evento repetido: {row[1]}")
+                            seen_eventos.add(row[1])
+                    elif kind == 'task':
+                        row = _task_row(record)
+                    elif kind == 'invalido':
+                        raise ValueError(record['erro'])
+                    else:
+                        raise ValueError(f"tipo de registro desconhecido: {kind}")
+                except (ValueError, TypeError, AttributeError) as e:
+                    report['invalidos'] += 1
+                    if len(report['erros']) < MAX_ERRORS_REPORTED:
+                        report['erros'].append(f"{position}: {e}")
+                    continue
+                yield '\t'.join(_copy_text(value) for value in row) + '\n'
+
+        report.update(repository.bulk_import(_LineStream(lines()), user_id=user_id,
+                                             skip_duplicates=skip_duplicates))
+
+    report['segundos'] = time.perf_counter() - started
+    report['linhas_por_segundo'] = report['lidos'] / report['segundos'] if report['segundos'] else 0.0
+    return report
+
+def _task_row(record):
+    """Valida uma tarefa e devolve a linha na ordem de AgendaRepository.IMPORT_COLUMNS."""
+    description = _text(record.get('description'))
+    if not description:
+        raise ValueError("tarefa sem descrição")
+    priority = _text(record.get('priority'))
+    if priority:
+        try:
+            priority = PriorityFlag.from_string(priority).value
+        except ValueError:
+            raise ValueError(f"prioridade inválida: {priority}")
+    status = _text(record.get('status')) or 'pendente'
+    if status not in STATUS_VALIDOS:
+        raise ValueError(f"status inválido: {status}")
+    date = _parse_date(record.get('date'))
+    if date is None:
+        raise ValueError("tarefa sem data")
+    return ('task', None, description, priority, _text(record.get('nome')),
+            _parse_bool(record.get('is_agendamento')), _parse_bool(record.get('is_evento')),
+            _parse_dias(record.get('dias_evento')), date, status,
+            _parse_int(record.get('evento_id')), None, None, None)
+
+def _evento_row(record):
+    """Valida um evento e devolve a linha na ordem de AgendaRepository.IMPORT_COLUMNS."""
+    description = _text(record.get('description'))
+    if not description:
+        raise ValueError("evento sem descrição")
+    dias = _parse_dias(record.get('dias_semana'))
+    if not dias:
+        raise ValueError("evento sem dias da semana")
+    ativo = record.get('ativo')
+    return ('evento', _parse_int(record.get('id')), description, None, _text(record.get('nome')),
+            None, None, dias, None, None, None,
+            True if ativo is None or ativo == '' else _parse_bool(ativo),
+            _parse_date(record.get('data_inicio')), _parse_date(record.get('data_encerramento')))
+
+def _text(value):
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+def _parse_int(value):
+    if value is None or value == '':
+        return None
+    return int(value)
+
+def _parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    if value is None or value == '':
+        return False
+    text = str(value).strip().lower()
+    if text in ('1', 'true', 't', 'sim', 's', 'yes'):
+        return True
+    if text in ('0', 'false', 'f', 'não', 'nao', 'n', 'no'):
+        return False
+    raise ValueError(f"booleano inválido: {value}")
+
+def _parse_date(value):
+    """Aceita AAAA-MM-DD (formato da exportação) e dd/mm/aaaa."""
+    if value is None or value == '':
+        return None
+    text = str(value).strip()
+    for fmt in ('%Y-%m-%d', '%d/%m/%Y'):
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            pass
+    raise ValueError(f"data inválida: {value}")
+
+def _parse_dias(value):
+    """Aceita lista (JSON) ou texto separado por vírgula, ponto e vírgula ou no formato {seg,qua}."""
+    if value is None or value == '':
+        return None
+    if isinstance(value, str):
+        value = value.strip('{}').replace(';', ',').split(',')
+    dias = [str(d).strip().lower() for d in value if str(d).strip()]
+    # Planilhas costumam trazer "sab" sem acento; a agenda grava "sáb"
+    dias = ['sáb' if d == 'sab' else d for d in dias]
+    invalidos = [d for d in dias if d not in DIAS_SEMANA]
+    if invalidos:
+        raise ValueError(f"dia da semana inválido: {', '.join(invalidos)}")
+    return dias
+
+def _copy_text(value):
+    """Formata um valor para o formato texto do COPY."""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, list):
+        value = '{' + ','.join(value) + '}'
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+class _LineStream:
+    """Adapta um gerador de linhas ao read() que o copy_expert do psycopg2 espera."""
+
+    def __init__(self, lines):
+        self._lines = lines
+        self._buffer = b''
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            try:
+                self._buffer += next(self._lines).encode('utf-8')
+            except StopIteration:
+                break
+        if size < 0:
+            size = len(self._buffer)
+        chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+        return chunk
+
+    readline = read
+
+def _iter_ndjson(f):
+    """Uma linha JSON por registro, com o campo "type" ('evento' ou 'task')."""
+    for number, line in enumerate(f, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield f"linha {number}", 'invalido', {'erro': str(e)}
+            continue
+        yield f"linha {number}", record.pop('type', 'task'), record
+
+def _iter_csv(f):
+    """CSV com cabeçalho; cada linha é uma tarefa (colunas com os nomes da exportação)."""
+    for number, record in enumerate(csv.DictReader(f), 2):
+        yield f"linha {number}", 'task', record
+
+def _iter_json_document(f, chunk_size=1 << 16):
+    """
+    Lê {'eventos': [...], 'tasks': [...]} (em qualquer ordem) sem carregar o arquivo
+    inteiro: os itens de cada lista são decodificados um a um com raw_decode.
+    """
+    decoder = json.JSONDecoder()
+    buf = ''
+    pos = 0
+    eof = False
+
+    def fill():
+        nonlocal buf, pos, eof
+        chunk = f.read(chunk_size)
+        if not chunk:
+            eof = True
+        buf = buf[pos:] + chunk
+        pos = 0
+
+    def peek():
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos].isspace():
+                pos += 1
+            if pos < len(buf) or eof:
+                return buf[pos] if pos < len(buf) else ''
+            fill()
+
+    def expect(char):
+        nonlocal pos
+        if peek() != char:
+            raise ValueError(f"JSON inválido: esperado '{char}'")
+        pos += 1
+
+    def value():
+        nonlocal pos
+        while True:
+            peek()
+            try:
+                result, end = decoder.raw_decode(buf, pos)
+                # Um número no fim do buffer pode continuar no próximo bloco
+                if end < len(buf) or eof:
+                    pos = end
+                    return result
+            except ValueError:
+                if eof:
+                    raise
+            fill()
+
+    expect('{')
+    if peek() == '}':
+        return
+    while True:
+        key = value()
+        expect(':')
+        if peek() == '[':
+            pos += 1
+            kind = {'eventos': 'evento', 'tasks': 'task'}.get(key)
+            index = 0
+            if peek() == ']':
+                pos += 1
+            else:
+                while True:
+                    item = value()
+                    index += 1
+                    if kind:
+                        yield f"{key}[{index}]", kind, item
+                    separator = peek()
+                    pos += 1
+                    if separator == ']':
+                        break
+                    if separator != ',':
+                        raise ValueError("JSON inválido: esperado ',' ou ']'")
+        else:
+            value()
+        separator = peek()
+        pos += 1
+        if separator == '}':
+            return
+        if separator != ',':
+            raise ValueError("JSON inválido: esperado ',' ou '}'")
@@ -0,0 +1,193 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from model.db.config import (
+    NOTIFICATION_BACKENDS, NOTIFICATION_COALESCE_WINDOW, NOTIFICATION_MIN_INTERVAL,
+    NOTIFICATION_SEND_TIMEOUT, NOTIFICATION_MAX_PENDING
+)
+
+class PlyerBackend:
+    """Notificação do sistema operacional, via plyer."""
+
+    name = 'plyer'
+
+    def __init__(self, app_name='Agenda Virtual', timeout=10):
+        # Importado aqui: os demais backends (e os testes) não dependem do plyer
+        from plyer import notification
+        self._notify = notification.notify
+        self.app_name = app_name
+        self.timeout = timeout  # A notificação desaparecerá após 10 segundos
+
+    def send(self, title, message):
+        self._notify(title=title, message=message, app_name=self.app_name, timeout=self.timeout)
+
+class LogBackend:
+    """Só registra as notificações no log (execução sem interface e testes)."""
+
+    name = 'log'
+
+    def __init__(self):
+        self.sent = []
+
+    def send(self, title, message):
+        self.sent.append((title, message))
+        logging.info(f"Notificação: {title} - {message}")
+
+class PanelBackend:
+    """Mostra a notificação no NotificationPanel da janela principal.
+
+    A chamada chega da thread de entrega; o painel é atualizado na thread do Tk.
+    """
+
+    name = 'painel'
+
+    def __init__(self, root, panel, duration=8000):
+        self.root = root
+        self.panel = panel
+        self.duration = duration
+
+    def send(self, title, message):
+        self.root.after(0, lambda: self.panel.show_info(f"{title}\n{message}", duration=self.duration))
+
+def build_backends(names=NOTIFICATION_BACKENDS, root=None, panel=None):
+    """Monta os backends pelos nomes (plyer, log, painel). Os indisponíveis são ignorados."""
+    backends = []
+    for name in names:
+        try:
+            if name == 'plyer':
+                backends.append(PlyerBackend())
+            elif name == 'log':
+                backends.append(LogBackend())
+            elif name == 'painel':
+                if panel is not None:
+                    backends.append(PanelBackend(root, panel))
+            else:
+                logging.warning(f"Backend de notificação desconhecido: {name}")
+        except ImportError as e:
+            logging.warning(f"Backend de notificação '{name}' indisponível: {e}")
+    return backends or [LogBackend()]
+
+class NotificationQueue:
+    """
+    Fila de entrega de notificações com uma thread própria.
+
+    put() nunca bloqueia quem notifica (o agendador). A thread de entrega junta o que
+    chegar dentro de `coalesce_window` segundos em um único resumo, respeita um
+    intervalo mínimo de `min_interval` segundos entre entregas (o que chega nesse
+    meio-tempo entra no próximo resumo) e chama cada backend com limite de
+    `send_timeout` segundos: um backend travado não segura a fila, e enquanto a
+    chamada anterior dele não terminar as novas são descartadas.
+    """
+
+    MAX_DIGEST_LINES = 5
+
+    def __init__(self, backends, coalesce_window=NOTIFICATION_COALESCE_WINDOW, min_interval=NOTIFICATION_MIN_INTERVAL,
+                 send_timeout=NOTIFICATION_SEND_TIMEOUT, max_pending=NOTIFICATION_MAX_PENDING):
+        self.backends = list(backends)
+        self.coalesce_window = coalesce_window
+        self.min_interval = min_interval
+        self.send_timeout = send_timeout
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._executors = {id(b): ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"notify-{b.name}")
+                           for b in self.backends}
+        self._busy = {}  # id(backend) -> future da chamada ainda em andamento
+        self._last_delivery = None
+        self._thread = None
+        self._running = False
+        self.delivered = 0
+        self.dropped = 0
+
+    def put(self, title, message, summary=None):
+        """Enfileira uma notificação. `summary` é a linha usada no resumo (padrão: o título)."""
+        try:
+            self._queue.put_nowait((title, message, summary or title))
+        except queue.Full:
+            self.dropped += 1
+            logging.warning(f"Fila de notificações cheia; descartada: {title}")
+
+    def _collect(self, first):
+        """Junta à primeira notificação as que chegarem até o fim da janela (ou do intervalo mínimo)."""
+        batch = [first]
+        deadline = time.monotonic() + self.coalesce_window
+        if self._last_delivery is not None:
+            deadline = max(deadline, self._last_delivery + self.min_interval)
+        stop = False
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                stop = True
+                break
+            batch.append(item)
+        return batch, stop
+
+    def _digest(self, batch):
+        """Uma notificação só passa como está; várias viram um resumo."""
+        if len(batch) == 1:
+            title, message, _ = batch[0]
+            return title, message
+        lines = [f"• {summary}" for _, _, summary in batch[:self.MAX_DIGEST_LINES]]
+        if len(batch) > self.MAX_DIGEST_LINES:
+            lines.append(f"e mais {len(batch) - self.MAX_DIGEST_LINES}")
+        return f"{len(batch)} lembretes", "\n".join(lines)
+
+    def _deliver(self, title, message):
+        for backend in self.backends:
+            key = id(backend)
+            previous = self._busy.get(key)
+            if previous is not None and not previous.done():
+                logging.warning(f"Backend '{backend.name}' ainda ocupado; notificação descartada: {title}")
+                continue
+            future = self._executors[key].submit(backend.send, title, message)
+            self._busy[key] = future
+            try:
+                future.result(timeout=self.send_timeout)
+            except FutureTimeoutError:
+                logging.warning(f"Backend '{backend.name}' excedeu {self.send_timeout}s ao notificar: {title}")
+            except Exception as e:
+                logging.error(f"Erro ao enviar notificação por '{backend.name}': {e}")
+        self._last_delivery = time.monotonic()
+        self.delivered += 1
+        print(f"Notificação enviada: '{title}'")
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch, stop = self._collect(item)
+            try:
+                self._deliver(*self._digest(batch))
+            except Exception as e:
+                logging.error(f"Erro na entrega de notificações: {e}")
+            if stop:
+                break
+
+    def start(self):
+        """Inicia a thread de entrega."""
+        if not self._running:
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="agenda-notify-delivery", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5):
+        """Entrega o que já estiver na fila e para a thread."""
+        if not self._running:
+            return
+        self._running = False
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        if self._thread:
+            self._thread.join(timeout)
+        for executor in self._executors.values():
+            executor.shutdown(wait=False)
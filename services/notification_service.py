@@ -1,80 +1,206 @@
-from plyer import notification
+import heapq
+import os
+import select
+import socket
 import threading
-import time
-from datetime import datetime
+from datetime import datetime, timedelta
 
-def send_notification(title, message):
+from model.db.config import NOTIFICATION_INTERVAL, NOTIFICATION_LOG_KEEP_DAYS
+from model.db.database import open_listen_connection
+from services.notification_delivery import NotificationQueue, build_backends
+
+class NotificationScheduler:
     """
-    Envia uma notificação para o sistema operacional.
+    Dispara os lembretes de agendamentos em uma única thread de longa duração.
+
+    Os lembretes pendentes ficam em um min-heap ordenado pelo instante de disparo
+    (24 horas antes do dia do agendamento) e a thread dorme até o primeiro deles.
+    A lista só é recarregada do banco quando um agendamento muda (LISTEN no canal
+    agenda_agendamentos, avisado por um gatilho em tasks, também para alterações
+    feitas por outras instâncias) e à meia-noite, quando entra o dia seguinte.
+    Sem lembretes próximos nem alterações, não há consultas nem threads novas.
+    Se a conexão de LISTEN não puder ser aberta, recarrega a cada `check_interval`
+    segundos.
+
+    O que já foi avisado fica em notification_log, no banco: cada lembrete é
+    reivindicado antes do envio, então reinícios e outras instâncias não o repetem,
+    e a memória do scheduler se limita aos lembretes de hoje e amanhã.
+
+    O envio em si fica com `delivery` (NotificationQueue): o scheduler só enfileira.
+    Sem uma fila informada, cria e gerencia a sua com os backends configurados.
     """
-    try:
-        notification.notify(
-            title=title,
-            message=message,
-            app_name='Agenda Virtual',
-            timeout=10  # A notificação desaparecerá após 10 segundos
-        )
-        print(f"Notificação enviada: '{title}'")
-    except Exception as e:
-        print(f"Erro ao enviar notificação: {e}")
-        # Em um app real, poderíamos ter um fallback para um alerta na UI 
 
-class NotificationScheduler:
-    def __init__(self, repository, check_interval=3600): # Default: verifica a cada hora
+    CHANNEL = 'agenda_agendamentos'
+    REMINDER_KIND = 'vespera'
+    # Acorda ao menos uma vez por hora: cobre ajustes de relógio e suspensão do sistema
+    MAX_SLEEP = 3600
+
+    def __init__(self, repository, check_interval=NOTIFICATION_INTERVAL, log_keep_days=NOTIFICATION_LOG_KEEP_DAYS,
+                 delivery=None):
         self.repository = repository
+        self._owns_delivery = delivery is None
+        self.delivery = delivery if delivery is not None else NotificationQueue(build_backends())
         self.check_interval = check_interval
-        self._timer = None
+        self.log_keep_days = log_keep_days
+        self.instance = f"{socket.gethostname()}:{os.getpid()}"
+        self._pruned_on = None
+        self._thread = None
         self._running = False
-        self.notified_ids = set() # Rastreia IDs notificados nesta sessão para evitar spam
+        self._heap = []  # (instante de disparo, task_id, description, nome, date)
+        self._reload_at = None
+        self._listen_conn = None
+        self._listen_failed = False
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
 
-    def _check_schedules(self):
-        """Verifica os agendamentos e envia notificações."""
-        if not self._running:
+    def _reload(self):
+        """Recarrega do banco os agendamentos de hoje e amanhã ainda não avisados e remonta o heap."""
+        now = datetime.now()
+        if self._pruned_on != now.date():
+            self.repository.prune_notification_log(self.log_keep_days)
+            self._pruned_on = now.date()
+        heap = []
+        for task_id, description, nome, date in self.repository.get_unnotified_schedules(self.REMINDER_KIND):
+            schedule_datetime = datetime.combine(date, datetime.min.time())  # Assume início do dia
+            if schedule_datetime > now:
+                heap.append((schedule_datetime - timedelta(hours=24), task_id, description, nome, date))
+        heapq.heapify(heap)
+        self._heap = heap
+        self._reload_at = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+        print(f"Scheduler: {len(heap)} lembretes programados.")
+
+    def _fire_due(self):
+        """Reivindica e envia os lembretes cujo instante de disparo já chegou."""
+        now = datetime.now()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            _, task_id, description, nome, date = heapq.heappop(self._heap)
+            # Só notifica se ainda não passou
+            if datetime.combine(date, datetime.min.time()) > now:
+                due.append((task_id, description, nome, date))
+        if not due:
             return
 
-        print("Scheduler: Verificando agendamentos...")
+        claimed = self.repository.claim_notifications(
+            self.REMINDER_KIND, [(task_id, date) for task_id, _, _, date in due], self.instance
+        )
+        for task_id, description, nome, date in due:
+            if task_id not in claimed:
+                continue  # Já avisado (antes de um reinício ou por outra instância)
+            time_diff = datetime.combine(date, datetime.min.time()) - now
+            hours_remaining = int(time_diff.total_seconds() // 3600)
+            title = f"Lembrete: {nome or description}"
+            if hours_remaining < 1:
+                message = f"Você tem um agendamento em menos de 1 hora: {description}"
+            elif hours_remaining == 1:
+                message = f"Você tem um agendamento em 1 hora: {description}"
+            else:
+                message = f"Você tem um agendamento em {hours_remaining} horas ({date.strftime('%d/%m')}): {description}"
+
+            self.delivery.put(title, message, summary=f"{nome or description} ({date.strftime('%d/%m')})")
+
+    def _open_listen(self):
         try:
-            schedules = self.repository.get_upcoming_schedules()
-            for schedule in schedules:
-                task_id, description, nome, date = schedule
-                if task_id not in self.notified_ids:
-                    # Calcula o tempo restante
-                    now = datetime.now()
-                    schedule_datetime = datetime.combine(date, datetime.min.time())  # Assume início do dia
-                    time_diff = schedule_datetime - now
-                    
-                    if time_diff.total_seconds() > 0:  # Só notifica se ainda não passou
-                        hours_remaining = int(time_diff.total_seconds() // 3600)
-                        
-                        if hours_remaining < 24:
-                            title = f"Lembrete: {nome or description}"
-                            if hours_remaining < 1:
-                                message = f"Você tem um agendamento em menos de 1 hora: {description}"
-                            elif hours_remaining == 1:
-                                message = f"Você tem um agendamento em 1 hora: {description}"
-                            else:
-                                message = f"Você tem um agendamento em {hours_remaining} horas ({date.strftime('%d/%m')}): {description}"
-                            
-                            send_notification(title, message)
-                            self.notified_ids.add(task_id)
+            self._listen_conn = open_listen_connection(self.CHANNEL)
+            self._listen_failed = False
         except Exception as e:
-            print(f"Erro no agendador de notificações: {e}")
-        
-        # Reagenda a próxima verificação
-        if self._running:
-            self._timer = threading.Timer(self.check_interval, self._check_schedules)
-            self._timer.start()
+            self._listen_conn = None
+            if not self._listen_failed:
+                print(f"Scheduler: LISTEN indisponível, recarregando a cada {self.check_interval}s ({e})")
+            self._listen_failed = True
+
+    def _close_listen(self):
+        if self._listen_conn is not None:
+            try:
+                self._listen_conn.close()
+            except Exception:
+                pass
+            self._listen_conn = None
+
+    def _wait(self, timeout):
+        """Dorme até o timeout, uma notificação do banco ou reload()/stop().
+
+        Retorna True se os agendamentos precisam ser recarregados.
+        """
+        sources = [self._wake_r]
+        if self._listen_conn is not None:
+            sources.append(self._listen_conn)
+        else:
+            timeout = min(timeout, self.check_interval)
+        try:
+            readable, _, _ = select.select(sources, [], [], timeout)
+        except Exception:
+            readable = []
+            self._close_listen()
+
+        reload = False
+        if self._wake_r in readable:
+            try:
+                while self._wake_r.recv(1024):
+                    pass
+            except BlockingIOError:
+                pass
+            reload = True
+        if self._listen_conn is not None and self._listen_conn in readable:
+            try:
+                self._listen_conn.poll()
+                if self._listen_conn.notifies:
+                    self._listen_conn.notifies.clear()
+                    reload = True
+            except Exception as e:
+                # Conexão perdida (ex.: reinício do servidor): reabre e recarrega
+                print(f"Scheduler: conexão de LISTEN perdida: {e}")
+                self._close_listen()
+                reload = True
+        if self._listen_conn is None and not readable:
+            # Sem LISTEN, o timeout é o intervalo de recarga
+            reload = True
+        return reload
+
+    def _run(self):
+        reload = True
+        while self._running:
+            try:
+                if self._listen_conn is None:
+                    self._open_listen()
+                    reload = True
+                if reload or datetime.now() >= self._reload_at:
+                    self._reload()
+                self._fire_due()
+            except Exception as e:
+                print(f"Erro no agendador de notificações: {e}")
+                # Tenta de novo mais tarde sem girar em falso
+                self._reload_at = datetime.now() + timedelta(seconds=self.check_interval)
+
+            next_at = self._reload_at
+            if self._heap and self._heap[0][0] < next_at:
+                next_at = self._heap[0][0]
+            timeout = min(max((next_at - datetime.now()).total_seconds(), 0), self.MAX_SLEEP)
+            reload = self._wait(timeout)
+        self._close_listen()
+
+    def reload(self):
+        """Pede uma recarga imediata dos agendamentos (ex.: após uma alteração local)."""
+        try:
+            self._wake_w.send(b'r')
+        except OSError:
+            pass
 
     def start(self):
         """Inicia o scheduler em uma thread separada."""
         if not self._running:
             self._running = True
             print("Agendador de notificações iniciado.")
-            self._check_schedules() # Executa a primeira verificação imediatamente
+            self.delivery.start()
+            self._thread = threading.Thread(target=self._run, name="agenda-notifications", daemon=True)
+            self._thread.start()
 
-    def stop(self):
+    def stop(self, timeout=5):
         """Para o scheduler."""
         self._running = False
-        if self._timer:
-            self._timer.cancel()
-        print("Agendador de notificações parado.") 
\ No newline at end of file
+        self.reload()
+        if self._thread:
+            self._thread.join(timeout)
+        if self._owns_delivery:
+            self.delivery.stop(timeout)
+        print("Agendador de notificações parado.")
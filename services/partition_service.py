@@ -0,0 +1,80 @@
+import threading
+from datetime import date, timedelta
+
+from model.db.config import (
+    PARTITION_AHEAD_DAYS, PARTITION_INTERVAL, ARCHIVE_AFTER_DAYS, ARCHIVE_TABLESPACE
+)
+
+class TaskPartitionMaintainer:
+    """
+    Manutenção das partições mensais de tasks. Roda na inicialização e depois a cada
+    `interval` segundos, em uma thread própria (nunca na thread do Tk):
+    - cria as partições dos próximos `ahead_days` dias (e as dos meses que tenham
+      caído na partição padrão);
+    - arquiva os meses encerrados há mais de `archive_after_days` dias que não tenham
+      tarefas pendentes: a partição é reescrita sem espaço morto, congelada e, se
+      `archive_tablespace` for informado, movida para esse tablespace. Cada partição
+      arquivada fica registrada em task_partitions_archived.
+    """
+
+    def __init__(self, repository, ahead_days=PARTITION_AHEAD_DAYS, interval=PARTITION_INTERVAL,
+                 archive_after_days=ARCHIVE_AFTER_DAYS, archive_tablespace=ARCHIVE_TABLESPACE):
+        self.repository = repository
+        self.ahead_days = ahead_days
+        self.interval = interval
+        self.archive_after_days = archive_after_days
+        self.archive_tablespace = archive_tablespace
+        self._timer = None
+        self._running = False
+        self._lock = threading.Lock()
+
+    def ensure_partitions(self):
+        """Cria agora as partições que faltam. Retorna quantas foram criadas."""
+        today = date.today()
+        with self._lock:
+            created = self.repository.ensure_task_partitions(today, today + timedelta(days=self.ahead_days))
+        if created:
+            print(f"Partições de tarefas criadas: {created}")
+        return created
+
+    def archive_once(self):
+        """Arquiva os meses antigos agora. Retorna [(partição, bytes antes, bytes depois)]."""
+        if not self.archive_after_days:
+            return []
+        before = date.today() - timedelta(days=self.archive_after_days)
+        with self._lock:
+            archived = self.repository.archive_task_partitions(before, self.archive_tablespace)
+        for partition, size_before, size_after in archived:
+            print(f"Partição {partition} arquivada: {size_before} -> {size_after} bytes.")
+        return archived
+
+    def _run(self):
+        if not self._running:
+            return
+        try:
+            self.ensure_partitions()
+            self.archive_once()
+        except Exception as e:
+            print(f"Erro no job de partições de tarefas: {e}")
+
+        # Reagenda a próxima execução
+        if self._running:
+            self._timer = threading.Timer(self.interval, self._run)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def start(self):
+        """Inicia o job; a primeira execução acontece imediatamente, em segundo plano."""
+        if not self._running:
+            self._running = True
+            print("Job de partições de tarefas iniciado.")
+            self._timer = threading.Timer(0, self._run)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def stop(self):
+        """Para o job."""
+        self._running = False
+        if self._timer:
+            self._timer.cancel()
+        print("Job de partições de tarefas parado.")
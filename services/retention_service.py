@@ -0,0 +1,78 @@
+import threading
+from datetime import date
+
+from model.db.config import RETENTION_BATCH_SIZE, RETENTION_PAUSE
+
+class RetentionJob:
+    """
+    Remove as tarefas gravadas de eventos encerrados em segundo plano, depois que a
+    janela já está aberta. Apaga em lotes de `batch_size` linhas (uma transação curta
+    cada) e pausa `pause` segundos entre eles, para não disputar locks nem conexões
+    com a interface. O cursor (evento, última data) fica no job: stop() interrompe
+    entre dois lotes e start() continua dali. Como cada lote é confirmado, uma
+    execução interrompida pelo fechamento do app também não perde o que já removeu.
+    """
+
+    def __init__(self, repository, batch_size=RETENTION_BATCH_SIZE, pause=RETENTION_PAUSE, progress=None):
+        self.repository = repository
+        self.batch_size = batch_size
+        self.pause = pause
+        self.progress = progress  # progress(removidas, eventos processados, total de eventos)
+        self.removed = 0
+        self._pending = None  # ids dos eventos ainda por limpar
+        self._total = 0
+        self._cursor = None   # última data removida do primeiro evento pendente
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def run(self):
+        """Executa até terminar (ou até stop()). Retorna o total de tarefas removidas."""
+        with self._lock:
+            if self._pending is None:
+                self._pending = self.repository.get_closed_evento_ids(date.today())
+                self._total = len(self._pending)
+                self._cursor = None
+            removed_before = self.removed
+            while self._pending and not self._stop.is_set():
+                deleted, last_date = self.repository.delete_event_tasks_batch(
+                    self._pending[0], self._cursor, self.batch_size
+                )
+                self.removed += deleted
+                if last_date is None:
+                    self._pending.pop(0)
+                    self._cursor = None
+                else:
+                    self._cursor = last_date
+                if self.progress:
+                    self.progress(self.removed, self._total - len(self._pending), self._total)
+                if deleted:
+                    # Cede a vez às consultas da interface entre os lotes
+                    self._stop.wait(self.pause)
+
+            if not self._pending:
+                self._pending = None
+                if self.removed > removed_before:
+                    self.repository.analyze_tables(('tasks', 'task_daily_stats'))
+                    print(f"Limpeza automática: {self.removed} tarefas antigas de eventos removidas")
+            return self.removed
+
+    def _run(self):
+        try:
+            self.run()
+        except Exception as e:
+            print(f"Erro na limpeza automática: {e}")
+
+    def start(self):
+        """Inicia (ou retoma) a limpeza em uma thread própria."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="agenda-retention", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """Interrompe a limpeza ao fim do lote atual."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
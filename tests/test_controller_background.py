@@ -0,0 +1,73 @@
+import threading
+import time
+
+from controller.controller import AgendaController
+
+
+class _FakeRoot:
+    """Guarda os callbacks de after() para a thread do teste executá-los, como o laço do Tk."""
+
+    def __init__(self):
+        self.pending = []
+
+    def after(self, ms, callback):
+        self.pending.append(callback)
+
+    def run_until_idle(self, timeout=5):
+        deadline = time.monotonic() + timeout
+        while self.pending and time.monotonic() < deadline:
+            time.sleep(0.01)
+            callbacks, self.pending = self.pending, []
+            for callback in callbacks:
+                callback()
+
+
+class _FakeView:
+    def __init__(self):
+        self.root = _FakeRoot()
+
+    def set_controller(self, controller):
+        pass
+
+
+def _controller():
+    return AgendaController(repository=None, view=_FakeView())
+
+
+def test_progresso_e_resultado_chegam_na_thread_que_roda_o_after():
+    controller = _controller()
+    main = threading.current_thread()
+    progress_threads, finished = [], []
+
+    def work(progress):
+        for i in range(1, 4):
+            progress(i, 3)
+        return 3
+
+    def on_progress(done, total):
+        progress_threads.append(threading.current_thread())
+
+    def on_finished(result, error):
+        finished.append((threading.current_thread(), result, error))
+
+    controller._run_in_background("teste", work, on_progress, on_finished, "Erro no teste")
+    controller.view.root.run_until_idle()
+
+    assert finished == [(main, 3, None)]
+    assert all(thread is main for thread in progress_threads)
+
+
+def test_erro_no_trabalho_e_entregue_ao_on_finished():
+    controller = _controller()
+    finished = []
+
+    def work(progress):
+        raise ValueError("arquivo inválido")
+
+    controller._run_in_background("teste", work, lambda *args: None,
+                                  lambda result, error: finished.append((result, error)), "Erro no teste")
+    controller.view.root.run_until_idle()
+
+    assert len(finished) == 1
+    result, error = finished[0]
+    assert result is None and isinstance(error, ValueError)
@@ -0,0 +1,71 @@
+import io
+from datetime import date
+
+from services.ics_service import iter_ics_records, write_ics
+
+
+def _roundtrip(data):
+    f = io.StringIO()
+    write_ics(data, f)
+    return f.getvalue(), list(iter_ics_records(io.StringIO(f.getvalue())))
+
+
+def _task(**fields):
+    task = {'id': 1, 'description': 'Tarefa', 'priority': None, 'nome': None,
+            'is_agendamento': False, 'is_evento': False, 'date': '2026-10-20',
+            'status': 'pendente', 'evento_id': None}
+    task.update(fields)
+    return task
+
+
+def test_evento_semanal_vira_uma_rrule_e_volta_igual():
+    evento = {'id': 7, 'description': 'Aula de yoga', 'nome': 'Ana', 'dias_semana': ['seg', 'sáb'],
+              'ativo': True, 'data_inicio': '2026-10-14', 'data_encerramento': '2026-12-31'}
+    cancelada = _task(id=2, description='Aula de yoga', nome='Ana', is_evento=True, evento_id=7,
+                      date='2026-10-19', status='cancelada')
+    gravada = _task(id=3, description='Aula de yoga', nome='Ana', is_evento=True, evento_id=7,
+                    date='2026-10-24', status='pendente')
+
+    text, records = _roundtrip({'eventos': [evento], 'tasks': [cancelada, gravada]})
+
+    assert text.count('BEGIN:VEVENT') == 1
+    assert 'RRULE:FREQ=WEEKLY;BYDAY=MO,SA;UNTIL=20261231' in text
+    # DTSTART avança até o primeiro dia da regra (a quarta 14/10 não é ocorrência)
+    assert 'DTSTART;VALUE=DATE:20261017' in text
+    assert [kind for _, kind, _ in records] == ['evento', 'task']
+    imported = records[0][2]
+    assert imported['dias_semana'] == ['seg', 'sáb']
+    assert (imported['description'], imported['nome']) == ('Aula de yoga', 'Ana')
+    assert (imported['data_inicio'], imported['data_encerramento']) == (date(2026, 10, 17), date(2026, 12, 31))
+    exdate = records[1][2]
+    assert (exdate['date'], exdate['status'], exdate['evento_id']) == (date(2026, 10, 19), 'cancelada', imported['id'])
+
+
+def test_agendamento_e_tarefa_mantem_status_e_prioridade():
+    agendamento = _task(id=4, description='Dentista; retorno', is_agendamento=True,
+                        status='concluída', priority='importante')
+    tarefa = _task(id=5, description='Relatório', nome='Bob', status='cancelada', priority='simples')
+
+    _, records = _roundtrip({'eventos': [], 'tasks': [agendamento, tarefa]})
+
+    assert records[0][1:] == ('task', {
+        'description': 'Dentista; retorno', 'nome': None, 'is_agendamento': True,
+        'date': date(2026, 10, 20), 'status': 'concluída', 'priority': 'importante'})
+    assert records[1][1:] == ('task', {
+        'description': 'Relatório', 'nome': 'Bob', 'date': date(2026, 10, 20),
+        'status': 'cancelada', 'priority': 'simples'})
+
+
+def test_linhas_longas_sao_dobradas_sem_partir_utf8():
+    description = 'Revisão ' * 30
+    text, records = _roundtrip({'eventos': [], 'tasks': [_task(description=description)]})
+
+    assert all(len(line.encode('utf-8')) <= 75 for line in text.split('\r\n'))
+    assert records[0][2]['description'] == description.strip()
+
+
+def test_rrule_nao_suportada_vira_registro_invalido():
+    ics = ('BEGIN:VCALENDAR\r\nBEGIN:VEVENT\r\nDTSTART;VALUE=DATE:20261019\r\n'
+           'RRULE:FREQ=MONTHLY\r\nSUMMARY:Mensal\r\nEND:VEVENT\r\nEND:VCALENDAR\r\n')
+    records = list(iter_ics_records(io.StringIO(ics)))
+    assert records == [('linha 2', 'invalido', {'erro': 'RRULE não suportada: FREQ=MONTHLY'})]
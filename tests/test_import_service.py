@@ -0,0 +1,62 @@
+from datetime import date
+
+import pytest
+
+from services.import_service import _LineStream, _copy_text, _parse_dias, _task_row
+
+
+def test_task_row_normaliza_campos():
+    row = _task_row({
+        'description': '  Ligar para o médico ',
+        'priority': 'IMPORTANTE',
+        'nome': 'Ana',
+        'is_agendamento': 'sim',
+        'date': '20/10/2026',
+        'evento_id': '',
+    })
+    assert row == ('task', None, 'Ligar para o médico', 'importante', 'Ana', True, False,
+                   None, date(2026, 10, 20), 'pendente', None, None, None, None)
+
+
+@pytest.mark.parametrize('record, erro', [
+    ({'date': '2026-10-20'}, 'sem descrição'),
+    ({'description': 'x'}, 'sem data'),
+    ({'description': 'x', 'date': '2026-13-01'}, 'data inválida'),
+    ({'description': 'x', 'date': '2026-10-20', 'priority': 'urgente'}, 'prioridade inválida'),
+    ({'description': 'x', 'date': '2026-10-20', 'status': 'feito'}, 'status inválido'),
+    ({'description': 'x', 'date': '2026-10-20', 'is_evento': 'talvez'}, 'booleano inválido'),
+])
+def test_task_row_rejeita_registros_invalidos(record, erro):
+    with pytest.raises(ValueError, match=erro):
+        _task_row(record)
+
+
+def test_parse_dias_aceita_sabado_com_e_sem_acento():
+    assert _parse_dias('{seg,sáb}') == ['seg', 'sáb']
+    assert _parse_dias('Sab; dom') == ['sáb', 'dom']
+    assert _parse_dias(['qua']) == ['qua']
+    with pytest.raises(ValueError, match='dia da semana inválido'):
+        _parse_dias('seg,xyz')
+
+
+def test_copy_text_escapa_formato_texto_do_copy():
+    assert _copy_text(None) == '\\N'
+    assert _copy_text(True) == 't'
+    assert _copy_text(False) == 'f'
+    assert _copy_text(['seg', 'sáb']) == '{seg,sáb}'
+    assert _copy_text(date(2026, 10, 20)) == '2026-10-20'
+    assert _copy_text('a\tb\nc\\d\re') == 'a\\tb\\nc\\\\d\\re'
+
+
+def test_line_stream_le_em_blocos_de_bytes():
+    stream = _LineStream(iter(['ação\n', 'b\n', 'c\n']))
+    chunks = [stream.read(4), stream.read(4), stream.read(100)]
+    assert [len(chunk) for chunk in chunks[:2]] == [4, 4]
+    assert b''.join(chunks) == 'ação\nb\nc\n'.encode('utf-8')
+    assert stream.read(10) == b''
+
+
+def test_line_stream_read_sem_tamanho_devolve_tudo():
+    stream = _LineStream(iter(['x\n', 'y\n']))
+    assert stream.readline() == b'x\ny\n'
+    assert stream.read() == b''
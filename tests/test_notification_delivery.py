@@ -0,0 +1,68 @@
+import threading
+
+from services.notification_delivery import LogBackend, NotificationQueue
+
+
+class _BlockingBackend:
+    name = 'travado'
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.calls = []
+
+    def send(self, title, message):
+        self.calls.append(title)
+        self.release.wait(5)
+
+
+def _queue(backends, **options):
+    options.setdefault('coalesce_window', 0.2)
+    options.setdefault('min_interval', 0)
+    options.setdefault('send_timeout', 1)
+    return NotificationQueue(backends, **options)
+
+
+def test_notificacao_sozinha_passa_como_esta():
+    log = LogBackend()
+    delivery = _queue([log])
+    delivery.put('Dentista', 'Amanhã às 10h')
+    delivery.start()
+    delivery.stop()
+    assert log.sent == [('Dentista', 'Amanhã às 10h')]
+
+
+def test_notificacoes_na_mesma_janela_viram_um_resumo():
+    log = LogBackend()
+    delivery = _queue([log])
+    for i in range(7):
+        delivery.put(f"Lembrete {i}", "mensagem", summary=f"Agendamento {i}")
+    delivery.start()
+    delivery.stop()
+
+    assert delivery.delivered == 1
+    title, message = log.sent[0]
+    assert title == '7 lembretes'
+    assert message.splitlines() == [f"• Agendamento {i}" for i in range(5)] + ['e mais 2']
+
+
+def test_fila_cheia_descarta_sem_bloquear():
+    delivery = _queue([LogBackend()], max_pending=2)
+    for i in range(4):
+        delivery.put(f"Lembrete {i}", "mensagem")
+    assert delivery.dropped == 2
+
+
+def test_backend_travado_nao_segura_os_demais():
+    blocking = _BlockingBackend()
+    log = LogBackend()
+    delivery = _queue([blocking, log], coalesce_window=0, send_timeout=0.05)
+    try:
+        delivery._deliver('Primeiro', 'a')
+        delivery._deliver('Segundo', 'b')
+    finally:
+        blocking.release.set()
+        delivery.stop()
+
+    # A segunda chamada ao backend travado é descartada; o log recebe as duas
+    assert blocking.calls == ['Primeiro']
+    assert [title for title, _ in log.sent] == ['Primeiro', 'Segundo']
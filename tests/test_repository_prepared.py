@@ -0,0 +1,100 @@
+import psycopg2.errors
+
+from model.db.database import close_pool
+from model.db.repository import AgendaRepository
+
+
+class _FakeConnection:
+    def __init__(self, pid=900000):
+        self.pid = pid
+        self.rollbacks = 0
+
+    def get_backend_pid(self):
+        return self.pid
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+class _FakeCursor:
+    def __init__(self, fail_on=None):
+        self.executed = []
+        self.fail_on = fail_on
+
+    def execute(self, sql, params=None):
+        if self.fail_on and sql.startswith(self.fail_on):
+            self.fail_on = None
+            raise psycopg2.errors.InvalidSqlStatementName()
+        self.executed.append((sql, params))
+
+
+def _repository(use_prepared, sql):
+    repository = AgendaRepository(use_prepared_statements=use_prepared)
+    repository.PREPARED_SQL = {'consulta': sql}
+    return repository
+
+
+def test_sem_prepare_troca_marcadores_por_parametros_nomeados():
+    repository = _repository(False, "SELECT * FROM t WHERE a = $1 AND b BETWEEN $1 AND $2")
+    cur = _FakeCursor()
+    repository._execute_prepared(_FakeConnection(), cur, 'consulta', ('x', 'y'))
+    assert cur.executed == [("SELECT * FROM t WHERE a = %(p1)s AND b BETWEEN %(p1)s AND %(p2)s",
+                             {'p1': 'x', 'p2': 'y'})]
+
+
+def test_sem_prepare_nao_confunde_p1_com_p10():
+    sql = "SELECT " + ", ".join(f"${i}" for i in range(1, 12))
+    repository = _repository(False, sql)
+    cur = _FakeCursor()
+    repository._execute_prepared(_FakeConnection(), cur, 'consulta', tuple(range(1, 12)))
+    executed, params = cur.executed[0]
+    assert executed == "SELECT " + ", ".join(f"%(p{i})s" for i in range(1, 12))
+    assert params == {f"p{i}": i for i in range(1, 12)}
+
+
+def test_com_prepare_prepara_uma_vez_por_conexao():
+    repository = _repository(True, "SELECT $1::date")
+    conn, cur = _FakeConnection(), _FakeCursor()
+    repository._execute_prepared(conn, cur, 'consulta', ('2026-10-20',))
+    repository._execute_prepared(conn, cur, 'consulta', ('2026-10-21',))
+    assert cur.executed == [
+        ("PREPARE consulta AS SELECT $1::date;", None),
+        ("EXECUTE consulta (%s);", ('2026-10-20',)),
+        ("EXECUTE consulta (%s);", ('2026-10-21',)),
+    ]
+
+
+def test_com_prepare_prepara_de_novo_se_a_sessao_perdeu_a_instrucao():
+    repository = _repository(True, "SELECT $1::date")
+    conn = _FakeConnection()
+    repository._execute_prepared(conn, _FakeCursor(), 'consulta', ('2026-10-20',))
+
+    cur = _FakeCursor(fail_on="EXECUTE")
+    repository._execute_prepared(conn, cur, 'consulta', ('2026-10-21',))
+    assert conn.rollbacks == 1
+    assert cur.executed == [
+        ("PREPARE consulta AS SELECT $1::date;", None),
+        ("EXECUTE consulta (%s);", ('2026-10-21',)),
+    ]
+
+
+def test_com_prepare_conexao_nova_com_pid_reaproveitado_prepara_de_novo():
+    # O servidor reaproveita PIDs: a conexão nova não pode herdar os nomes da antiga
+    repository = _repository(True, "SELECT $1::date")
+    old = _FakeConnection(pid=4242)
+    repository._execute_prepared(old, _FakeCursor(), 'consulta', ('2026-10-20',))
+
+    cur = _FakeCursor()
+    repository._execute_prepared(_FakeConnection(pid=4242), cur, 'consulta', ('2026-10-21',))
+    assert cur.executed[0] == ("PREPARE consulta AS SELECT $1::date;", None)
+
+
+def test_close_pool_esquece_as_instrucoes_preparadas():
+    repository = _repository(True, "SELECT $1::date")
+    conn = _FakeConnection()
+    repository._execute_prepared(conn, _FakeCursor(), 'consulta', ('2026-10-20',))
+    close_pool()
+
+    cur = _FakeCursor()
+    repository._execute_prepared(conn, cur, 'consulta', ('2026-10-21',))
+    assert cur.executed[0] == ("PREPARE consulta AS SELECT $1::date;", None)
@@ -325,9 +325,8 @@ class AlertPanel(ttk.Frame):
                 if alert['type'] == 'Agendamento' and 'item' in alert:
                     task = alert['item']
                     # Marcar a tarefa como concluída
-                    if hasattr(self.controller, 'update_task_status'):
-                        task_key = (task.date, task.description, task.nome)
-                        self.controller.update_task_status(task_key, True)
+                    if hasattr(self.controller, 'set_task_status'):
+                        self.controller.set_task_status(task, True)
                         tasks_marked += 1
             
             # Limpar a lista de alertas filtrados
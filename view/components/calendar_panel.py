@@ -216,10 +216,9 @@ class CalendarPanel:
         """Exportar dados"""
         if self.controller:
             try:
-                self.controller.handle_export_data()
-                # Feedback visual de sucesso
-                if hasattr(self, 'parent') and hasattr(self.parent, 'notification_panel'):
-                    self.parent.notification_panel.show_success("Dados exportados com sucesso!")
+                # A exportação segue em segundo plano e avisa ao terminar
+                if self.controller.handle_export_data() and hasattr(self, 'parent') and hasattr(self.parent, 'notification_panel'):
+                    self.parent.notification_panel.show_info("Exportação iniciada...")
             except Exception as e:
                 # Feedback visual de erro
                 if hasattr(self, 'parent') and hasattr(self.parent, 'notification_panel'):
@@ -8,6 +8,14 @@ from view.theme.colors import ColorPalette
 class DashboardPanel(ttk.Frame):
     """Painel de dashboard com estatísticas e gráficos."""
     
+    # Períodos disponíveis (em dias; None = todo o histórico)
+    PERIODS = {
+        "30 dias": 30,
+        "90 dias": 90,
+        "1 ano": 365,
+        "Tudo": None
+    }
+    
     def __init__(self, parent, controller):
         super().__init__(parent)
         self.controller = controller
@@ -39,10 +47,22 @@ class DashboardPanel(ttk.Frame):
                                foreground=ColorPalette.TEXT['primary'])
         title_label.grid(row=0, column=0, sticky="w")
         
+        # Seletor de período
+        period_frame = ttk.Frame(header_frame)
+        period_frame.grid(row=0, column=1, sticky="e", padx=(0, 10))
+        
+        ttk.Label(period_frame, text="Período:", 
+                 foreground=ColorPalette.TEXT['secondary']).pack(side=tk.LEFT)
+        self.period_var = tk.StringVar(value="30 dias")
+        period_combo = ttk.Combobox(period_frame, textvariable=self.period_var, 
+                                   values=list(self.PERIODS), state="readonly", width=8)
+        period_combo.pack(side=tk.LEFT, padx=(5, 0))
+        period_combo.bind("<<ComboboxSelected>>", lambda e: self._refresh_dashboard())
+        
         # Botão de atualizar
         refresh_btn = ttk.Button(header_frame, text="🔄 Atualizar", 
                                 command=self._refresh_dashboard)
-        refresh_btn.grid(row=0, column=1, sticky="e")
+        refresh_btn.grid(row=0, column=2, sticky="e")
         
         # Cards de estatísticas
         self._create_stat_cards()
@@ -124,23 +144,19 @@ class DashboardPanel(ttk.Frame):
         try:
             # Obter dados do controller
             if self.controller:
-                # Obter todas as tarefas dos últimos 30 dias
-                all_tasks = []
-                date_range = self._get_date_range()
-                
-                for date_str in date_range:
-                    try:
-                        tasks = self.controller.get_tasks_for_date(date_str)
-                        all_tasks.extend(tasks)
-                    except Exception as e:
-                        print(f"Erro ao carregar tarefas para {date_str}: {e}")
-                        continue
+                # Obter os contadores do período, agregados no banco.
+                # Períodos longos usam o rollup diário em vez de varrer as tarefas.
+                start_date, end_date = self._get_date_range()
+                if self.PERIODS[self.period_var.get()] == 30:
+                    counts = self.controller.get_task_statistics(start_date, end_date)
+                else:
+                    counts = self.controller.get_task_statistics_rollup(start_date, end_date)
                 
                 # Obter dados dos eventos
                 events = self.controller.get_all_active_events()
                 
                 # Calcular estatísticas
-                stats = self._calculate_statistics(all_tasks, events)
+                stats = self._calculate_statistics(counts, events)
                 
                 # Atualizar UI
                 self._update_dashboard(stats)
@@ -156,13 +172,12 @@ class DashboardPanel(ttk.Frame):
             self._update_dashboard(stats)
     
     def _get_date_range(self):
-        """Obter range de datas para estatísticas (últimos 30 dias)"""
-        dates = []
+        """Obter (início, fim) do período selecionado; início None para todo o histórico"""
         today = datetime.now().date()
-        for i in range(30):
-            date = today - timedelta(days=i)
-            dates.append(date.strftime('%Y-%m-%d'))
-        return dates
+        days = self.PERIODS.get(self.period_var.get(), 30)
+        if days is None:
+            return None, today
+        return today - timedelta(days=days - 1), today
     
     def _get_mock_statistics(self):
         """Obter estatísticas mock quando controller não está disponível."""
@@ -191,11 +206,11 @@ class DashboardPanel(ttk.Frame):
             'completion_rate': 53.3
         }
     
-    def _calculate_statistics(self, tasks, events):
-        """Calcular estatísticas dos dados."""
-        total_tasks = len(tasks)
-        completed_tasks = len([t for t in tasks if hasattr(t, 'status') and t.status == "concluída"])
-        pending_tasks = total_tasks - completed_tasks
+    def _calculate_statistics(self, counts, events):
+        """Montar estatísticas a partir dos contadores agregados no banco."""
+        total_tasks = counts['total']
+        completed_tasks = counts['completed']
+        pending_tasks = counts['pending']
         
         # Calcular taxa de conclusão
         completion_rate = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
@@ -208,26 +223,18 @@ class DashboardPanel(ttk.Frame):
         }
         
         # Distribuição por prioridade
-        priority_distribution = {'high': 0, 'normal': 0, 'low': 0}
-        for task in tasks:
-            if hasattr(task, 'priority') and task.priority:
-                priority = task.priority.value
-                if priority in ['MUITO_IMPORTANTE', 'IMPORTANTE']:
-                    priority_distribution['high'] += 1
-                elif priority == 'MEDIA':
-                    priority_distribution['normal'] += 1
-                else:
-                    priority_distribution['low'] += 1
+        priority_distribution = {
+            'high': counts['priority_high'],
+            'normal': counts['priority_normal'],
+            'low': counts['priority_low']
+        }
         
         # Distribuição por tipo
-        type_distribution = {'task': 0, 'meeting': 0, 'reminder': 0}
-        for task in tasks:
-            if hasattr(task, 'is_agendamento') and task.is_agendamento:
-                type_distribution['meeting'] += 1
-            elif hasattr(task, 'is_evento') and task.is_evento:
-                type_distribution['reminder'] += 1
-            else:
-                type_distribution['task'] += 1
+        type_distribution = {
+            'task': counts['type_task'],
+            'meeting': counts['type_meeting'],
+            'reminder': counts['type_reminder']
+        }
         
         stats = {
             'total_tasks': total_tasks,
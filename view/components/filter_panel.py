@@ -7,6 +7,7 @@ class FilterPanel:
     def __init__(self, parent, on_apply_filters):
         self.on_apply_filters = on_apply_filters
         self.filters = {}
+        self._search_job = None  # Busca agendada enquanto o usuário digita
 
         # Frame principal
         self.frame = ttk.LabelFrame(parent, text="🔍 Filtros", padding=10)
@@ -83,7 +84,7 @@ class FilterPanel:
         self.priority_combo.bind("<<ComboboxSelected>>", self._on_filter_change)
         self.status_combo.bind("<<ComboboxSelected>>", self._on_filter_change)
         self.tipo_combo.bind("<<ComboboxSelected>>", self._on_filter_change)
-        self.nome_entry.bind("<KeyRelease>", self._on_filter_change)
+        self.nome_entry.bind("<KeyRelease>", self._on_nome_key_release)
     
     def _on_nome_focus_in(self, event):
         """Quando o entry de nome recebe foco"""
@@ -101,8 +102,15 @@ class FilterPanel:
         """Callback para mudanças nos filtros"""
         self._apply_filters()
     
+    def _on_nome_key_release(self, event=None):
+        """Agendar a busca para quando o usuário parar de digitar"""
+        if self._search_job is not None:
+            self.frame.after_cancel(self._search_job)
+        self._search_job = self.frame.after(300, self._apply_filters)
+    
     def _apply_filters(self):
         """Aplicar filtros"""
+        self._search_job = None
         filters = {
             'nome': self.nome_var.get().strip() if self.nome_var.get() != "Digite o nome..." else "",
             'status': self.status_var.get(),
@@ -124,6 +124,11 @@ class TaskListPanel(ttk.Frame):
                                      foreground=ColorPalette.WARNING['main'])
         self.pending_label.pack(side=tk.LEFT)
         
+        # Botão de paginação da busca global (oculto fora da busca)
+        self.load_more_callback = None
+        self.load_more_btn = ttk.Button(self.stats_frame, text="⬇️ Carregar mais", 
+                                       command=self._load_more)
+        
     def _create_cards_view(self):
         """Criar visualização em cards com layout responsivo"""
         self.cards_frame = ttk.Frame(self.content_frame)
@@ -475,15 +480,10 @@ class TaskListPanel(ttk.Frame):
             print(f"[DEBUG] Task attributes: date={getattr(task, 'date', 'N/A')}, description={getattr(task, 'description', 'N/A')}, nome={getattr(task, 'nome', 'N/A')}")
             print(f"[DEBUG] Task status: {getattr(task, 'status', 'N/A')}")
             
-            # Usar o método correto do controller
-            task_key = (getattr(task, 'date', datetime.now().strftime('%Y-%m-%d')), 
-                       getattr(task, 'description', ''), 
-                       getattr(task, 'nome', ''))
-            print(f"[DEBUG] Task key: {task_key}")
-            
             try:
-                self.controller.update_task_status(task_key, not current_status)
-                print(f"[DEBUG] Método update_task_status chamado com sucesso")
+                # A tarefa carrega o próprio ID: uma única atualização no banco
+                self.controller.set_task_status(task, not current_status)
+                print(f"[DEBUG] Método set_task_status chamado com sucesso")
                 
                 # Recarregar tarefas do banco de dados
                 print(f"[DEBUG] Recarregando tarefas do banco...")
@@ -578,6 +578,19 @@ class TaskListPanel(ttk.Frame):
             # Simular adição de tarefa (será tratada pelo calendar panel)
             print("Adicionar nova tarefa - redirecionando para calendar panel")
     
+    def set_load_more_callback(self, callback):
+        """Exibir o botão "Carregar mais" com o callback informado, ou ocultá-lo com None"""
+        self.load_more_callback = callback
+        if callback:
+            self.load_more_btn.pack(side=tk.RIGHT)
+        else:
+            self.load_more_btn.pack_forget()
+    
+    def _load_more(self):
+        """Carregar a próxima página de resultados"""
+        if self.load_more_callback:
+            self.load_more_callback()
+    
     def _refresh_tasks(self):
         """Atualizar lista de tarefas"""
         self._load_tasks()
@@ -29,6 +29,8 @@ class AgendaView:
         self.root.configure(bg=ColorPalette.BACKGROUND['primary'])
 
         self.completed_tasks = {}
+        self.search_filters = None  # Filtros da busca global em andamento
+        self.search_cursor = None  # Cursor da próxima página da busca global
         self.editor_mode = False
         self.controller = None
         self.current_panel = 'tasks'  # 'tasks', 'dashboard'
@@ -332,8 +334,10 @@ class AgendaView:
             current_date = self.calendar_panel.get_selected_date()
             print(f"[GUI] Atualizando view para data: {current_date}")
             
-            # Obter tarefas da data atual
-            tasks = self.controller.get_tasks_for_date(current_date)
+            # Tarefas da data, eventos ativos e agendamentos em uma única consulta
+            snapshot = self.controller.get_refresh_snapshot(current_date)
+            tasks = snapshot['tasks']
+            events = snapshot['eventos']
             print(f"[GUI] Tarefas encontradas: {len(tasks)}")
             
             # Atualizar painel de tarefas (sempre)
@@ -348,7 +352,6 @@ class AgendaView:
             
             # Atualizar painel de eventos (sempre)
             try:
-                events = self.controller.get_all_active_events()
                 if hasattr(self.event_panel, 'update_events'):
                     self.event_panel.update_events(events)
                     print(f"[GUI] Painel de eventos atualizado: {len(events)} eventos")
@@ -360,8 +363,8 @@ class AgendaView:
                 self.calendar_panel.update_date_label()
                 print("[GUI] Label da data atualizada")
             
-            # Atualizar alertas (sempre)
-            self.update_alerts()
+            # Atualizar alertas (sempre), reaproveitando os dados já carregados
+            self.update_alerts(events, snapshot['agendamentos'])
             print("[GUI] Alertas atualizados")
             
             # Atualizar dashboard se estiver visível
@@ -381,19 +384,20 @@ class AgendaView:
             if hasattr(self, 'notification_panel'):
                 self.notification_panel.show_error(f"Erro ao atualizar interface: {str(e)}")
 
-    def update_alerts(self):
-        """Atualizar painel de alertas com tratamento de erro."""
+    def update_alerts(self, events=None, agendamentos=None):
+        """Atualizar painel de alertas com tratamento de erro.
+
+        Recebe os dados de update_view; chamado sem argumentos, busca-os no banco.
+        """
         if not self.controller:
             print("[GUI] Controller não disponível para atualizar alertas")
             return
             
         try:
-            # Obter eventos ativos
-            events = self.controller.get_all_active_events()
-            
-            # Obter todos os agendamentos (não apenas da data atual)
-            all_tasks = self.controller.get_tasks()
-            agendamentos = [task for task in all_tasks if task.is_agendamento and not task.is_evento]
+            if events is None or agendamentos is None:
+                snapshot = self.controller.get_refresh_snapshot(self.calendar_panel.get_selected_date())
+                events = snapshot['eventos']
+                agendamentos = snapshot['agendamentos']
             
             # Atualizar painel de alertas
             if hasattr(self.alert_panel, 'update_alerts'):
@@ -408,8 +412,44 @@ class AgendaView:
 
     def handle_apply_filters(self, filters):
         """Callback para aplicar filtros."""
+        # Texto digitado: busca global em todas as datas, paginada no banco
+        if filters.get('nome') and self.controller:
+            self.search_filters = filters
+            self.search_cursor = None
+            self._load_search_page()
+            return
+        
+        # Saindo da busca global: voltar às tarefas da data selecionada
+        if self.search_filters is not None:
+            self.search_filters = None
+            self.search_cursor = None
+            self.task_list_panel.set_load_more_callback(None)
+            self.update_view()
+        
         if hasattr(self.task_list_panel, 'apply_filter'):
             self.task_list_panel.apply_filter(filters)
+    
+    def _load_search_page(self):
+        """Carregar a próxima página da busca global."""
+        try:
+            tasks, next_cursor = self.controller.search_tasks(
+                self.search_filters['nome'],
+                status=self.search_filters.get('status'),
+                tipo=self.search_filters.get('tipo'),
+                priority=self.search_filters.get('priority'),
+                cursor=self.search_cursor
+            )
+        except Exception as e:
+            self.notification_panel.show_error(f"Erro na busca: {str(e)}")
+            return
+        
+        if self.search_cursor is None:
+            self.task_list_panel.update_tasks(tasks)
+        else:
+            self.task_list_panel.update_tasks(self.task_list_panel.tasks + tasks)
+        
+        self.search_cursor = next_cursor
+        self.task_list_panel.set_load_more_callback(self._load_search_page if next_cursor else None)
 
     def load_initial_data(self):
         """Carregar dados iniciais."""
@@ -442,6 +482,11 @@ class AgendaView:
                                     command=self._handle_export_data)
         self.export_btn.pack(side="right", padx=(5, 0))
         
+        # Botão de Importar
+        self.import_btn = ttk.Button(actions_frame, text="📥 Importar", 
+                                    command=self._handle_import_data)
+        self.import_btn.pack(side="right", padx=(5, 0))
+        
         # Botão de Backup
         self.backup_btn = ttk.Button(actions_frame, text="💾 Backup", 
                                     command=self._handle_create_backup)
@@ -461,13 +506,26 @@ class AgendaView:
         """Handler para exportar dados"""
         if self.controller:
             try:
-                self.controller.handle_export_data()
-                self.notification_panel.show_success("Dados exportados com sucesso!")
+                # A exportação segue em segundo plano e avisa ao terminar
+                if self.controller.handle_export_data():
+                    self.notification_panel.show_info("Exportação iniciada...")
             except Exception as e:
                 self.notification_panel.show_error(f"Erro ao exportar dados: {str(e)}")
         else:
             self.notification_panel.show_warning("Controller não disponível para exportação")
     
+    def _handle_import_data(self):
+        """Handler para importar dados"""
+        if self.controller:
+            try:
+                # A importação segue em segundo plano e avisa ao terminar
+                if self.controller.handle_import_data():
+                    self.notification_panel.show_info("Importação iniciada...")
+            except Exception as e:
+                self.notification_panel.show_error(f"Erro ao importar dados: {str(e)}")
+        else:
+            self.notification_panel.show_warning("Controller não disponível para importação")
+    
     def _handle_create_backup(self):
         """Handler para criar backup"""
         if self.controller: